@@ -9,12 +9,31 @@ def create_app():
     app = Flask(__name__, template_folder=template_dir)
     app.config["SECRET_KEY"] = "supersecret"  # later move to env var
 
+    # Create any tables added since the database file was initialized
+    from app.models.init_db import init_db
+    init_db()
+
     from app.routes.main import main_bp
     from app.routes.scrape import scrape_bp
     from app.routes.visualize import visualize_bp
+    from app.routes.metrics import metrics_bp
+    from app.routes.admin import admin_bp
+    from app.routes.api import api_bp
+    from app.services import metrics, profiling
 
     app.register_blueprint(main_bp)
     app.register_blueprint(scrape_bp)
     app.register_blueprint(visualize_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(api_bp)
+    metrics.init_app(app)
+    profiling.init_app(app)
+
+    # Chart libraries load lazily; pre-fork servers can opt in to loading them
+    # once in the master process so workers share the imported modules
+    if os.environ.get("WIKI_PRELOAD_CHARTS") == "1":
+        from app.routes.visualize import preload_chart_dependencies
+        preload_chart_dependencies()
 
     return app
@@ -0,0 +1,309 @@
+"""
+ASGI serving mode for high-concurrency chart traffic.
+
+Chart pages (every registered chart) and ``/visualize/charts/<name>.json``
+are handled natively on the event loop:
+
+- hits are answered from an in-process cache of the precompressed artifact
+  bytes, so a cached chart never touches a thread or the database,
+- misses render on a bounded process pool (``WIKI_RENDER_WORKERS``, default
+  one per CPU), replaced if a worker dies, and concurrent misses for the same chart and dataset version
+  await one shared render instead of starting their own,
+- right after a data refresh the previous version's chart is served while the
+  new one renders in the background (stale-while-revalidate), like the Flask
+  route does,
+- artifact files are checked and read on threads (``asyncio.to_thread``), so
+  a cache miss never blocks the event loop.
+
+Chart responses are timed into the same request histogram as Flask's, under
+the Flask endpoint names. Requests asking for a profile (``X-Profile``) go
+through Flask, where the profiling hook runs.
+
+Every other request is passed to the Flask app on a thread pool
+(``WIKI_WSGI_THREADS``), so the rest of the site behaves exactly as under a
+WSGI server. Run it with any ASGI server; uvicorn is in requirements.txt::
+
+    uvicorn asgi:app --workers 4
+"""
+
+import asyncio
+import io
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import parse_qs
+from app import create_app
+from app.services import artifacts
+from app.services.metrics import HTTP_REQUEST_SECONDS
+from app.services.versioning import VersionedCache, current_dataset_version
+
+CHART_JSON_PATH = re.compile(r"^/visualize/charts/([^/]+)\.json$")
+
+def _render_in_worker(name, version):
+    """Process pool entry point: render one chart into the artifact store"""
+    from app.routes.visualize import render_chart, store_chart_artifacts
+    store_chart_artifacts(version, name, render_chart(name))
+    return name
+
+class ChartServer:
+    """ASGI application serving charts natively and everything else through Flask"""
+
+    def __init__(self, flask_app, render_workers=None, wsgi_threads=None):
+        from app.routes.visualize import CHART_REGISTRY
+
+        self.flask_app = flask_app
+        self.charts = {chart.rule: name for name, chart in CHART_REGISTRY.items()}
+        self.chart_names = set(CHART_REGISTRY)
+        # Flask endpoint names, so metrics match whichever mode served the chart
+        urls = flask_app.url_map.bind("localhost")
+        self.endpoints = {}
+        for name, chart in CHART_REGISTRY.items():
+            self.endpoints[name, "html"] = urls.match(chart.rule)[0]
+            self.endpoints[name, "json"] = urls.match(f"/visualize/charts/{name}.json")[0]
+        self.render_workers = render_workers or int(os.environ.get("WIKI_RENDER_WORKERS", 0)) or os.cpu_count() or 1
+        self.wsgi_threads = ThreadPoolExecutor(
+            max_workers=wsgi_threads or int(os.environ.get("WIKI_WSGI_THREADS", 0)) or 32,
+            thread_name_prefix="wsgi"
+        )
+        self.render_pool = None
+        self.inflight = {}  # (version, name) -> asyncio.Task of the render
+        self.revalidations = set()
+        self.bodies = VersionedCache("asgi_artifacts")
+        self.renders = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        name, kind = self.route(scope)
+        headers = {key.decode("latin1"): value.decode("latin1") for key, value in scope["headers"]}
+        if name is None or scope["method"] not in ("GET", "HEAD") or self.profiling_requested(scope, headers):
+            await self.call_wsgi(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+        try:
+            status = await self.serve_chart(scope, headers, send, name, kind)
+        finally:
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start, endpoint=self.endpoints[name, kind], method=scope["method"], status=status
+            )
+
+    def profiling_requested(self, scope, headers):
+        """Whether the request carries the profiling key, like the Flask hook checks"""
+        key = headers.get("x-profile")
+        if not key:
+            key = parse_qs(scope.get("query_string", b"").decode("latin1")).get("profile", [None])[0]
+        return bool(key) and key == self.flask_app.config["SECRET_KEY"]
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def close(self):
+        if self.render_pool is not None:
+            self.render_pool.shutdown(cancel_futures=True)
+            self.render_pool = None
+        self.wsgi_threads.shutdown(wait=False)
+
+    def route(self, scope):
+        """(chart name, "html"/"json") for chart URLs, (None, None) otherwise"""
+        path = scope["path"]
+        if path in self.charts:
+            return self.charts[path], "html"
+        match = CHART_JSON_PATH.match(path)
+        if match and match.group(1) in self.chart_names:
+            return match.group(1), "json"
+        return None, None
+
+    async def ensure_rendered(self, name, version):
+        """Render ``name`` for ``version`` unless stored; concurrent callers share one render"""
+        if await asyncio.to_thread(artifacts.has_artifact, version, name, "html"):
+            return
+        key = (version, name)
+        task = self.inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._render(name, version))
+            self.inflight[key] = task
+            task.add_done_callback(lambda _: self.inflight.pop(key, None))
+        # Shielded so one client disconnecting doesn't cancel everyone's render
+        await asyncio.shield(task)
+
+    def revalidate(self, name, version):
+        """Start rendering ``name`` for ``version`` without waiting for it"""
+        if (version, name) in self.inflight:
+            return
+        task = asyncio.ensure_future(self.ensure_rendered(name, version))
+        # Keep a reference until done; the event loop only holds weak ones
+        self.revalidations.add(task)
+        task.add_done_callback(self._revalidated)
+
+    def _revalidated(self, task):
+        self.revalidations.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Error rendering chart in background: {task.exception()}")
+
+    async def _render(self, name, version):
+        from app.services.prerender import worker_pool
+        self.renders += 1
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            if self.render_pool is None:
+                self.render_pool = worker_pool(self.render_workers)
+            pool = self.render_pool
+            try:
+                await loop.run_in_executor(pool, _render_in_worker, name, version)
+                return
+            except BrokenProcessPool:
+                # A worker died (killed, out of memory): the pool is unusable
+                # from now on, so replace it and retry the render once
+                if self.render_pool is pool:
+                    print("⚠️ Chart render pool broke; starting a new one")
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    self.render_pool = None
+                if attempt:
+                    raise
+
+    async def artifact_body(self, version, name, kind, encoding):
+        """(encoding, stored bytes) of an artifact, identity if ``encoding`` isn't stored; kept in memory"""
+        key = (version, name, kind, encoding)
+        cached = self.bodies.get(key)
+        if cached is None:
+            body = await asyncio.to_thread(artifacts.load_artifact, version, name, kind, encoding)
+            if body is None and encoding is not None:
+                encoding = None
+                body = await asyncio.to_thread(artifacts.load_artifact, version, name, kind, None)
+            if body is None:
+                return None, None
+            cached = (encoding, body)
+            self.bodies.set(key, cached)
+        return cached
+
+    async def serve_chart(self, scope, headers, send, name, kind):
+        """Answer a chart request; returns the response status"""
+        # Usually one stat, but a missing marker falls back to a database query
+        version = await asyncio.to_thread(current_dataset_version)
+        requested = artifacts.negotiate_encoding(headers.get("accept-encoding", ""))
+        # A body in memory means the chart is rendered: no file access at all
+        cached = self.bodies.get((version, name, kind, requested))
+        if cached is not None:
+            encoding, body = cached
+        else:
+            stale = None
+            if not await asyncio.to_thread(artifacts.has_artifact, version, name, "html"):
+                stale = await asyncio.to_thread(artifacts.stale_version, version, name, kind)
+            if stale is not None:
+                self.revalidate(name, version)
+                version = stale
+            else:
+                try:
+                    await self.ensure_rendered(name, version)
+                except Exception as e:
+                    print(f"Error rendering chart {name}: {e}")
+                    return await self.respond(send, 500, b"Chart rendering failed", "text/plain")
+            # Builders that had nothing to plot store HTML only
+            encoding, body = await self.artifact_body(version, name, kind, requested)
+            if body is None:
+                return await self.respond(send, 404, b"Not Found", "text/plain")
+
+        # Same ETag as the Flask route, so caches stay valid across modes
+        etag = f'"v{version}-{name}-{kind}-{encoding or "identity"}"'
+        extra = [(b"etag", etag.encode("latin1")), (b"vary", b"Accept-Encoding")]
+        if encoding:
+            extra.append((b"content-encoding", encoding.encode("latin1")))
+        if etag in [tag.strip() for tag in headers.get("if-none-match", "").split(",")]:
+            return await self.respond(send, 304, b"", None, extra)
+        mimetype = "text/html; charset=utf-8" if kind == "html" else "application/json"
+        return await self.respond(send, 200, b"" if scope["method"] == "HEAD" else body, mimetype, extra,
+                                  content_length=len(body))
+
+    async def respond(self, send, status, body, content_type, extra_headers=(), content_length=None):
+        headers = []
+        if status != 304:
+            headers.append((b"content-length", str(len(body) if content_length is None else content_length).encode()))
+        if content_type:
+            headers.append((b"content-type", content_type.encode("latin1")))
+        headers.extend(extra_headers)
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+        return status
+
+    async def call_wsgi(self, scope, receive, send):
+        """Run the Flask app for this request on the thread pool"""
+        body = b""
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        loop = asyncio.get_running_loop()
+        status, headers, chunks = await loop.run_in_executor(
+            self.wsgi_threads, run_wsgi, self.flask_app, wsgi_environ(scope, body)
+        )
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": b"".join(chunks)})
+
+def wsgi_environ(scope, body):
+    """PEP 3333 environ for an ASGI HTTP scope and its request body"""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for key, value in scope.get("headers", []):
+        key, value = key.decode("latin1"), value.decode("latin1")
+        if key == "content-type":
+            environ["CONTENT_TYPE"] = value
+        elif key != "content-length":
+            name = "HTTP_" + key.upper().replace("-", "_")
+            environ[name] = f"{environ[name]},{value}" if name in environ else value
+    return environ
+
+def run_wsgi(wsgi_app, environ):
+    """Call a WSGI app and return (status, ASGI headers, body chunks)"""
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response["status"] = int(status.split(" ", 1)[0])
+        response["headers"] = [(k.lower().encode("latin1"), v.encode("latin1")) for k, v in headers]
+
+    result = wsgi_app(environ, start_response)
+    try:
+        chunks = list(result)
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+    return response["status"], response["headers"], chunks
+
+def create_asgi_app():
+    return ChartServer(create_app())
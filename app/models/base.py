@@ -1,16 +1,61 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import StaticPool
 import os
 
 # Ensure database directory exists relative to project root
+# (WIKI_DATABASE_DIR points it elsewhere, e.g. for benchmarks)
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-DATABASE_DIR = os.path.join(PROJECT_ROOT, "database")
+DATABASE_DIR = os.environ.get("WIKI_DATABASE_DIR") or os.path.join(PROJECT_ROOT, "database")
 os.makedirs(DATABASE_DIR, exist_ok=True)
 DATABASE_PATH = os.path.join(DATABASE_DIR, "wiki.db")
 
-DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
+# WIKI_DATABASE_URL selects another backend, e.g. postgresql+psycopg://user@host/wiki
+# or sqlite:// for a throwaway in-memory database. Artifacts and the version
+# marker stay in DATABASE_DIR either way.
+DATABASE_URL = os.environ.get("WIKI_DATABASE_URL") or f"sqlite:///{DATABASE_PATH}"
 
-engine = create_engine(DATABASE_URL, echo=True, future=True)
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+def engine_options(url):
+    """create_engine() keyword arguments for ``url``, with pool settings from the environment"""
+    url = make_url(url)
+    options = {"echo": os.environ.get("WIKI_DB_ECHO", "1") == "1", "future": True}
+    if url.get_backend_name() == "sqlite":
+        if url.database in (None, "", ":memory:"):
+            # One shared connection, or every checkout would see a new empty database
+            options.update(poolclass=StaticPool, connect_args={"check_same_thread": False})
+        else:
+            # Wait for the writer's lock instead of failing with "database is locked"
+            options["connect_args"] = {"timeout": _env_int("WIKI_DB_BUSY_TIMEOUT", 30)}
+        return options
+    options.update(
+        pool_size=_env_int("WIKI_DB_POOL_SIZE", 10),
+        max_overflow=_env_int("WIKI_DB_MAX_OVERFLOW", 20),
+        pool_timeout=_env_int("WIKI_DB_POOL_TIMEOUT", 30),
+        pool_recycle=_env_int("WIKI_DB_POOL_RECYCLE", 1800),
+        pool_pre_ping=True,
+    )
+    return options
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+# "sqlite", "postgresql", ...: picks dialect-specific paths in app.models.dialects
+DIALECT = engine.dialect.name
+# An in-memory database lives in this process only; worker processes can't see it
+IN_MEMORY = DIALECT == "sqlite" and make_url(DATABASE_URL).database in (None, "", ":memory:")
+
+if DIALECT == "sqlite" and not IN_MEMORY:
+    @event.listens_for(engine, "connect")
+    def _sqlite_pragmas(dbapi_connection, connection_record):
+        # WAL lets chart reads proceed while a scrape holds the write lock
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
 Base = declarative_base()
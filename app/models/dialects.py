@@ -0,0 +1,120 @@
+"""
+Write paths that differ per database backend.
+
+- ``bulk_insert``: PostgreSQL streams rows with ``COPY ... FROM STDIN``,
+  other backends use chunked executemany ``INSERT``.
+- ``upsert``: ``INSERT ... ON CONFLICT DO UPDATE`` on PostgreSQL and SQLite,
+  select-then-write elsewhere.
+- ``reset_sequences``: after rows were inserted with explicit ids, moves
+  PostgreSQL's serial sequences past them (other backends need nothing).
+
+All take an ORM class or a Core ``Table`` and run on the caller's session,
+so they join the ingest transaction.
+"""
+
+import csv
+import io
+import json
+from sqlalchemy import insert, select, text, update, JSON
+from .base import DIALECT
+
+INSERT_CHUNK_SIZE = 50000
+COPY_NULL = "\\N"
+
+def _table(entity):
+    return getattr(entity, "__table__", entity)
+
+def bulk_insert(db, entity, rows, chunk_size=INSERT_CHUNK_SIZE):
+    """Insert a list of row dicts as fast as the backend allows"""
+    if not rows:
+        return
+    table = _table(entity)
+    if DIALECT == "postgresql":
+        _copy_rows(db, table, rows)
+        return
+    for start in range(0, len(rows), chunk_size):
+        db.execute(insert(table), rows[start:start + chunk_size])
+
+def _copy_value(column, value):
+    if value is None:
+        return COPY_NULL
+    if isinstance(column.type, JSON):
+        return json.dumps(value)
+    return value
+
+def copy_statement(table, columns):
+    """``COPY ... FROM STDIN`` for ``columns`` of ``table``, in the CSV form ``copy_data`` writes"""
+    column_list = ", ".join(f'"{column.name}"' for column in columns)
+    return f'COPY "{table.name}" ({column_list}) FROM STDIN WITH (FORMAT csv, NULL \'{COPY_NULL}\')'
+
+def copy_data(columns, rows):
+    """``rows`` as the CSV text ``copy_statement`` reads"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(column, row.get(column.name)) for column in columns])
+    return buffer.getvalue()
+
+def _copy_rows(db, table, rows):
+    columns = [column for column in table.columns if column.name in rows[0]]
+    statement, data = copy_statement(table, columns), copy_data(columns, rows)
+    # COPY needs the driver connection of the session's current transaction
+    cursor = db.connection().connection.driver_connection.cursor()
+    try:
+        if hasattr(cursor, "copy"):  # psycopg 3
+            with cursor.copy(statement) as copy:
+                copy.write(data)
+        else:  # psycopg2
+            cursor.copy_expert(statement, io.StringIO(data))
+    finally:
+        cursor.close()
+
+def upsert_statement(table, index_elements, update_columns, dialect):
+    """``INSERT ... ON CONFLICT DO UPDATE`` for ``dialect`` ("postgresql" or "sqlite")"""
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    statement = dialect_insert(_table(table))
+    return statement.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={column: statement.excluded[column] for column in update_columns}
+    )
+
+def upsert(db, entity, rows, index_elements, update_columns):
+    """Insert rows, updating ``update_columns`` where ``index_elements`` already exist"""
+    if not rows:
+        return
+    table = _table(entity)
+    if DIALECT in ("postgresql", "sqlite"):
+        db.execute(upsert_statement(table, index_elements, update_columns, DIALECT), rows)
+        return
+
+    key_columns = [table.c[name] for name in index_elements]
+    existing = {tuple(row) for row in db.execute(select(*key_columns)).all()}
+    new_rows, changed_rows = [], []
+    for row in rows:
+        (changed_rows if tuple(row[name] for name in index_elements) in existing else new_rows).append(row)
+    if new_rows:
+        db.execute(insert(table), new_rows)
+    for row in changed_rows:
+        condition = [table.c[name] == row[name] for name in index_elements]
+        db.execute(update(table).where(*condition).values({column: row[column] for column in update_columns}))
+
+def sequence_reset_statement(table):
+    """``setval`` moving the serial sequence of ``table`` past its largest id (None without one)"""
+    table = _table(table)
+    if table.autoincrement_column is None:
+        return None
+    name, key = table.name, table.autoincrement_column.name
+    return (f"SELECT setval(pg_get_serial_sequence('\"{name}\"', '{key}'), "
+            f'COALESCE(MAX("{key}"), 1), MAX("{key}") IS NOT NULL) FROM "{name}"')
+
+def reset_sequences(db, entities):
+    """Point PostgreSQL sequences past ids that were inserted explicitly"""
+    if DIALECT != "postgresql":
+        return  # SQLite's rowid and other backends follow the largest id on their own
+    for entity in entities:
+        statement = sequence_reset_statement(entity)
+        if statement:
+            db.execute(text(statement))
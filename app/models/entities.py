@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Date, Boolean, Text, JSON
+from sqlalchemy import Column, Integer, SmallInteger, String, Float, ForeignKey, Date, DateTime, Boolean, Text, JSON, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from .base import Base
 
@@ -83,3 +83,89 @@ class CountryLanguage(Base):
     # Relationships
     country = relationship("Country", back_populates="languages")
     language = relationship("Language")
+
+class Currency(Base):
+    __tablename__ = "currency"
+    id = Column(Integer, primary_key=True, index=True)
+    code = Column(String(3), nullable=False, unique=True)  # ISO 4217, e.g. EUR
+    name = Column(String)
+    symbol = Column(String)
+
+class CountryCurrency(Base):
+    __tablename__ = "country_currency"
+    country_id = Column(Integer, ForeignKey("country.id"), primary_key=True)
+    currency_id = Column(Integer, ForeignKey("currency.id"), primary_key=True)
+    
+    # "Countries using X" reads this index instead of the table
+    __table_args__ = (
+        Index("ix_country_currency_currency", "currency_id", "country_id"),
+    )
+
+class Timezone(Base):
+    __tablename__ = "timezone"
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False, unique=True)  # UTC+01:00, as REST Countries writes it
+    utc_offset_minutes = Column(Integer, index=True)
+
+class CountryTimezone(Base):
+    __tablename__ = "country_timezone"
+    country_id = Column(Integer, ForeignKey("country.id"), primary_key=True)
+    timezone_id = Column(Integer, ForeignKey("timezone.id"), primary_key=True)
+    
+    __table_args__ = (
+        Index("ix_country_timezone_timezone", "timezone_id", "country_id"),
+    )
+
+class Indicator(Base):
+    __tablename__ = "indicator"
+    id = Column(Integer, primary_key=True, index=True)
+    code = Column(String, nullable=False, unique=True)  # World Bank code, e.g. NY.GDP.MKTP.CD
+    name = Column(String, nullable=False)
+    unit = Column(String)
+
+class IndicatorValue(Base):
+    __tablename__ = "indicator_value"
+    # One row per (country, indicator, year); no surrogate id to keep rows small
+    country_id = Column(Integer, ForeignKey("country.id"), primary_key=True)
+    indicator_id = Column(Integer, ForeignKey("indicator.id"), primary_key=True)
+    year = Column(SmallInteger, primary_key=True)
+    value = Column(Float, nullable=False)
+    
+    # Year-range reads across all countries scan this index, not the table
+    __table_args__ = (
+        Index("ix_indicator_value_indicator_year", "indicator_id", "year", "country_id", "value"),
+    )
+
+class DatasetVersion(Base):
+    __tablename__ = "dataset_version"
+    # Single row (id=1) bumped in the same transaction as every ingest commit
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime)
+
+class IngestCheckpoint(Base):
+    __tablename__ = "ingest_checkpoint"
+    # Finished fetch steps of an ingest that hasn't committed yet, so a
+    # restarted job can skip them; cleared in the ingest's commit
+    job = Column(String, primary_key=True)  # countries
+    step = Column(String, primary_key=True)  # source:restcountries, indicator:SP.POP.TOTL:page:1
+    payload = Column(LargeBinary, nullable=False)  # gzip-compressed JSON of the step's result
+    completed_at = Column(DateTime, nullable=False)
+
+class CountryChange(Base):
+    __tablename__ = "country_change"
+    # Append-only field-level history, written by each ingest: one row per
+    # changed field or added/removed country, nothing for unchanged ones
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False)  # dataset version the change was committed in
+    changed_at = Column(DateTime, nullable=False)
+    iso_code_alpha3 = Column(String(3), nullable=False)
+    change = Column(String(7), nullable=False)  # added, removed, updated
+    field = Column(String)  # None for added and removed countries
+    old_value = Column(JSON)
+    new_value = Column(JSON)
+    
+    __table_args__ = (
+        Index("ix_country_change_version", "version"),
+        Index("ix_country_change_country_field", "iso_code_alpha3", "field", "version"),
+    )
@@ -0,0 +1,36 @@
+from flask import Blueprint, render_template, request, current_app, abort, send_file
+from app.services.profiling import TOP_N, list_profiles, load_profile, profile_stats_path
+
+admin_bp = Blueprint('admin', __name__)
+
+def require_admin_key():
+    """Admin pages use the same secret key as the scrape form"""
+    if request.args.get('key') != current_app.config["SECRET_KEY"]:
+        abort(403)
+
+def top_n(default):
+    """Rows to show per table from ``?top=``; summaries store at most TOP_N"""
+    return max(1, min(request.args.get('top', default, type=int), TOP_N))
+
+@admin_bp.route("/admin/profiles")
+def profiles():
+    require_admin_key()
+    return render_template("profiles.html", profiles=list_profiles(), selected=None,
+                           key=request.args.get('key'), top_n=top_n(10))
+
+@admin_bp.route("/admin/profiles/<profile_id>")
+def profile_detail(profile_id):
+    require_admin_key()
+    profile = load_profile(profile_id)
+    if profile is None:
+        abort(404)
+    return render_template("profiles.html", profiles=list_profiles(), selected=profile,
+                           key=request.args.get('key'), top_n=top_n(TOP_N))
+
+@admin_bp.route("/admin/profiles/<profile_id>/profile.pstats")
+def profile_download(profile_id):
+    require_admin_key()
+    path = profile_stats_path(profile_id)
+    if path is None:
+        abort(404)
+    return send_file(path, as_attachment=True, download_name=f"{profile_id}.pstats")
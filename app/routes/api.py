@@ -0,0 +1,141 @@
+from flask import Blueprint, request, jsonify
+import time
+
+api_bp = Blueprint("api", __name__)
+
+MAX_NEAR_RESULTS = 1000
+MAX_LIST_RESULTS = 10000
+
+def bad_request(message):
+    return jsonify({"error": message}), 400
+
+def limit_arg(default, maximum=MAX_LIST_RESULTS):
+    """?limit= as an int in [1, maximum], or None when invalid"""
+    limit = request.args.get("limit", default, type=int)
+    return limit if limit is not None and 1 <= limit <= maximum else None
+
+def language_summary():
+    from app.services.language_graph import load_summary
+    return load_summary()
+
+@api_bp.route("/api/countries/near")
+def countries_near():
+    """Nearest countries to ?lat=&lon=, either the closest ?k= or all within ?radius_km="""
+    # NumPy is imported on first use like the chart libraries
+    from app.services.spatial import load_centroid_index
+
+    try:
+        lat = float(request.args["lat"])
+        lon = float(request.args["lon"])
+    except (KeyError, ValueError):
+        return bad_request("lat and lon are required numbers")
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return bad_request("lat must be within [-90, 90] and lon within [-180, 180]")
+    k = request.args.get("k", 10, type=int)
+    radius_km = request.args.get("radius_km", type=float)
+    if not 1 <= k <= MAX_NEAR_RESULTS:
+        return bad_request(f"k must be between 1 and {MAX_NEAR_RESULTS}")
+    if radius_km is not None and radius_km < 0:
+        return bad_request("radius_km must not be negative")
+
+    index = load_centroid_index()
+    start = time.perf_counter()
+    if radius_km is None:
+        rows, distances = index.nearest(lat, lon, k)
+    else:
+        # k caps how many of the countries inside the radius are returned
+        rows, distances = index.within(lat, lon, radius_km, limit=k)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    return jsonify({
+        "query": {"lat": lat, "lon": lon, "k": k, "radius_km": radius_km},
+        "elapsed_ms": round(elapsed_ms, 4),
+        "countries": [{
+            "id": int(index.ids[row]),
+            "name": index.names[row],
+            "iso_code_alpha3": index.iso3[row],
+            "latitude": float(index.lat[row]),
+            "longitude": float(index.lon[row]),
+            "distance_km": round(float(distance), 3)
+        } for row, distance in zip(rows, distances)]
+    })
+
+@api_bp.route("/api/regions")
+def regions():
+    """Per-region totals from the materialized aggregate refreshed by each ingest"""
+    from app.services.aggregates import load_region_summary
+    from app.services.versioning import current_dataset_version
+    return jsonify({"version": current_dataset_version(), "regions": load_region_summary()})
+
+@api_bp.route("/api/languages")
+def languages():
+    """Languages by estimated speakers, optionally only ?community="""
+    limit = limit_arg(50)
+    if limit is None:
+        return bad_request(f"limit must be between 1 and {MAX_LIST_RESULTS}")
+    summary = language_summary()
+    if summary is None:
+        return jsonify({"error": "No language data available"}), 404
+
+    stats = summary["language_stats"]
+    community = request.args.get("community", type=int)
+    if community is not None:
+        stats = [language for language in stats if language["community"] == community]
+    return jsonify({
+        "version": summary["version"],
+        "countries": summary["countries"],
+        "languages": summary["languages"],
+        "language_stats": stats[:limit]
+    })
+
+@api_bp.route("/api/languages/communities")
+def language_communities():
+    """Connected language communities, largest estimated speaker count first"""
+    limit = limit_arg(20)
+    if limit is None:
+        return bad_request(f"limit must be between 1 and {MAX_LIST_RESULTS}")
+    summary = language_summary()
+    if summary is None:
+        return jsonify({"error": "No language data available"}), 404
+    return jsonify({
+        "version": summary["version"],
+        "total": len(summary["communities"]),
+        "communities": summary["communities"][:limit]
+    })
+
+@api_bp.route("/api/languages/network")
+def language_network():
+    """Most frequent language pairs and the strongest shared-language country links"""
+    limit = limit_arg(50)
+    if limit is None:
+        return bad_request(f"limit must be between 1 and {MAX_LIST_RESULTS}")
+    summary = language_summary()
+    if summary is None:
+        return jsonify({"error": "No language data available"}), 404
+    network = dict(summary["country_network"], top_links=summary["country_network"]["top_links"][:limit])
+    return jsonify({
+        "version": summary["version"],
+        "language_pairs": summary["pairs"][:limit],
+        "country_network": network
+    })
+
+@api_bp.route("/api/changes")
+def changes():
+    """Field-level changes recorded by ingests after ?since= (dataset version or ISO date), newest first"""
+    from app.services.change_history import parse_filters, load_changes, change_summary
+    from app.services.versioning import current_dataset_version
+    limit = limit_arg(1000)
+    if limit is None:
+        return bad_request(f"limit must be between 1 and {MAX_LIST_RESULTS}")
+    try:
+        filters = parse_filters(request.args)
+    except ValueError as e:
+        return bad_request(str(e))
+    total, rows = load_changes(limit=limit, **filters)
+    return jsonify({
+        "version": current_dataset_version(),
+        "since": request.args.get("since"),
+        "total": total,
+        "ingests": change_summary(**filters),
+        "changes": rows
+    })
@@ -1,6 +1,23 @@
-from flask import Blueprint, render_template
+from flask import Blueprint, render_template, request
 main_bp = Blueprint("main", __name__)
 
 @main_bp.route("/")
 def index():
     return render_template("home.html")
+
+@main_bp.route("/changes")
+def changes():
+    """What changed between scrapes, filtered like /api/changes"""
+    from app.services.change_history import TRACKED_FIELDS, parse_filters, load_changes, change_summary, field_summary
+    error = None
+    try:
+        filters = parse_filters(request.args)
+    except ValueError as e:
+        error = str(e)
+        filters = parse_filters({})
+    total, rows = load_changes(limit=500, **filters)
+    return render_template(
+        "changes.html", error=error, args=request.args, fields=TRACKED_FIELDS, total=total, changes=rows,
+        ingests=change_summary(**filters),
+        field_counts=field_summary(filters["since_version"], filters["since_time"], filters["country"])
+    )
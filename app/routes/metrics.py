@@ -0,0 +1,14 @@
+from flask import Blueprint, Response
+from app.services import metrics
+from app.services.versioning import current_dataset_version
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route("/metrics")
+def prometheus_metrics():
+    extra = [
+        "# HELP wiki_dataset_version Current dataset version",
+        "# TYPE wiki_dataset_version gauge",
+        f"wiki_dataset_version {current_dataset_version()}",
+    ]
+    return Response(metrics.render_prometheus(extra), mimetype="text/plain; version=0.0.4")
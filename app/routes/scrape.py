@@ -1,7 +1,13 @@
 from flask import Blueprint, request, render_template, current_app, jsonify, redirect, url_for
 from app.services.scraper.countries import fetch_and_store_countries
+from app.services.scraper import validation
 from app.services.scraper.organizations import fetch_and_store_organizations
 from app.services.scraper.relations import fetch_and_store_trade_relations, fetch_and_store_borders
+from app.services.versioning import current_dataset_version
+from app.services.prerender import prerender_charts
+from app.services.static_export import EXPORT_DIR, export_static
+from app.services import metrics
+from app.services.profiling import ProfileSession, ProfilerBusy
 import threading
 import time
 from datetime import datetime
@@ -15,12 +21,43 @@ scraping_status = {
     'current_task': '',
     'progress': 0,
     'error': None,
-    'timestamp': None
+    'timestamp': None,
+    'dataset_version': None,
+    'timings': {},
+    'metrics': [],
+    'validation': None,
+    'profile_id': None
 }
 
+def run_task(task, func, *args):
+    """Run one scrape task, recording its duration and metrics in the job status"""
+    start = time.perf_counter()
+    try:
+        with metrics.scope(f"scrape:{task}"):
+            return func(*args)
+    finally:
+        scraping_status['timings'][task] = round(time.perf_counter() - start, 3)
+
+def run_profiled_scraping_process():
+    """Run the scraping process under the profiler, storing artifacts per job"""
+    session = ProfileSession("job", "scrape")
+    try:
+        session.start()
+    except ProfilerBusy:
+        # A profiled request is running; scrape without profiling rather than not at all
+        run_scraping_process()
+        return
+    
+    scraping_status['profile_id'] = session.profile_id
+    try:
+        run_scraping_process()
+    finally:
+        session.stop(error=scraping_status['error'])
+
 def run_scraping_process():
     """Run the scraping process in background thread"""
     global scraping_status
+    metrics_before = metrics.snapshot()
     
     try:
         scraping_status['in_progress'] = True
@@ -28,37 +65,57 @@ def run_scraping_process():
         scraping_status['error'] = None
         scraping_status['progress'] = 0
         scraping_status['timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        scraping_status['timings'] = {}
+        scraping_status['metrics'] = []
+        scraping_status['validation'] = None
+        validation.last_report = None
         
         # Task 1: Countries
         scraping_status['current_task'] = 'Fetching countries data...'
         scraping_status['progress'] = 25
-        fetch_and_store_countries()
+        try:
+            scraping_status['dataset_version'] = run_task('countries', fetch_and_store_countries)
+        finally:
+            if validation.last_report is not None:
+                scraping_status['validation'] = validation.last_report.as_dict()
         
         # Task 2: Organizations
         scraping_status['current_task'] = 'Processing organizations...'
         scraping_status['progress'] = 50
-        fetch_and_store_organizations()
+        run_task('organizations', fetch_and_store_organizations)
         
         # Task 3: Trade relations
         scraping_status['current_task'] = 'Analyzing trade relations...'
         scraping_status['progress'] = 75
-        fetch_and_store_trade_relations()
+        run_task('trade_relations', fetch_and_store_trade_relations)
         
         # Task 4: Borders
         scraping_status['current_task'] = 'Mapping borders...'
         scraping_status['progress'] = 90
-        fetch_and_store_borders()
+        run_task('borders', fetch_and_store_borders)
+        
+        # Task 5: Pre-render charts for the new dataset version
+        scraping_status['current_task'] = 'Pre-rendering charts...'
+        scraping_status['progress'] = 95
+        run_task('prerender', prerender_charts, scraping_status['dataset_version'])
+        
+        # Task 6: Static copy of the site, when WIKI_STATIC_EXPORT_DIR is set
+        if EXPORT_DIR:
+            scraping_status['current_task'] = 'Exporting static site...'
+            run_task('export_static', export_static, EXPORT_DIR, scraping_status['dataset_version'])
         
         # Completion
         scraping_status['current_task'] = 'Finalizing data...'
         scraping_status['progress'] = 100
         time.sleep(1)
         
+        scraping_status['metrics'] = metrics.summarize_since(metrics_before, scope_prefix='scrape:')
         scraping_status['in_progress'] = False
         scraping_status['completed'] = True
         scraping_status['current_task'] = 'Scraping completed successfully!'
         
     except Exception as e:
+        scraping_status['metrics'] = metrics.summarize_since(metrics_before, scope_prefix='scrape:')
         scraping_status['in_progress'] = False
         scraping_status['error'] = str(e)
         scraping_status['current_task'] = f'Error occurred: {str(e)}'
@@ -77,7 +134,9 @@ def scrape():
             return render_template("scrape.html", error="Scraping already in progress. Please wait.")
         
         # Start scraping in background thread
-        thread = threading.Thread(target=run_scraping_process)
+        scraping_status['profile_id'] = None
+        profile = request.form.get('profile') == '1'
+        thread = threading.Thread(target=run_profiled_scraping_process if profile else run_scraping_process)
         thread.daemon = True
         thread.start()
         
@@ -92,6 +151,7 @@ def scrape_progress():
 @scrape_bp.route("/scrape/status")
 def scrape_status():
     global scraping_status
+    scraping_status['dataset_version'] = current_dataset_version()
     return jsonify(scraping_status)
 
 @scrape_bp.route("/scrape/completed")
@@ -1,31 +1,169 @@
-from flask import Blueprint, render_template, jsonify
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import json
-from app.models.base import SessionLocal
-from app.models.entities import Country, Continent, Language, CountryLanguage
-from sqlalchemy import func
+from flask import Blueprint, render_template, jsonify, request, Response, abort, has_request_context
+from concurrent.futures import ThreadPoolExecutor
+import threading
+from app.services import artifacts, frames, geometry, metrics, profiling
+from app.services.versioning import current_dataset_version
 
 visualize_bp = Blueprint('visualize', __name__)
 
-def safe_numeric(value, default=0):
-    """Safely convert to numeric value"""
-    try:
-        return float(value) if value is not None else default
-    except (ValueError, TypeError):
-        return default
+# Chart endpoint name -> ChartSpec (see register_chart)
+CHART_REGISTRY = {}
 
-def create_chart_html(fig, title="Data Visualization"):
-    """Create a full HTML page for a Plotly chart"""
+# pandas and Plotly take most of the app's import time, so chart builders
+# import them on first use. Pre-fork servers can call this once in the master
+# (create_app does so when WIKI_PRELOAD_CHARTS=1) to share the loaded modules.
+def preload_chart_dependencies():
+    """Import the visualization libraries ahead of the first chart request"""
+    import pandas
+    import plotly.express
+    import plotly.graph_objects
+    import plotly.subplots
+
+# Plays an animated chart by streaming year frames from /visualize/frames.
+# Runs after Plotly draws the figure; charts opt in by putting
+# {"code", "version", "start", "fields", "rows"} under layout.meta.frames,
+# where rows[t] lists the frame row of every point in trace t.
+FRAME_PLAYER_SCRIPT = """
+var gd = document.getElementById('{plot_id}');
+var player = gd.layout.meta && gd.layout.meta.frames;
+if (!player) return;
+var base = '/visualize/frames/' + player.version + '/' + encodeURIComponent(player.code);
+var controls = document.createElement('div');
+controls.className = 'flex items-center gap-4 mb-4';
+controls.innerHTML = '<button class="px-4 py-2 bg-blue-600 hover:bg-blue-500 text-white rounded-lg transition-colors w-28"></button>' +
+    '<input type="range" class="flex-1" min="0" step="1">' +
+    '<span class="text-xl font-semibold text-white w-16 text-right"></span>';
+gd.parentNode.insertBefore(controls, gd);
+var button = controls.querySelector('button');
+var slider = controls.querySelector('input');
+var label = controls.querySelector('span');
+var playIcon = '<i class="fa-solid fa-play"></i> Play';
+button.innerHTML = playIcon;
+
+fetch(base + '/meta.json').then(function(r) { return r.json(); }).then(function(meta) {
+    var chunks = {}, current = player.start, playing = false;
+    var traces = player.rows.map(function(_, i) { return i; });
+    slider.max = meta.years.length - 1;
+    slider.value = current;
+    label.textContent = meta.years[current];
+
+    function chunk(i) {
+        if (!(i in chunks)) {
+            chunks[i] = fetch(base + '/' + i + '.bin')
+                .then(function(r) { return r.arrayBuffer(); })
+                .then(function(buffer) { return new Float32Array(buffer); });
+        }
+        return chunks[i];
+    }
+    function show(index) {
+        var c = Math.floor(index / meta.chunk_years);
+        if (c + 1 < meta.chunks) chunk(c + 1);  // prefetch while this chunk plays
+        return chunk(c).then(function(values) {
+            var offset = (index - c * meta.chunk_years) * meta.countries;
+            var columns = player.rows.map(function(rows) {
+                return rows.map(function(row) {
+                    var v = values[offset + row];
+                    return isNaN(v) ? null : v;
+                });
+            });
+            var update = {};
+            player.fields.forEach(function(field) { update[field] = columns; });
+            current = index;
+            slider.value = index;
+            label.textContent = meta.years[index];
+            return Plotly.restyle(gd, update, traces);
+        });
+    }
+    function stop() {
+        playing = false;
+        button.innerHTML = playIcon;
+    }
+    function step() {
+        if (!playing) return;
+        if (current + 1 >= meta.years.length) return stop();
+        show(current + 1).then(function() { setTimeout(step, 400); });
+    }
+    button.onclick = function() {
+        if (playing) return stop();
+        playing = true;
+        button.innerHTML = '<i class="fa-solid fa-pause"></i> Pause';
+        if (current + 1 >= meta.years.length) current = -1;
+        step();
+    };
+    slider.oninput = function() {
+        stop();
+        show(parseInt(slider.value, 10));
+    };
+});
+"""
+
+# Swaps a choropleth's local geometry for the matching simplification level
+# as the map is zoomed; enabled by layout.meta.geometry = {"url", "zoom", "levels"}
+GEOMETRY_ZOOM_SCRIPT = """
+var gd = document.getElementById('{plot_id}');
+var geometry = gd.layout.meta && gd.layout.meta.geometry;
+if (!geometry) return;
+var level = geometry.zoom;
+gd.on('plotly_relayout', function(update) {
+    var scale = update['geo.projection.scale'];
+    if (scale === undefined) return;
+    var next = Math.max(0, Math.min(geometry.levels - 1, geometry.zoom + Math.round(Math.log2(scale))));
+    if (next === level) return;
+    level = next;
+    Plotly.restyle(gd, {geojson: geometry.url.replace('{zoom}', level)});
+});
+"""
+
+# Refetches a binned scatter chart's detail for the visible window as it is
+# zoomed or panned; enabled by layout.meta.lod (see app.services.lod)
+LOD_ZOOM_SCRIPT = """
+var gd = document.getElementById('{plot_id}');
+var lod = gd.layout.meta && gd.layout.meta.lod;
+if (!lod) return;
+var overview = gd.data[lod.heatmap];
+var initial = {x: [overview.x], y: [overview.y], z: [overview.z], visible: true};
+var latest = 0;
+function show(heatmap, points) {
+    Plotly.restyle(gd, heatmap, [lod.heatmap]);
+    Plotly.restyle(gd, points, [lod.detail]);
+}
+function range(axis, log) {
+    var r = gd.layout[axis].range;
+    return log ? [Math.pow(10, r[0]), Math.pow(10, r[1])] : r;
+}
+gd.on('plotly_relayout', function(update) {
+    var request = ++latest;
+    if (update['xaxis.autorange'] || update['yaxis.autorange']) {
+        return show(initial, {x: [[]], y: [[]], text: [[]]});
+    }
+    if (!Object.keys(update).some(function(key) { return key.indexOf('axis.range') > 0; })) return;
+    var x = range('xaxis', lod.log_x), y = range('yaxis', lod.log_y);
+    var query = 'x0=' + x[0] + '&x1=' + x[1] + '&y0=' + y[0] + '&y1=' + y[1];
+    fetch(lod.url + '?' + query).then(function(r) { return r.json(); }).then(function(detail) {
+        if (request !== latest) return;  // a newer zoom is already on its way
+        if (detail.mode === 'bins') {
+            show({x: [detail.x], y: [detail.y], z: [detail.z], visible: true}, {x: [[]], y: [[]], text: [[]]});
+        } else {
+            show({visible: false}, {x: [detail.x], y: [detail.y], text: [detail.text]});
+        }
+    });
+});
+"""
+
+def create_chart_html(fig, title="Data Visualization", post_script=None, plotlyjs=True):
+    """Create a full HTML page for a Plotly chart.
+
+    ``plotlyjs`` is True to inline plotly.js, or the URL of a shared copy.
+    """
     chart_html = fig.to_html(
+        include_plotlyjs=plotlyjs,
         config={
             'displayModeBar': True,
             'displaylogo': False,
             'modeBarButtonsToRemove': ['lasso2d', 'select2d']
         },
-        div_id="chart"
+        div_id="chart",
+        post_script=post_script
     )
     
     return f"""
@@ -66,6 +204,304 @@ def create_chart_html(fig, title="Data Visualization"):
     </html>
     """
 
+# Applied to every chart before its own layout, so the site looks the same throughout
+BASE_LAYOUT = dict(
+    template="plotly_dark",
+    font=dict(color="white"),
+    plot_bgcolor="#111",
+    paper_bgcolor="#111"
+)
+
+class ChartSpec:
+    """A chart declared as data rather than as a view function.
+
+    - ``sources``: names in DATA_SOURCES the chart reads; the engine loads
+      them (once per batch of charts) and passes them to ``data`` as a dict.
+    - ``data(sources)``: builds what the figure is drawn from, usually a
+      DataFrame, or returns a plain message when there is nothing to plot.
+    - ``figure``: a Plotly Express function name, called as
+      ``px.<figure>(data, **params)``, or a callable ``figure(data, **params)``
+      for charts that need graph objects.
+    - ``layout``: applied over BASE_LAYOUT once the figure is built.
+    - ``script``: JavaScript run once the figure is drawn.
+    - ``lod``: run the figure through the level-of-detail stage, which
+      switches large scatter traces to WebGL or server-side bins.
+    """
+
+    def __init__(self, name, rule, title, sources, data, figure, params=None, layout=None, script=None, lod=True):
+        self.name = name
+        self.rule = rule
+        self.title = title
+        self.sources = tuple(sources)
+        self.data = data
+        self.figure = figure
+        self.params = params or {}
+        self.layout = layout or {}
+        self.script = script
+        self.lod = lod
+
+    def build(self, sources, lod=True):
+        """Figure (or message) for this chart from already loaded ``sources``"""
+        with metrics.stage("dataframe"):
+            data = self.data(sources)
+        if isinstance(data, str):
+            return data
+        with metrics.stage("figure"):
+            if isinstance(self.figure, str):
+                import plotly.express as px
+                fig = getattr(px, self.figure)(data, **self.params)
+            else:
+                fig = self.figure(data, **self.params)
+            fig.update_layout(**BASE_LAYOUT)
+            fig.update_layout(**self.layout)
+        if lod and self.lod:
+            from app.services.lod import apply_level_of_detail
+            with metrics.stage("lod"):
+                fig = apply_level_of_detail(fig, self.name)
+        return fig
+
+    def scripts(self, fig):
+        """Post-scripts for a built figure: the chart's own plus the zoom script if it was binned"""
+        scripts = [] if self.script is None else [self.script] if isinstance(self.script, str) else list(self.script)
+        if isinstance(fig.layout.meta, dict) and "lod" in fig.layout.meta:
+            scripts.append(LOD_ZOOM_SCRIPT)
+        return scripts or None
+
+def render_chart(name, sources=None, plotlyjs=True):
+    """Render a registered chart and return its HTML page and figure JSON.
+
+    ``sources`` are data sources already loaded by ``render_charts``; the
+    chart loads its own otherwise. ``plotlyjs`` as in create_chart_html.
+    """
+    chart = CHART_REGISTRY[name]
+    with metrics.scope(f"chart:{name}"):
+        if sources is None:
+            sources = load_sources(chart.sources)
+        result = chart.build(sources)
+        if isinstance(result, str):
+            # Charts return a plain message when there is nothing to plot
+            return {"html": result, "figure": None}
+        with metrics.stage("to_html"):
+            html = create_chart_html(result, chart.title, chart.scripts(result), plotlyjs)
+        with metrics.stage("to_json"):
+            figure = result.to_json()
+    return {"html": html, "figure": figure}
+
+def render_charts(names, plotlyjs=True):
+    """Render several charts, loading every data source they share only once"""
+    wanted = list(dict.fromkeys(source for name in names for source in CHART_REGISTRY[name].sources))
+    with metrics.scope("charts"):
+        sources = load_sources(wanted)
+    return {name: render_chart(name, sources, plotlyjs) for name in names}
+
+def store_chart_artifacts(version, name, rendered, best=False):
+    """Compress a rendered chart into the artifact store for ``version``"""
+    with metrics.scope(f"chart:{name}"), metrics.stage("compress"):
+        if rendered["figure"] is not None:
+            artifacts.store_artifact(version, name, "json", rendered["figure"].encode("utf-8"), best)
+        # HTML goes last since its presence is what marks the chart as rendered
+        artifacts.store_artifact(version, name, "html", rendered["html"].encode("utf-8"), best)
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one execution.
+
+    The first caller runs the function; callers arriving while it runs wait
+    and get the same result (or exception) instead of running it again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {"done": threading.Event(), "result": None, "error": None}
+        if not leader:
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+
+        try:
+            call["result"] = func()
+            return call["result"]
+        except Exception as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call["done"].set()
+
+    def in_flight(self, key):
+        with self._lock:
+            return key in self._calls
+
+_renders = SingleFlight()
+# Background renders for stale-while-revalidate; a couple is plenty since
+# each chart renders at most once per version
+_revalidation_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="chart-revalidate")
+
+def ensure_chart_rendered(version, name):
+    """Render and store ``name`` for ``version`` unless stored; one render per chart and version at a time"""
+    def render():
+        # Re-checked inside the flight: the previous leader or the
+        # pre-render stage may have stored it meanwhile
+        if not artifacts.has_artifact(version, name, "html"):
+            store_chart_artifacts(version, name, render_chart(name))
+    _renders.do((version, name), render)
+
+def revalidate_in_background(version, name):
+    if _renders.in_flight((version, name)):
+        return
+    def revalidate():
+        try:
+            ensure_chart_rendered(version, name)
+        except Exception as e:
+            print(f"Error rendering chart {name} for version {version}: {e}")
+    _revalidation_pool.submit(revalidate)
+
+def serve_chart_artifact(name, kind):
+    """Serve precompressed chart bytes for the current dataset version.
+
+    On a miss the previous version's chart is served while the current one
+    renders in the background (stale-while-revalidate); only a chart that
+    was never rendered makes the request wait, and concurrent waiters share
+    one render.
+    """
+    version = current_dataset_version()
+    mimetype = "text/html" if kind == "html" else "application/json"
+    # Profiled requests always render so the profile shows the real work
+    if profiling.is_profiling():
+        store_chart_artifacts(version, name, render_chart(name))
+    elif not artifacts.has_artifact(version, name, "html"):
+        stale = artifacts.stale_version(version, name, kind)
+        if stale is not None:
+            revalidate_in_background(version, name)
+            return artifact_response(stale, name, kind, mimetype)
+        ensure_chart_rendered(version, name)
+    return artifact_response(version, name, kind, mimetype)
+
+def artifact_response(version, name, kind, mimetype):
+    """Stream a stored artifact in the best encoding the client accepts"""
+    if not artifacts.has_artifact(version, name, kind):
+        abort(404)
+
+    encoding = artifacts.negotiate_encoding(request.headers.get("Accept-Encoding", ""))
+    body = artifacts.load_artifact(version, name, kind, encoding)
+    if body is None:
+        encoding = None
+        body = artifacts.load_artifact(version, name, kind)
+
+    response = Response(body, mimetype=mimetype)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.headers["Vary"] = "Accept-Encoding"
+    response.set_etag(f"v{version}-{name}-{kind}-{encoding or 'identity'}")
+    return response.make_conditional(request)
+
+def register_chart(spec):
+    """Add a ChartSpec to the registry and serve it at ``spec.rule``.
+
+    Requests are served from the artifact store, rendering on a miss. The
+    returned view can also be called directly (scripts, tests) to get the
+    freshly rendered page.
+    """
+    CHART_REGISTRY[spec.name] = spec
+
+    def view():
+        if not has_request_context():
+            return render_chart(spec.name)["html"]
+        return serve_chart_artifact(spec.name, "html")
+
+    view.__name__ = spec.name
+    view.__doc__ = spec.title
+    visualize_bp.add_url_rule(spec.rule, spec.name, view)
+    return view
+
+@visualize_bp.route("/visualize/charts/<name>.json")
+def chart_figure_json(name):
+    if name not in CHART_REGISTRY:
+        abort(404)
+    return serve_chart_artifact(name, "json")
+
+@visualize_bp.route("/visualize/charts/<name>/detail.json")
+def chart_detail(name):
+    """Points of a binned chart inside the window given by x0/x1/y0/y1 (see app.services.lod)"""
+    if name not in CHART_REGISTRY:
+        abort(404)
+    from app.services import lod
+    chart = CHART_REGISTRY[name]
+    
+    def full_detail():
+        figure = chart.build(load_sources(chart.sources), lod=False)
+        if isinstance(figure, str):
+            abort(404)
+        return figure
+    
+    points = lod.load_points(name, full_detail)
+    window = {key: request.args.get(key, type=float) for key in ("x0", "x1", "y0", "y1")}
+    return jsonify(lod.detail(points, **window))
+
+@visualize_bp.route("/visualize/frames/<int:version>/<code>/meta.json")
+def frame_meta(version, code):
+    return serve_frame_artifact(version, code, "meta.json", "application/json")
+
+@visualize_bp.route("/visualize/frames/<int:version>/<code>/<int:chunk>.bin")
+def frame_chunk(version, code, chunk):
+    return serve_frame_artifact(version, code, f"{chunk}.bin", "application/octet-stream")
+
+def serve_frame_artifact(version, code, kind, mimetype):
+    """Serve a precomputed animation frame file; frames never change within a version"""
+    if not frames.is_frame_indicator(code):
+        abort(404)
+    # Only the current version can be built on demand; older ones exist
+    # until pruned so pages loaded before a scrape keep playing
+    if version == current_dataset_version():
+        frames.ensure_frames(version, code)
+    response = artifact_response(version, frames.frame_set_name(code), kind, mimetype)
+    response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
+
+@visualize_bp.route("/visualize/geometry/<int:zoom>.geojson")
+def geometry_geojson(zoom):
+    """Country shapes simplified for ``zoom``, optionally limited to ?bbox=west,south,east,north"""
+    store = geometry.load_geometry()
+    if store is None or not 0 <= zoom < geometry.ZOOM_LEVELS:
+        abort(404)
+    bbox = request.args.get("bbox")
+    if bbox:
+        try:
+            bbox = [float(v) for v in bbox.split(",")]
+        except ValueError:
+            abort(400)
+        if len(bbox) != 4:
+            abort(400)
+
+    encoding = artifacts.negotiate_encoding(request.headers.get("Accept-Encoding", ""))
+    response = Response(store.encode(zoom, encoding, bbox), mimetype="application/geo+json")
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["Cache-Control"] = "public, max-age=86400"
+    response.set_etag(f"{store.etag}-{zoom}-{request.args.get('bbox', 'world')}-{encoding or 'identity'}")
+    return response.make_conditional(request)
+
+def local_geometry_args():
+    """Choropleth arguments that draw shapes from the local geometry store, if one is bundled"""
+    if not geometry.geometry_available():
+        return {}
+    return {"geojson": geometry.GEOMETRY_URL.format(zoom=geometry.BASE_ZOOM), "featureidkey": "id"}
+
+def local_geometry_meta():
+    """layout.meta entry that lets GEOMETRY_ZOOM_SCRIPT refine shapes on zoom"""
+    if not geometry.geometry_available():
+        return {}
+    return {"geometry": {"url": geometry.GEOMETRY_URL, "zoom": geometry.BASE_ZOOM, "levels": geometry.ZOOM_LEVELS}}
+
 @visualize_bp.route("/visualize")
 def visualize_index():
     return render_template("visualize.html")
@@ -74,331 +510,722 @@ def visualize_index():
 def visualize_countries():
     return render_template("country_viz.html")
 
-@visualize_bp.route("/visualize/countries/population-area")
-def countries_population_area():
-    db = SessionLocal()
-    try:
-        countries = db.query(Country).filter(
-            Country.population.isnot(None),
-            Country.area.isnot(None),
-            Country.population > 0,
-            Country.area > 0
-        ).all()
-        
-        if not countries:
-            return "<h1>No country data available. Please run the scraper first.</h1>"
-        
-        df = pd.DataFrame([{
-            "Country": c.name,
-            "Population": c.population,
-            "Area": c.area,
-            "Region": c.region or "Unknown",
-            "Population_Density": c.population_density or (c.population / c.area if c.area > 0 else 0)
-        } for c in countries])
-        
-        # Create scatter plot
-        fig = px.scatter(
-            df, 
-            x="Area", 
-            y="Population",
-            hover_name="Country",
-            size="Population",
-            color="Region",
-            log_x=True,
-            log_y=True,
-            title="Countries by Area vs Population (Log Scale)",
-            labels={
-                "Area": "Area (km²)",
-                "Population": "Population"
-            }
-        )
-        
-        fig.update_layout(
-            template="plotly_dark",
-            height=700,
-            font=dict(color="white"),
-            plot_bgcolor="#111",
-            paper_bgcolor="#111"
-        )
-        
-        return create_chart_html(fig, "Countries: Population vs Area")
-        
-    finally:
-        db.close()
-
-@visualize_bp.route("/visualize/countries/population-density")
-def countries_population_density():
-    db = SessionLocal()
-    try:
-        countries = db.query(Country).filter(
-            Country.population.isnot(None),
-            Country.area.isnot(None),
-            Country.population > 0,
-            Country.area > 0
-        ).limit(30).all()  # Top 30 for readability
-        
-        if not countries:
-            return "<h1>No country data available. Please run the scraper first.</h1>"
-        
-        # Calculate and sort by population density
-        country_data = []
-        for c in countries:
-            density = c.population_density or (c.population / c.area if c.area > 0 else 0)
-            country_data.append({
-                "Country": c.name,
-                "Population_Density": density,
-                "Population": c.population,
-                "Area": c.area
-            })
-        
-        # Sort by density and take top 30
-        country_data.sort(key=lambda x: x["Population_Density"], reverse=True)
-        df = pd.DataFrame(country_data[:30])
-        
-        fig = px.bar(
-            df,
-            x="Population_Density",
-            y="Country",
-            orientation='h',
-            title="Top 30 Countries by Population Density",
-            labels={"Population_Density": "People per km²"},
-            color="Population_Density",
-            color_continuous_scale="Viridis"
-        )
-        
-        fig.update_layout(
-            template="plotly_dark",
-            height=800,
-            font=dict(color="white"),
-            plot_bgcolor="#111",
-            paper_bgcolor="#111",
-            yaxis={'categoryorder':'total ascending'}
-        )
-        
-        return create_chart_html(fig, "Countries: Population Density")
-        
-    finally:
-        db.close()
-
-@visualize_bp.route("/visualize/countries/by-region")
-def countries_by_region():
-    db = SessionLocal()
-    try:
-        # Get region statistics
-        region_stats = db.query(
-            Country.region,
-            func.count(Country.id).label('country_count'),
-            func.sum(Country.population).label('total_population'),
-            func.avg(Country.area).label('avg_area')
-        ).filter(
-            Country.region.isnot(None)
-        ).group_by(Country.region).all()
-        
-        if not region_stats:
-            return "<h1>No regional data available.</h1>"
-        
-        df = pd.DataFrame([{
-            "Region": stat.region,
-            "Country_Count": stat.country_count,
-            "Total_Population": safe_numeric(stat.total_population, 0),
-            "Avg_Area": safe_numeric(stat.avg_area, 0)
-        } for stat in region_stats])
-        
-        # Create subplots
-        fig = make_subplots(
-            rows=2, cols=2,
-            subplot_titles=(
-                "Countries per Region",
-                "Total Population by Region", 
-                "Average Area by Region",
-                "Population Distribution"
-            ),
-            specs=[
-                [{"type": "bar"}, {"type": "bar"}],
-                [{"type": "bar"}, {"type": "pie"}]
-            ]
-        )
-        
-        # Countries per region
-        fig.add_trace(
-            go.Bar(x=df["Region"], y=df["Country_Count"], name="Countries", marker_color="#3b82f6"),
-            row=1, col=1
-        )
-        
-        # Total population by region
-        fig.add_trace(
-            go.Bar(x=df["Region"], y=df["Total_Population"], name="Population", marker_color="#10b981"),
-            row=1, col=2
-        )
-        
-        # Average area by region
-        fig.add_trace(
-            go.Bar(x=df["Region"], y=df["Avg_Area"], name="Avg Area", marker_color="#f59e0b"),
-            row=2, col=1
-        )
-        
-        # Population pie chart
-        fig.add_trace(
-            go.Pie(labels=df["Region"], values=df["Total_Population"], name="Population Share"),
-            row=2, col=2
-        )
-        
-        fig.update_layout(
-            template="plotly_dark",
-            height=800,
-            showlegend=False,
-            title_text="Regional Analysis Dashboard",
-            font=dict(color="white"),
-            plot_bgcolor="#111",
-            paper_bgcolor="#111"
-        )
-        
-        return create_chart_html(fig, "Countries: Regional Analysis")
-        
-    finally:
-        db.close()
-
-@visualize_bp.route("/visualize/countries/world-map")
-def countries_world_map():
-    db = SessionLocal()
-    try:
-        countries = db.query(Country).filter(
-            Country.latitude.isnot(None),
-            Country.longitude.isnot(None),
-            Country.iso_code_alpha3.isnot(None)
-        ).all()
-        
-        if not countries:
-            return "<h1>No geographic data available.</h1>"
-        
-        df = pd.DataFrame([{
-            "Country": c.name,
-            "ISO": c.iso_code_alpha3,
-            "Population": safe_numeric(c.population, 0),
-            "Area": safe_numeric(c.area, 0),
-            "Population_Density": safe_numeric(c.population_density, 0),
-            "Region": c.region or "Unknown",
-            "lat": c.latitude,
-            "lon": c.longitude
-        } for c in countries if c.iso_code_alpha3])
-        
-        # Create choropleth map
-        fig = px.choropleth(
-            df,
-            locations="ISO",
-            color="Population",
-            hover_name="Country",
-            hover_data={"Population": ":,", "Area": ":.0f", "Region": True},
-            color_continuous_scale="Viridis",
-            title="World Population Map"
-        )
-        
-        fig.update_layout(
-            template="plotly_dark",
-            height=600,
-            font=dict(color="white"),
-            geo=dict(
-                showframe=False,
-                showcoastlines=True,
-                projection_type='equirectangular',
-                bgcolor="#111"
-            ),
-            plot_bgcolor="#111",
-            paper_bgcolor="#111"
-        )
-        
-        return create_chart_html(fig, "World Population Map")
-        
-    finally:
-        db.close()
-
-@visualize_bp.route("/visualize/continents")
-def visualize_continents():
-    db = SessionLocal()
-    try:
-        continents = db.query(
-            Continent.name,
-            func.count(Country.id).label('country_count'),
-            func.sum(Country.population).label('total_population'),
-            func.sum(Country.area).label('total_area')
-        ).outerjoin(Country).group_by(Continent.name).all()
-        
-        if not continents:
-            return "<h1>No continental data available.</h1>"
-        
-        df = pd.DataFrame([{
-            "Continent": cont.name,
-            "Countries": cont.country_count or 0,
-            "Population": safe_numeric(cont.total_population, 0),
-            "Area": safe_numeric(cont.total_area, 0)
-        } for cont in continents if cont.name])
-        
-        # Create treemap
-        fig = px.treemap(
-            df,
-            path=[px.Constant("World"), "Continent"],
-            values="Population",
-            color="Countries",
-            title="Continental Population Distribution",
-            color_continuous_scale="RdYlBu"
-        )
-        
-        fig.update_layout(
-            template="plotly_dark",
-            height=600,
-            font=dict(color="white"),
-            plot_bgcolor="#111",
-            paper_bgcolor="#111"
-        )
-        
-        return create_chart_html(fig, "Continental Analysis")
-        
-    finally:
-        db.close()
-
-@visualize_bp.route("/visualize/languages")
-def visualize_languages():
-    db = SessionLocal()
-    try:
-        # Get most spoken languages
-        lang_stats = db.query(
-            Language.name,
-            func.count(CountryLanguage.country_id).label('country_count')
-        ).join(CountryLanguage).group_by(Language.name).order_by(
-            func.count(CountryLanguage.country_id).desc()
-        ).limit(20).all()
-        
-        if not lang_stats:
-            return "<h1>No language data available.</h1>"
-        
-        df = pd.DataFrame([{
-            "Language": lang.name,
-            "Countries": lang.country_count
-        } for lang in lang_stats])
-        
-        fig = px.bar(
-            df,
-            x="Countries",
-            y="Language",
-            orientation='h',
-            title="Top 20 Languages by Number of Countries",
-            color="Countries",
-            color_continuous_scale="Blues"
-        )
-        
-        fig.update_layout(
-            template="plotly_dark",
-            height=700,
-            font=dict(color="white"),
-            plot_bgcolor="#111",
-            paper_bgcolor="#111",
-            yaxis={'categoryorder':'total ascending'}
+def frame_player_meta(matrix, start, fields, rows):
+    """layout.meta entry that lets FRAME_PLAYER_SCRIPT animate a figure"""
+    return {"frames": {
+        "code": matrix.code,
+        "version": current_dataset_version(),
+        "start": int(start),
+        "fields": fields,
+        "rows": [[int(r) for r in trace_rows] for trace_rows in rows]
+    }}
+
+def latest_year_index(matrix):
+    """Index of the last year that has any value"""
+    import numpy as np
+    return int(np.flatnonzero(~np.isnan(matrix.values).all(axis=0))[-1])
+
+def country_snapshot():
+    """Columnar snapshot of all countries at the current dataset version"""
+    # NumPy is imported on first use like the chart libraries
+    from app.services.snapshot import load_snapshot
+    return load_snapshot()
+
+def indicator_source(code):
+    def load():
+        from app.services.timeseries import load_indicator_matrix
+        return load_indicator_matrix(code)
+    return load
+
+def distance_source():
+    """(centroid index, distance matrix); the matrix is None without coordinates or if too large"""
+    from app.services.spatial import load_centroid_index, load_distance_matrix
+    index = load_centroid_index()
+    return index, load_distance_matrix() if len(index) else None
+
+def language_source():
+    from app.services.language_graph import load_summary
+    return load_summary()
+
+# Data a chart can declare in ChartSpec.sources. Each loader is cached per
+# dataset version by its own service, so charts sharing a source share one load.
+DATA_SOURCES = {
+    "countries": country_snapshot,
+    "population": indicator_source("SP.POP.TOTL"),
+    "gdp_per_capita": indicator_source("NY.GDP.PCAP.CD"),
+    "distances": distance_source,
+    "language_summary": language_source,
+}
+
+def load_sources(names):
+    """Load the named data sources into a dict"""
+    with metrics.stage("load"):
+        return {name: DATA_SOURCES[name]() for name in names}
+
+NO_COUNTRY_DATA = "<h1>No country data available. Please run the scraper first.</h1>"
+
+def population_area_data(sources):
+    import numpy as np
+    import pandas as pd
+    countries, matrix = sources["countries"], sources["population"]
+    if matrix is not None:
+        return {"matrix": matrix, "area": countries.area[countries.rows_for_ids(matrix.country_ids)]}
+    
+    rows = np.flatnonzero((countries.population > 0) & (countries.area > 0))
+    if not len(rows):
+        return NO_COUNTRY_DATA
+    return pd.DataFrame({
+        "Country": countries.name[rows],
+        "Population": countries.population[rows],
+        "Area": countries.area[rows],
+        "Region": countries.region.decode(rows, missing="Unknown"),
+        "Population_Density": countries.population_density[rows]
+    })
+
+def population_area_figure(data):
+    if isinstance(data, dict):
+        return animated_population_area(data["matrix"], data["area"])
+    
+    import plotly.express as px
+    return px.scatter(
+        data,
+        x="Area",
+        y="Population",
+        hover_name="Country",
+        size="Population",
+        color="Region",
+        log_x=True,
+        log_y=True,
+        title="Countries by Area vs Population (Log Scale)",
+        labels={
+            "Area": "Area (km²)",
+            "Population": "Population"
+        }
+    )
+
+def animated_population_area(matrix, area):
+    """Population vs area with one frame per year, streamed by the frame player"""
+    import numpy as np
+    import plotly.graph_objects as go
+    
+    start = latest_year_index(matrix)
+    has_area = area > 0
+    rows = [
+        np.flatnonzero(has_area & (matrix.regions == region))
+        for region in sorted(set(matrix.regions[has_area]))
+    ]
+    peak = np.nanmax(matrix.values[has_area]) if has_area.any() else 1
+    
+    fig = go.Figure()
+    for region_rows in rows:
+        fig.add_trace(go.Scatter(
+            x=area[region_rows],
+            y=matrix.values[region_rows, start],
+            mode="markers",
+            name=str(matrix.regions[region_rows[0]]),
+            text=matrix.names[region_rows],
+            marker=dict(size=matrix.values[region_rows, start], sizemode="area", sizeref=2 * peak / 60 ** 2, sizemin=2),
+            hovertemplate="<b>%{text}</b><br>Area: %{x:,.0f} km²<br>Population: %{y:,.0f}<extra></extra>"
+        ))
+    
+    fig.update_layout(
+        title=f"Countries by Area vs Population, {matrix.years[0]}-{matrix.years[-1]} (Log Scale)",
+        xaxis=dict(title="Area (km²)", type="log"),
+        yaxis=dict(title="Population", type="log", range=np.log10([max(np.nanmin(matrix.values), 1), peak * 2]).tolist()),
+        meta=frame_player_meta(matrix, start, ["y", "marker.size"], rows)
+    )
+    return fig
+
+countries_population_area = register_chart(ChartSpec(
+    name="countries_population_area",
+    rule="/visualize/countries/population-area",
+    title="Countries: Population vs Area",
+    sources=["countries", "population"],
+    data=population_area_data,
+    figure=population_area_figure,
+    layout=dict(height=700),
+    script=FRAME_PLAYER_SCRIPT
+))
+
+def population_density_data(sources):
+    import numpy as np
+    import pandas as pd
+    countries = sources["countries"]
+    rows = np.flatnonzero((countries.population > 0) & (countries.area > 0))
+    if not len(rows):
+        return NO_COUNTRY_DATA
+    
+    # Top 30 by population density for readability
+    rows = rows[np.argsort(-countries.population_density[rows], kind="stable")[:30]]
+    return pd.DataFrame({
+        "Country": countries.name[rows],
+        "Population_Density": countries.population_density[rows],
+        "Population": countries.population[rows],
+        "Area": countries.area[rows]
+    })
+
+countries_population_density = register_chart(ChartSpec(
+    name="countries_population_density",
+    rule="/visualize/countries/population-density",
+    title="Countries: Population Density",
+    sources=["countries"],
+    data=population_density_data,
+    figure="bar",
+    params=dict(
+        x="Population_Density",
+        y="Country",
+        orientation='h',
+        title="Top 30 Countries by Population Density",
+        labels={"Population_Density": "People per km²"},
+        color="Population_Density",
+        color_continuous_scale="Viridis"
+    ),
+    layout=dict(height=800, yaxis={'categoryorder': 'total ascending'})
+))
+
+def region_data(sources):
+    import numpy as np
+    import pandas as pd
+    countries = sources["countries"]
+    region = countries.region
+    country_count = region.count()
+    if not country_count.any():
+        return "<h1>No regional data available.</h1>"
+    
+    # Average area over countries with a known area, like SQL AVG
+    has_area = ~np.isnan(countries.area)
+    area_count = region.count(has_area)
+    avg_area = region.sum(countries.area, has_area) / np.maximum(area_count, 1)
+    return pd.DataFrame({
+        "Region": region.categories,
+        "Country_Count": country_count,
+        "Total_Population": region.sum(countries.population),
+        "Avg_Area": avg_area
+    })
+
+def region_dashboard_figure(df):
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    fig = make_subplots(
+        rows=2, cols=2,
+        subplot_titles=(
+            "Countries per Region",
+            "Total Population by Region",
+            "Average Area by Region",
+            "Population Distribution"
+        ),
+        specs=[
+            [{"type": "bar"}, {"type": "bar"}],
+            [{"type": "bar"}, {"type": "pie"}]
+        ]
+    )
+    
+    # Countries per region
+    fig.add_trace(
+        go.Bar(x=df["Region"], y=df["Country_Count"], name="Countries", marker_color="#3b82f6"),
+        row=1, col=1
+    )
+    
+    # Total population by region
+    fig.add_trace(
+        go.Bar(x=df["Region"], y=df["Total_Population"], name="Population", marker_color="#10b981"),
+        row=1, col=2
+    )
+    
+    # Average area by region
+    fig.add_trace(
+        go.Bar(x=df["Region"], y=df["Avg_Area"], name="Avg Area", marker_color="#f59e0b"),
+        row=2, col=1
+    )
+    
+    # Population pie chart
+    fig.add_trace(
+        go.Pie(labels=df["Region"], values=df["Total_Population"], name="Population Share"),
+        row=2, col=2
+    )
+    return fig
+
+countries_by_region = register_chart(ChartSpec(
+    name="countries_by_region",
+    rule="/visualize/countries/by-region",
+    title="Countries: Regional Analysis",
+    sources=["countries"],
+    data=region_data,
+    figure=region_dashboard_figure,
+    layout=dict(height=800, showlegend=False, title_text="Regional Analysis Dashboard")
+))
+
+def world_map_data(sources):
+    import numpy as np
+    import pandas as pd
+    countries, matrix = sources["countries"], sources["population"]
+    if matrix is not None:
+        return {"matrix": matrix}
+    
+    rows = np.flatnonzero(~np.isnan(countries.latitude) & ~np.isnan(countries.longitude) & countries.iso3.present())
+    if not len(rows):
+        return "<h1>No geographic data available.</h1>"
+    return pd.DataFrame({
+        "Country": countries.name[rows],
+        "ISO": countries.iso3[rows],
+        "Population": np.nan_to_num(countries.population[rows]),
+        "Area": np.nan_to_num(countries.area[rows]),
+        "Population_Density": np.nan_to_num(countries.population_density[rows]),
+        "Region": countries.region.decode(rows, missing="Unknown"),
+        "lat": countries.latitude[rows],
+        "lon": countries.longitude[rows]
+    })
+
+def world_map_figure(data):
+    if isinstance(data, dict):
+        return animated_world_map(data["matrix"])
+    
+    import plotly.express as px
+    fig = px.choropleth(
+        data,
+        locations="ISO",
+        color="Population",
+        hover_name="Country",
+        hover_data={"Population": ":,", "Area": ":.0f", "Region": True},
+        color_continuous_scale="Viridis",
+        title="World Population Map",
+        **local_geometry_args()
+    )
+    # Geometry availability can change at runtime, so it isn't part of the spec's layout
+    fig.update_layout(geo=world_map_geo_layout(), meta=local_geometry_meta())
+    return fig
+
+def world_map_geo_layout():
+    geo = dict(
+        showframe=False,
+        showcoastlines=True,
+        projection_type='equirectangular',
+        bgcolor="#111"
+    )
+    if geometry.geometry_available():
+        # Plotly's base map layers come from a remote topojson; hide them so
+        # maps drawn from local shapes also work offline
+        geo.update(visible=False)
+    return geo
+
+def animated_world_map(matrix):
+    """Population choropleth with one frame per year, streamed by the frame player"""
+    import numpy as np
+    import plotly.graph_objects as go
+    
+    rows = np.flatnonzero(matrix.iso3 != None)
+    start = latest_year_index(matrix)
+    
+    fig = go.Figure(go.Choropleth(
+        locations=matrix.iso3[rows],
+        z=matrix.values[rows, start],
+        text=matrix.names[rows],
+        # A fixed color range keeps years comparable
+        zmin=float(np.nanmin(matrix.values)),
+        zmax=float(np.nanmax(matrix.values)),
+        colorscale="Viridis",
+        colorbar=dict(title="Population"),
+        hovertemplate="<b>%{text}</b><br>Population: %{z:,.0f}<extra></extra>",
+        **local_geometry_args()
+    ))
+    
+    fig.update_layout(
+        title=f"World Population Map, {matrix.years[0]}-{matrix.years[-1]}",
+        geo=world_map_geo_layout(),
+        meta=dict(frame_player_meta(matrix, start, ["z"], [rows]), **local_geometry_meta())
+    )
+    return fig
+
+countries_world_map = register_chart(ChartSpec(
+    name="countries_world_map",
+    rule="/visualize/countries/world-map",
+    title="World Population Map",
+    sources=["countries", "population"],
+    data=world_map_data,
+    figure=world_map_figure,
+    layout=dict(height=600),
+    script=[FRAME_PLAYER_SCRIPT, GEOMETRY_ZOOM_SCRIPT]
+))
+
+def gdp_per_capita_timeline_data(sources):
+    import numpy as np
+    import pandas as pd
+    matrix = sources["gdp_per_capita"]
+    if matrix is None:
+        return "<h1>No GDP time series available. Please run the scraper first.</h1>"
+    
+    # Top 15 countries of every year, picked with one argsort over the matrix
+    top = matrix.top_per_year(15)
+    year_index = np.broadcast_to(np.arange(len(matrix.years)), top.shape)
+    values = matrix.values[top, year_index]
+    present = ~np.isnan(values)
+    return pd.DataFrame({
+        "Year": matrix.years[year_index[present]],
+        "Country": matrix.names[top[present]],
+        "Region": matrix.regions[top[present]],
+        "GDP_per_Capita": values[present]
+    }).sort_values(["Year", "GDP_per_Capita"])
+
+def gdp_per_capita_timeline_figure(df):
+    import plotly.express as px
+    return px.bar(
+        df,
+        x="GDP_per_Capita",
+        y="Country",
+        color="Region",
+        orientation='h',
+        animation_frame="Year",
+        range_x=[0, float(df["GDP_per_Capita"].max()) * 1.05],
+        title="Top 15 Countries by GDP per Capita (current US$)",
+        labels={"GDP_per_Capita": "GDP per Capita (US$)"}
+    )
+
+countries_gdp_per_capita_timeline = register_chart(ChartSpec(
+    name="countries_gdp_per_capita_timeline",
+    rule="/visualize/countries/gdp-per-capita-timeline",
+    title="GDP per Capita Over Time",
+    sources=["gdp_per_capita"],
+    data=gdp_per_capita_timeline_data,
+    figure=gdp_per_capita_timeline_figure,
+    layout=dict(height=750, yaxis={'categoryorder': 'total ascending'})
+))
+
+def population_timeline_data(sources):
+    import numpy as np
+    import pandas as pd
+    matrix = sources["population"]
+    if matrix is None:
+        return "<h1>No population time series available. Please run the scraper first.</h1>"
+    
+    # Sum countries into regions for every year at once
+    regions, region_index = np.unique(matrix.regions.astype(str), return_inverse=True)
+    totals = np.zeros((len(regions), len(matrix.years)))
+    np.add.at(totals, region_index, np.nan_to_num(matrix.values))
+    return pd.DataFrame({
+        "Year": np.tile(matrix.years, len(regions)),
+        "Region": np.repeat(regions, len(matrix.years)),
+        "Population": totals.ravel()
+    })
+
+def population_timeline_figure(df):
+    import plotly.express as px
+    return px.bar(
+        df,
+        x="Region",
+        y="Population",
+        color="Region",
+        animation_frame="Year",
+        range_y=[0, float(df["Population"].max()) * 1.05],
+        title="Population by Region Over Time"
+    )
+
+countries_population_timeline = register_chart(ChartSpec(
+    name="countries_population_timeline",
+    rule="/visualize/countries/population-timeline",
+    title="Population by Region Over Time",
+    sources=["population"],
+    data=population_timeline_data,
+    figure=population_timeline_figure,
+    layout=dict(height=700, showlegend=False)
+))
+
+def distance_matrix_data(sources):
+    import numpy as np
+    countries = sources["countries"]
+    index, matrix = sources["distances"]
+    if not len(index):
+        return "<h1>No country coordinates available. Please run the scraper first.</h1>"
+    if matrix is None:
+        return "<h1>Too many countries for a distance matrix.</h1>"
+    
+    # The 40 most populous countries, grouped by region and ordered west to east
+    rows = countries.rows_for_ids(index.ids)
+    population = np.nan_to_num(countries.population[rows])
+    regions = countries.region.decode(rows, missing="Unknown")
+    top = np.argsort(-population, kind="stable")[:40]
+    top = top[np.lexsort((index.lon[top], regions[top].astype(str)))]
+    return {
+        "distances": np.asarray(matrix[np.ix_(top, top)]),
+        "names": index.names[top],
+        "labels": [f"{name} ({region})" for name, region in zip(index.names[top], regions[top])]
+    }
+
+def distance_heatmap_figure(data):
+    import plotly.graph_objects as go
+    return go.Figure(go.Heatmap(
+        z=data["distances"],
+        x=data["names"],
+        y=data["labels"],
+        colorscale="Viridis",
+        colorbar=dict(title="km"),
+        hovertemplate="%{y} → %{x}<br>%{z:,.0f} km<extra></extra>"
+    ))
+
+countries_distance_matrix = register_chart(ChartSpec(
+    name="countries_distance_matrix",
+    rule="/visualize/countries/distances",
+    title="Distances Between Countries",
+    sources=["countries", "distances"],
+    data=distance_matrix_data,
+    figure=distance_heatmap_figure,
+    layout=dict(
+        height=900,
+        title="Great-Circle Distances Between the 40 Most Populous Countries",
+        yaxis=dict(autorange="reversed")
+    )
+))
+
+def currency_zones_data(sources):
+    import numpy as np
+    import pandas as pd
+    countries = sources["countries"]
+    currencies = countries.currencies
+    if not len(currencies):
+        return "<h1>No currency data available. Please run the scraper first.</h1>"
+    
+    population = currencies.sum(countries.population)
+    top = np.argsort(-population, kind="stable")[:25]
+    codes, names = currencies.values.categories[top], countries.currency_names[top]
+    return pd.DataFrame({
+        "Currency": [f"{code} ({name})" if name else code for code, name in zip(codes, names)],
+        "Countries": currencies.country_count()[top],
+        "Population": population[top],
+        "GDP": currencies.sum(countries.gdp_total)[top]
+    })
+
+countries_currency_zones = register_chart(ChartSpec(
+    name="countries_currency_zones",
+    rule="/visualize/countries/currency-zones",
+    title="Currency Zones",
+    sources=["countries"],
+    data=currency_zones_data,
+    figure="bar",
+    params=dict(
+        x="Population",
+        y="Currency",
+        orientation='h',
+        color="Countries",
+        hover_data={"GDP": ":,.0f"},
+        title="Top 25 Currency Zones by Population",
+        labels={"Population": "Population using the currency", "GDP": "Combined GDP (US$)"},
+        color_continuous_scale="Tealgrn"
+    ),
+    layout=dict(height=750, yaxis={'categoryorder': 'total ascending'})
+))
+
+def timezone_bands_data(sources):
+    import numpy as np
+    import pandas as pd
+    countries = sources["countries"]
+    timezones = countries.timezones
+    offsets = countries.timezone_offsets
+    country_count = timezones.country_count()
+    bands = np.flatnonzero(~np.isnan(offsets) & (country_count > 0))
+    if not len(bands):
+        return "<h1>No timezone data available. Please run the scraper first.</h1>"
+    
+    bands = bands[np.argsort(offsets[bands], kind="stable")]
+    return pd.DataFrame({
+        "Timezone": timezones.values.categories[bands],
+        "Countries": country_count[bands],
+        # Countries spanning several zones count fully in each
+        "Population": timezones.sum(countries.population)[bands]
+    })
+
+def timezone_bands_figure(df):
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    fig = make_subplots(
+        rows=2, cols=1, shared_xaxes=True,
+        subplot_titles=("Countries per UTC Offset", "Population of Countries Observing Each Offset")
+    )
+    fig.add_trace(
+        go.Bar(x=df["Timezone"], y=df["Countries"], name="Countries", marker_color="#8b5cf6"),
+        row=1, col=1
+    )
+    fig.add_trace(
+        go.Bar(x=df["Timezone"], y=df["Population"], name="Population", marker_color="#10b981"),
+        row=2, col=1
+    )
+    return fig
+
+countries_timezone_bands = register_chart(ChartSpec(
+    name="countries_timezone_bands",
+    rule="/visualize/countries/timezone-bands",
+    title="Timezone Bands",
+    sources=["countries"],
+    data=timezone_bands_data,
+    figure=timezone_bands_figure,
+    layout=dict(height=800, showlegend=False, title_text="Timezone Bands")
+))
+
+def continents_data(sources):
+    import pandas as pd
+    countries = sources["countries"]
+    continent = countries.continent
+    if not len(continent.categories):
+        return "<h1>No continental data available.</h1>"
+    return pd.DataFrame({
+        "Continent": continent.categories,
+        "Countries": continent.count(),
+        "Population": continent.sum(countries.population),
+        "Area": continent.sum(countries.area)
+    })
+
+def continents_treemap_figure(df):
+    import plotly.express as px
+    return px.treemap(
+        df,
+        path=[px.Constant("World"), "Continent"],
+        values="Population",
+        color="Countries",
+        title="Continental Population Distribution",
+        color_continuous_scale="RdYlBu"
+    )
+
+visualize_continents = register_chart(ChartSpec(
+    name="visualize_continents",
+    rule="/visualize/continents",
+    title="Continental Analysis",
+    sources=["countries"],
+    data=continents_data,
+    figure=continents_treemap_figure,
+    layout=dict(height=600)
+))
+
+def languages_data(sources):
+    import numpy as np
+    import pandas as pd
+    languages = sources["countries"].languages
+    if not len(languages):
+        return "<h1>No language data available.</h1>"
+    
+    # Most spoken languages
+    country_count = languages.country_count()
+    top = np.argsort(-country_count, kind="stable")[:20]
+    return pd.DataFrame({
+        "Language": languages.values.categories[top],
+        "Countries": country_count[top]
+    })
+
+visualize_languages = register_chart(ChartSpec(
+    name="visualize_languages",
+    rule="/visualize/languages",
+    title="Language Distribution",
+    sources=["countries"],
+    data=languages_data,
+    figure="bar",
+    params=dict(
+        x="Countries",
+        y="Language",
+        orientation='h',
+        title="Top 20 Languages by Number of Countries",
+        color="Countries",
+        color_continuous_scale="Blues"
+    ),
+    layout=dict(height=700, yaxis={'categoryorder': 'total ascending'})
+))
+
+def language_communities_data(sources):
+    summary = sources["language_summary"]
+    if summary is None:
+        return "<h1>No language data available.</h1>"
+    
+    # Community -> its most spoken languages, sized by estimated speakers
+    ids, labels, parents, values = [], [], [], []
+    for rank, community in enumerate(summary["communities"][:12], start=1):
+        community_id = f"community-{community['id']}"
+        ids.append(community_id)
+        labels.append(f"Community {rank}<br>{community['languages']} languages, {community['countries']} countries")
+        parents.append("")
+        values.append(community["speakers"])
+        for name, speakers in zip(community["top_languages"], community["top_language_speakers"]):
+            ids.append(f"{community_id}/{name}")
+            labels.append(name)
+            parents.append(community_id)
+            values.append(speakers)
+    return dict(ids=ids, labels=labels, parents=parents, values=values)
+
+def language_communities_figure(data):
+    import plotly.graph_objects as go
+    return go.Figure(go.Treemap(
+        **data,
+        branchvalues="remainder",
+        hovertemplate="<b>%{label}</b><br>Estimated speakers: %{value:,.0f}<extra></extra>"
+    ))
+
+languages_communities = register_chart(ChartSpec(
+    name="languages_communities",
+    rule="/visualize/languages/communities",
+    title="Language Communities",
+    sources=["language_summary"],
+    data=language_communities_data,
+    figure=language_communities_figure,
+    layout=dict(
+        height=750,
+        title="Language Communities by Estimated Speakers (languages linked through shared countries)"
+    )
+))
+
+def language_network_data(sources):
+    summary = sources["language_summary"]
+    if summary is None:
+        return "<h1>No language data available.</h1>"
+    network = summary["country_network"]
+    links = [link for link in network["top_links"] if None not in (link["a_lat"], link["a_lon"], link["b_lat"], link["b_lon"])]
+    if not links:
+        return "<h1>No countries share a language.</h1>"
+    
+    # All links in one trace, separated by None gaps
+    lat, lon = [], []
+    countries = {}
+    for link in links:
+        lat += [link["a_lat"], link["b_lat"], None]
+        lon += [link["a_lon"], link["b_lon"], None]
+        countries[link["a"]] = (link["a_name"], link["a_lat"], link["a_lon"])
+        countries[link["b"]] = (link["b_name"], link["b_lat"], link["b_lon"])
+    names, country_lat, country_lon = zip(*countries.values())
+    return {
+        "lat": lat, "lon": lon,
+        "names": names, "country_lat": country_lat, "country_lon": country_lon,
+        "title": (f"Strongest Shared-Language Links ({len(links)} of {network['edges']:,} country pairs, "
+                  f"{network['mean_degree']:.1f} partners on average)")
+    }
+
+def language_network_figure(data):
+    import plotly.graph_objects as go
+    fig = go.Figure()
+    fig.add_trace(go.Scattergeo(
+        lat=data["lat"], lon=data["lon"], mode="lines",
+        line=dict(width=1, color="rgba(59, 130, 246, 0.4)"),
+        hoverinfo="skip", name="Shared language"
+    ))
+    fig.add_trace(go.Scattergeo(
+        lat=data["country_lat"], lon=data["country_lon"], text=data["names"], mode="markers",
+        marker=dict(size=6, color="#f59e0b"),
+        hovertemplate="<b>%{text}</b><extra></extra>", name="Country"
+    ))
+    fig.update_layout(title=data["title"])
+    return fig
+
+languages_network = register_chart(ChartSpec(
+    name="languages_network",
+    rule="/visualize/languages/network",
+    title="Shared-Language Network",
+    sources=["language_summary"],
+    data=language_network_data,
+    figure=language_network_figure,
+    layout=dict(
+        height=650,
+        showlegend=False,
+        geo=dict(
+            showframe=False,
+            showcoastlines=True,
+            projection_type='natural earth',
+            bgcolor="#111"
         )
-        
-        return create_chart_html(fig, "Language Distribution")
-        
-    finally:
-        db.close()
+    )
+))
 
 @visualize_bp.route("/visualize/organizations")
 def visualize_organizations():
@@ -0,0 +1,69 @@
+"""
+Materialized aggregates refreshed with every ingest.
+
+``region_summary`` holds per-region totals so APIs can read them without
+scanning ``country``. On PostgreSQL it is a ``MATERIALIZED VIEW`` refreshed
+in the ingest transaction; other backends get a plain table that is emptied
+and refilled with ``INSERT ... SELECT`` in the same place. It lives outside
+``Base.metadata`` so ``create_all`` never creates a table where PostgreSQL
+expects the view.
+"""
+
+from sqlalchemy import MetaData, Table, Column, String, Integer, BigInteger, Float, select, insert, delete, func, text
+from sqlalchemy.exc import DBAPIError
+from app.models.base import SessionLocal, DIALECT
+from app.models.entities import Country
+
+_metadata = MetaData()
+
+region_summary = Table(
+    "region_summary", _metadata,
+    Column("region", String, primary_key=True),
+    Column("country_count", Integer),
+    Column("population", BigInteger),
+    Column("area", Float),
+    Column("gdp_total", Float),
+)
+
+def region_summary_query():
+    return select(
+        Country.region.label("region"),
+        func.count(Country.id).label("country_count"),
+        func.sum(Country.population).label("population"),
+        func.sum(Country.area).label("area"),
+        func.sum(Country.gdp_total).label("gdp_total")
+    ).where(Country.region.isnot(None)).group_by(Country.region)
+
+def materialized_view_statements(dialect):
+    """PostgreSQL statements that create (once) and refresh region_summary"""
+    query = region_summary_query().compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+    return [
+        f"CREATE MATERIALIZED VIEW IF NOT EXISTS region_summary AS {query}",
+        "REFRESH MATERIALIZED VIEW region_summary",
+    ]
+
+def refresh_aggregates(db):
+    """Recompute the aggregates inside the caller's (ingest) transaction"""
+    if DIALECT == "postgresql":
+        for statement in materialized_view_statements(db.bind.dialect):
+            db.execute(text(statement))
+        return
+    _metadata.create_all(bind=db.connection())
+    db.execute(delete(region_summary))
+    db.execute(insert(region_summary).from_select(
+        ["region", "country_count", "population", "area", "gdp_total"], region_summary_query()
+    ))
+
+def load_region_summary():
+    """Rows of region_summary, most populous region first (empty before the first ingest)"""
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            select(region_summary).order_by(region_summary.c.population.desc(), region_summary.c.region)
+        ).mappings().all()
+    except DBAPIError:
+        # Not created yet
+        return []
+    finally:
+        db.close()
+    return [dict(row) for row in rows]
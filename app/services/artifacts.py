@@ -0,0 +1,132 @@
+"""
+On-disk store for precompressed chart artifacts, keyed by dataset version.
+
+Every artifact is kept gzip-compressed (and brotli-compressed when the optional
+``brotli`` package is installed) so routes can hand the bytes straight to the
+client with a matching ``Content-Encoding``. Layout::
+
+    database/artifacts/v<version>/<name>.<kind>.gz
+    database/artifacts/v<version>/<name>.<kind>.br
+"""
+
+import gzip
+import os
+import shutil
+import threading
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+from app.models.base import DATABASE_DIR
+
+ARTIFACT_DIR = os.path.join(DATABASE_DIR, "artifacts")
+
+# Versions kept on disk: the current one plus the previous for stale reads
+KEEP_VERSIONS = 2
+
+def _version_dir(version):
+    return os.path.join(ARTIFACT_DIR, f"v{version}")
+
+def artifact_path(version, name, kind, encoding="gzip"):
+    """Path of an artifact file; ``encoding`` is ``"gzip"`` or ``"br"``"""
+    suffix = "br" if encoding == "br" else "gz"
+    return os.path.join(_version_dir(version), f"{name}.{kind}.{suffix}")
+
+def raw_artifact_path(version, filename):
+    """Path for an uncompressed file kept with ``version``'s artifacts, e.g. arrays read via mmap"""
+    os.makedirs(_version_dir(version), exist_ok=True)
+    return os.path.join(_version_dir(version), filename)
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def compressed_variants(data, best=False):
+    """(encoding, bytes) pairs for ``data``: brotli when available, then gzip.
+
+    ``best`` selects stronger compression, meant for offline stages; on-demand
+    renders use faster settings to keep latency down. Brotli stops at quality
+    9: 10 and 11 save only ~10% more on chart pages but take over 10x longer.
+    """
+    variants = []
+    if brotli is not None:
+        variants.append(("br", brotli.compress(data, quality=9 if best else 5)))
+    variants.append(("gzip", gzip.compress(data, compresslevel=9 if best else 6)))
+    return variants
+
+def store_artifact(version, name, kind, data, best=False):
+    """Compress ``data`` and write it for ``version`` (``best``: see compressed_variants)"""
+    os.makedirs(_version_dir(version), exist_ok=True)
+    # gzip comes last: its presence marks the artifact as complete
+    for encoding, compressed in compressed_variants(data, best):
+        _write_atomic(artifact_path(version, name, kind, encoding), compressed)
+
+def has_artifact(version, name, kind):
+    return os.path.exists(artifact_path(version, name, kind, "gzip"))
+
+def load_artifact(version, name, kind, encoding=None):
+    """Return artifact bytes in ``encoding`` (``None`` means uncompressed)"""
+    if encoding == "br" and brotli is None:
+        return None
+    path = artifact_path(version, name, kind, encoding or "gzip")
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    return gzip.decompress(data) if encoding is None else data
+
+def stored_versions():
+    """Versions that have an artifact directory, newest first"""
+    if not os.path.isdir(ARTIFACT_DIR):
+        return []
+    return sorted(
+        (int(entry[1:]) for entry in os.listdir(ARTIFACT_DIR) if entry.startswith("v") and entry[1:].isdigit()),
+        reverse=True
+    )
+
+def stale_version(current_version, name, kind):
+    """Newest version older than ``current_version`` that still has the artifact, or None"""
+    for version in stored_versions():
+        if version < current_version and has_artifact(version, name, kind):
+            return version
+    return None
+
+def negotiate_encoding(accept_encoding):
+    """Pick ``"br"``, ``"gzip"`` or ``None`` from an Accept-Encoding header"""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if coding:
+            accepted[coding] = q
+
+    def allowed(coding):
+        return accepted.get(coding, accepted.get("*", 0.0)) > 0
+
+    if brotli is not None and allowed("br"):
+        return "br"
+    if allowed("gzip"):
+        return "gzip"
+    return None
+
+def prune_artifacts(current_version, keep=KEEP_VERSIONS):
+    """Delete artifact directories older than the newest ``keep`` versions"""
+    stale = [v for v in stored_versions() if v <= current_version][keep:]
+    for version in stale:
+        shutil.rmtree(_version_dir(version), ignore_errors=True)
+
+def clear_artifacts():
+    """Delete every stored version, e.g. after the database was recreated"""
+    for version in stored_versions():
+        shutil.rmtree(_version_dir(version), ignore_errors=True)
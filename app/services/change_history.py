@@ -0,0 +1,242 @@
+"""
+Field-level history of the country dataset across ingests.
+
+Every ingest wipes and reloads ``country``, so the rows themselves can't say
+what changed. Instead the ingest reads the tracked columns of the previous
+dataset before the wipe (``load_tracked``) and again after the load. Then
+``diff_countries`` compares the two:
+
+- countries are matched by ISO alpha-3 code with ``np.intersect1d``,
+- every tracked field is compared as a whole column. Numbers compare with a
+  small relative tolerance and NaN equal to NaN. JSON columns are compared
+  in canonical JSON form.
+
+When an indicator fetch fails, ``carry_forward`` keeps the previous values
+of the columns it feeds, so the outage is neither lost data nor history.
+
+``record_changes`` appends one ``country_change`` row per changed field,
+plus one row per added or removed country. The rows go into the ingest
+transaction, tagged with its dataset version. Unchanged countries cost
+nothing, so the table grows with what actually changed, not with dataset
+size times scrape count.
+
+NumPy is imported on first use, so app startup doesn't pay for it.
+"""
+
+import json
+from datetime import datetime
+from sqlalchemy import select, update, func
+from app.models.base import SessionLocal
+from app.models.dialects import bulk_insert
+from app.models.entities import Country, CountryChange
+
+NUMERIC_FIELDS = (
+    "population", "area", "gdp_total", "gdp_per_capita", "gini_coefficient", "latitude", "longitude"
+)
+VALUE_FIELDS = (
+    "name", "official_name", "capital", "region", "subregion", "iso_code_alpha2", "iso_code_numeric", "landlocked"
+)
+JSON_FIELDS = ("currencies", "timezones", "calling_codes", "top_level_domains", "borders")
+TRACKED_FIELDS = NUMERIC_FIELDS + VALUE_FIELDS + JSON_FIELDS
+INTEGER_FIELDS = {"population"}
+# Below this relative difference two numbers are the same value (float noise)
+RELATIVE_TOLERANCE = 1e-9
+
+ADDED, REMOVED, UPDATED = "added", "removed", "updated"
+
+def load_tracked(db):
+    """Tracked columns of every country with an ISO alpha-3 code, as NumPy arrays keyed by field"""
+    rows = db.execute(
+        select(Country.iso_code_alpha3, *[getattr(Country, field) for field in TRACKED_FIELDS])
+        .where(Country.iso_code_alpha3.isnot(None))
+        .order_by(Country.id)
+    ).all()
+    return tracked_columns(rows)
+
+def tracked_columns(rows):
+    """``load_tracked`` result for ``(iso3, *TRACKED_FIELDS)`` tuples"""
+    import numpy as np
+    columns = list(zip(*rows)) if rows else [()] * (len(TRACKED_FIELDS) + 1)
+    # The first row of a duplicated code wins
+    codes, first = np.unique(np.array(columns[0], dtype=str), return_index=True)
+    tracked = {"iso3": codes}
+    for field, values in zip(TRACKED_FIELDS, columns[1:]):
+        if field in NUMERIC_FIELDS:
+            array = np.array([np.nan if v is None else v for v in values], dtype=float)
+        elif field in JSON_FIELDS:
+            array = np.array([None if v is None else json.dumps(v, sort_keys=True) for v in values], dtype=object)
+        else:
+            array = np.array(values, dtype=object)
+        tracked[field] = array[first] if len(array) else array
+    return tracked
+
+def carry_forward(db, previous, fields):
+    """Copy ``previous`` values of ``fields`` onto the loaded countries, inside the ingest transaction.
+
+    For columns whose source failed in this run (a World Bank indicator):
+    otherwise they'd reload empty, and a transient upstream failure would
+    blank them and show up twice in the history, as every country's value
+    going away and then coming back.
+    """
+    import numpy as np
+    ids = db.execute(
+        select(Country.iso_code_alpha3, Country.id).where(Country.iso_code_alpha3.isnot(None))
+    ).all()
+    rows = np.searchsorted(previous["iso3"], [iso3 for iso3, country_id in ids])
+    updates = [
+        dict({"id": country_id}, **{field: _plain(field, previous[field][row]) for field in fields})
+        for (iso3, country_id), row in zip(ids, rows)
+        if row < len(previous["iso3"]) and previous["iso3"][row] == iso3
+    ]
+    if updates:
+        db.execute(update(Country), updates)
+    print(f"↩️ Kept previous {', '.join(fields)} for {len(updates)} countries (source unavailable)")
+
+def _plain(field, value):
+    """A column value as stored in the history (JSON-serializable)"""
+    if value is None:
+        return None
+    if field in NUMERIC_FIELDS:
+        if value != value:  # NaN
+            return None
+        return int(value) if field in INTEGER_FIELDS else float(value)
+    if field in JSON_FIELDS:
+        return json.loads(value)
+    return value
+
+def diff_countries(previous, current):
+    """Changes between two ``load_tracked`` results as history row dicts (without version)"""
+    import numpy as np
+    changes = []
+    for codes, names, change in (
+        (np.setdiff1d(current["iso3"], previous["iso3"], assume_unique=True), current, ADDED),
+        (np.setdiff1d(previous["iso3"], current["iso3"], assume_unique=True), previous, REMOVED),
+    ):
+        rows = np.searchsorted(names["iso3"], codes)
+        for code, row in zip(codes, rows):
+            name = names["name"][row]
+            changes.append({
+                "iso_code_alpha3": str(code), "change": change, "field": None,
+                "old_value": name if change == REMOVED else None,
+                "new_value": name if change == ADDED else None,
+            })
+
+    codes, old_rows, new_rows = np.intersect1d(
+        previous["iso3"], current["iso3"], assume_unique=True, return_indices=True
+    )
+    for field in TRACKED_FIELDS:
+        old, new = previous[field][old_rows], current[field][new_rows]
+        if field in NUMERIC_FIELDS:
+            same = np.isclose(old, new, rtol=RELATIVE_TOLERANCE, atol=0, equal_nan=True)
+        else:
+            same = old == new
+        for row in np.flatnonzero(~same):
+            changes.append({
+                "iso_code_alpha3": str(codes[row]), "change": UPDATED, "field": field,
+                "old_value": _plain(field, old[row]), "new_value": _plain(field, new[row]),
+            })
+    return changes
+
+def record_changes(db, changes, version):
+    """Append ``changes`` to the history inside the caller's (ingest) transaction"""
+    changed_at = datetime.now()
+    bulk_insert(db, CountryChange, [dict(change, version=version, changed_at=changed_at) for change in changes])
+    if changes:
+        counts = {kind: sum(1 for change in changes if change["change"] == kind) for kind in (ADDED, REMOVED, UPDATED)}
+        print(f"📝 Recorded {len(changes)} changes ({counts[ADDED]} countries added, "
+              f"{counts[REMOVED]} removed, {counts[UPDATED]} fields updated)")
+    else:
+        print("📝 No changes since the previous dataset")
+
+def parse_filters(args):
+    """Filters from request args: ``since`` (a dataset version, or an ISO date
+    or timestamp), ``country`` (ISO alpha-3) and ``field``. Raises ValueError
+    with a message for the client."""
+    filters = dict(since_version=None, since_time=None, country=None, field=None)
+    since = (args.get("since") or "").strip()
+    if since.isdigit():
+        filters["since_version"] = int(since)
+    elif since:
+        try:
+            filters["since_time"] = datetime.fromisoformat(since)
+        except ValueError:
+            raise ValueError("since must be a dataset version or an ISO date/time") from None
+    country = (args.get("country") or "").strip().upper()
+    if country:
+        if len(country) != 3 or not country.isalpha():
+            raise ValueError("country must be an ISO alpha-3 code")
+        filters["country"] = country
+    field = (args.get("field") or "").strip()
+    if field:
+        if field not in TRACKED_FIELDS:
+            raise ValueError(f"field must be one of: {', '.join(TRACKED_FIELDS)}")
+        filters["field"] = field
+    return filters
+
+def _filtered(query, since_version=None, since_time=None, country=None, field=None):
+    if since_version is not None:
+        query = query.where(CountryChange.version > since_version)
+    if since_time is not None:
+        query = query.where(CountryChange.changed_at >= since_time)
+    if country:
+        query = query.where(CountryChange.iso_code_alpha3 == country)
+    if field:
+        query = query.where(CountryChange.field == field)
+    return query
+
+def load_changes(since_version=None, since_time=None, country=None, field=None, limit=1000):
+    """Matching changes, newest first, and how many matched in total"""
+    db = SessionLocal()
+    try:
+        filters = dict(since_version=since_version, since_time=since_time, country=country, field=field)
+        total = db.execute(_filtered(select(func.count(CountryChange.id)), **filters)).scalar()
+        rows = db.execute(
+            _filtered(select(CountryChange), **filters)
+            .order_by(CountryChange.version.desc(), CountryChange.id)
+            .limit(limit)
+        ).scalars().all()
+        return total, [{
+            "version": row.version,
+            "changed_at": row.changed_at.isoformat(timespec="seconds"),
+            "iso_code_alpha3": row.iso_code_alpha3,
+            "change": row.change,
+            "field": row.field,
+            "old_value": row.old_value,
+            "new_value": row.new_value,
+        } for row in rows]
+    finally:
+        db.close()
+
+def change_summary(since_version=None, since_time=None, country=None, field=None):
+    """Per-ingest counts of added, removed and updated, newest first"""
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            _filtered(select(
+                CountryChange.version, func.max(CountryChange.changed_at), CountryChange.change, func.count()
+            ), since_version, since_time, country, field)
+            .group_by(CountryChange.version, CountryChange.change)
+        ).all()
+    finally:
+        db.close()
+    summary = {}
+    for version, changed_at, change, count in rows:
+        entry = summary.setdefault(version, {
+            "version": version, "changed_at": changed_at.isoformat(timespec="seconds"), ADDED: 0, REMOVED: 0, UPDATED: 0
+        })
+        entry[change] = count
+    return sorted(summary.values(), key=lambda entry: entry["version"], reverse=True)
+
+def field_summary(since_version=None, since_time=None, country=None):
+    """Number of updates per field, most changed first"""
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            _filtered(select(CountryChange.field, func.count()), since_version, since_time, country)
+            .where(CountryChange.change == UPDATED)
+            .group_by(CountryChange.field)
+            .order_by(func.count().desc(), CountryChange.field)
+        ).all()
+    finally:
+        db.close()
+    return [{"field": field, "updates": count} for field, count in rows]
@@ -0,0 +1,180 @@
+"""
+Columnar export and import of the whole dataset.
+
+Every table in ``Base.metadata`` (so new tables are picked up automatically)
+is written to its own Parquet file, or Arrow IPC file with ``fmt="arrow"``,
+plus a ``manifest.json`` with row counts and the dataset version. Rows are
+streamed from the database in batches, so memory stays flat however large
+the tables are.
+
+Import replaces the dataset in one transaction. All tables are cleared, the
+files are read back batch by batch with bulk inserts (COPY on PostgreSQL) in
+foreign-key order, and aggregates and the dataset version are refreshed.
+Primary keys are kept, so links between tables survive the round trip, and
+PostgreSQL sequences are moved past the imported ids. JSON columns are stored
+as JSON text.
+
+pyarrow is in requirements.txt but only these functions need it; the app runs
+without it.
+"""
+
+import json
+import os
+from datetime import datetime
+from sqlalchemy import select, delete, Boolean, SmallInteger, Integer, Float, Date, DateTime, JSON
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional, only the archive commands need it
+    pa = None
+
+from app.models.base import Base, engine, SessionLocal
+from app.models.dialects import bulk_insert, reset_sequences
+from app.models.init_db import init_db
+from app.services.aggregates import refresh_aggregates
+from app.services.versioning import bump_dataset_version, publish_dataset_version, read_dataset_version
+
+MANIFEST_FILE = "manifest.json"
+FORMAT_VERSION = 1
+BATCH_ROWS = 50000
+EXTENSIONS = {"parquet": "parquet", "arrow": "arrow"}
+# Bookkeeping rather than data: the importer bumps the version instead, and
+# checkpoints and change history only matter to the database they were
+# recorded in
+SKIP_TABLES = {"dataset_version", "ingest_checkpoint", "country_change"}
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("pyarrow is required for dataset export/import (pip install pyarrow)")
+
+def data_tables():
+    """Dataset tables in foreign-key order (parents first)"""
+    return [table for table in Base.metadata.sorted_tables if table.name not in SKIP_TABLES]
+
+def arrow_type(column):
+    """Arrow type for a SQLAlchemy column; JSON is kept as text"""
+    column_type = column.type
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    if isinstance(column_type, SmallInteger):
+        return pa.int16()
+    if isinstance(column_type, Integer):
+        return pa.int64()
+    if isinstance(column_type, Float):
+        return pa.float64()
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(column_type, Date):
+        return pa.date32()
+    return pa.string()
+
+def _encode(column, values):
+    if isinstance(column.type, JSON):
+        return [None if v is None else json.dumps(v) for v in values]
+    return values
+
+def _decode(column, values):
+    if isinstance(column.type, JSON):
+        return [None if v is None else json.loads(v) for v in values]
+    return values
+
+def _open_writer(path, schema, fmt):
+    if fmt == "arrow":
+        return pa.ipc.new_file(path, schema)
+    return pq.ParquetWriter(path, schema, compression="zstd")
+
+def _read_batches(path, fmt):
+    if fmt == "arrow":
+        with pa.ipc.open_file(path) as reader:
+            for i in range(reader.num_record_batches):
+                yield reader.get_batch(i)
+    else:
+        yield from pq.ParquetFile(path).iter_batches(batch_size=BATCH_ROWS)
+
+def export_dataset(directory, fmt="parquet"):
+    """Write every dataset table to ``directory``; returns the manifest"""
+    _require_pyarrow()
+    if fmt not in EXTENSIONS:
+        raise ValueError(f"Unknown format {fmt!r}, expected one of {sorted(EXTENSIONS)}")
+    init_db()
+    os.makedirs(directory, exist_ok=True)
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "file_format": fmt,
+        "dataset_version": read_dataset_version(),
+        "exported_at": datetime.now().isoformat(timespec="seconds"),
+        "tables": {}
+    }
+    with engine.connect() as conn:
+        for table in data_tables():
+            schema = pa.schema([pa.field(column.name, arrow_type(column)) for column in table.columns])
+            filename = f"{table.name}.{EXTENSIONS[fmt]}"
+            tmp_path = os.path.join(directory, f"{filename}.{os.getpid()}.tmp")
+            rows = 0
+            result = conn.execution_options(stream_results=True).execute(
+                select(table).order_by(*table.primary_key.columns)
+            )
+            with _open_writer(tmp_path, schema, fmt) as writer:
+                for partition in result.partitions(BATCH_ROWS):
+                    values = list(zip(*partition))
+                    arrays = [
+                        pa.array(_encode(column, list(column_values)), type=field.type)
+                        for column, field, column_values in zip(table.columns, schema, values)
+                    ]
+                    writer.write_batch(pa.record_batch(arrays, schema=schema))
+                    rows += len(partition)
+            os.replace(tmp_path, os.path.join(directory, filename))
+            manifest["tables"][table.name] = {"file": filename, "rows": rows}
+            print(f"   {table.name}: {rows} rows")
+
+    # Written last: a directory with a manifest is a complete archive
+    with open(os.path.join(directory, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def import_dataset(directory):
+    """Replace the dataset with the archive in ``directory``; returns the new dataset version"""
+    _require_pyarrow()
+    with open(os.path.join(directory, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported archive format {manifest.get('format')!r}")
+    fmt = manifest.get("file_format", "parquet")
+    init_db()
+
+    tables = data_tables()
+    db = SessionLocal()
+    try:
+        # Children first so foreign keys never point at deleted rows
+        for table in reversed(tables):
+            db.execute(delete(table))
+
+        for table in tables:
+            entry = manifest["tables"].get(table.name)
+            if entry is None:
+                # Table added after the archive was made: it stays empty
+                print(f"   {table.name}: not in archive, left empty")
+                continue
+            rows = 0
+            for batch in _read_batches(os.path.join(directory, entry["file"]), fmt):
+                columns = [column for column in table.columns if column.name in batch.schema.names]
+                values = [_decode(column, batch.column(column.name).to_pylist()) for column in columns]
+                records = [dict(zip([c.name for c in columns], row)) for row in zip(*values)]
+                bulk_insert(db, table, records)
+                rows += len(records)
+            print(f"   {table.name}: {rows} rows")
+
+        # Rows came with their ids, so new rows must not reuse them
+        reset_sequences(db, tables)
+        refresh_aggregates(db)
+        version = bump_dataset_version(db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    publish_dataset_version(version)
+    return version
@@ -0,0 +1,64 @@
+"""
+Precomputed animation frames for indicator time series.
+
+Animated charts ship only their first frame inline; the remaining years are
+written once per dataset version as raw little-endian float32 rows (one value
+per country, NaN where missing) into the artifact store, grouped in chunks of
+``CHUNK_YEARS`` years. The browser fetches chunks as playback reaches them::
+
+    frames-<code>.meta.json     years, country count, chunk size, value range
+    frames-<code>.<n>.bin       float32[years_in_chunk][countries]
+"""
+
+import json
+from app.services import artifacts
+from app.services.scraper.indicators import INDICATORS
+
+CHUNK_YEARS = 10
+
+def frame_set_name(code):
+    return f"frames-{code}"
+
+def is_frame_indicator(code):
+    return code in INDICATORS
+
+def build_frames(version, code, best=False):
+    """Write the frame chunks and metadata of indicator ``code`` for ``version``.
+
+    Returns the metadata dict, or None when the indicator has no data.
+    """
+    import numpy as np
+    from app.services.timeseries import load_indicator_matrix
+
+    matrix = load_indicator_matrix(code)
+    if matrix is None:
+        return None
+
+    name = frame_set_name(code)
+    # Year-major so one frame is one contiguous run of bytes
+    frames = np.ascontiguousarray(matrix.values.T, dtype="<f4")
+    chunks = range(0, len(matrix.years), CHUNK_YEARS)
+    for index, start in enumerate(chunks):
+        artifacts.store_artifact(version, name, f"{index}.bin", frames[start:start + CHUNK_YEARS].tobytes(), best)
+
+    present = matrix.values[~np.isnan(matrix.values)]
+    meta = {
+        "code": code,
+        "version": version,
+        "years": matrix.years.tolist(),
+        "countries": len(matrix.country_ids),
+        "chunk_years": CHUNK_YEARS,
+        "chunks": len(chunks),
+        "dtype": "float32-le",
+        "min": float(present.min()) if present.size else None,
+        "max": float(present.max()) if present.size else None,
+    }
+    # Metadata goes last since its presence marks the frame set as complete
+    artifacts.store_artifact(version, name, "meta.json", json.dumps(meta).encode("utf-8"), best)
+    return meta
+
+def ensure_frames(version, code):
+    """Build the frame set for ``version`` unless it is already stored; False if no data"""
+    if artifacts.has_artifact(version, frame_set_name(code), "meta.json"):
+        return True
+    return build_frames(version, code) is not None
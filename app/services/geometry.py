@@ -0,0 +1,260 @@
+"""
+Local country geometry for choropleth maps.
+
+Shapes come from a GeoJSON or TopoJSON file shipped with the app
+(``app/data/countries.geojson``, or ``WIKI_GEOMETRY_FILE``), so maps render
+without Plotly's remote world geometry and can use any shapes, e.g.
+subregions. Features are keyed by their ISO 3166-1 alpha-3 code (or whatever
+``id`` the file gives them).
+
+The bundled file is Natural Earth's public-domain 1:110m admin-0 countries,
+rounded to 0.001 degrees (the finest zoom keeps about a tenth of a pixel of
+that) and keyed by ISO alpha-3; Kosovo uses REST Countries' ``UNK``.
+
+When the file is first loaded every polygon is simplified with Douglas-Peucker
+once per zoom level (tolerance of about one screen pixel at that zoom) and the
+feature bounding boxes go into a uniform grid index for bounding-box queries.
+Whole-world payloads are cached compressed in memory per zoom level.
+"""
+
+import gzip
+import hashlib
+import json
+import math
+import os
+import threading
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+from app.models.base import PROJECT_ROOT
+
+GEOMETRY_FILE = os.environ.get("WIKI_GEOMETRY_FILE") or os.path.join(PROJECT_ROOT, "app", "data", "countries.geojson")
+GEOMETRY_URL = "/visualize/geometry/{zoom}.geojson"
+
+ZOOM_LEVELS = 5
+BASE_ZOOM = 1  # level used at projection scale 1 on a ~1000px wide chart
+WORLD_WIDTH_PX = 1024  # screen width of 360 degrees at zoom 0
+GRID_CELL_DEGREES = 10
+
+# Feature properties checked, in order, for the feature id
+ID_PROPERTIES = ("ISO_A3", "iso_a3", "ADM0_A3", "adm0_a3", "ISO3", "iso3", "id")
+
+_store = None
+_store_lock = threading.Lock()
+
+def geometry_available():
+    return os.path.exists(GEOMETRY_FILE)
+
+def zoom_tolerance(zoom):
+    """Simplification tolerance in degrees: one pixel at ``zoom``"""
+    return 360.0 / (WORLD_WIDTH_PX * 2 ** zoom)
+
+def simplify_ring(points, tolerance):
+    """Douglas-Peucker simplification of an (n, 2) point array, iterative"""
+    import numpy as np
+
+    n = len(points)
+    if n <= 4:
+        return points
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        a, b = points[start], points[end]
+        inner = points[start + 1:end] - a
+        d = b - a
+        length = math.hypot(d[0], d[1])
+        if length == 0:  # closed ring: start and end are the same point
+            dist = np.hypot(inner[:, 0], inner[:, 1])
+        else:
+            dist = np.abs(d[0] * inner[:, 1] - d[1] * inner[:, 0]) / length
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance:
+            mid = start + 1 + i
+            keep[mid] = True
+            stack.append((start, mid))
+            stack.append((mid, end))
+    return points[keep]
+
+def _extreme_ring(points):
+    """Smallest ring that still marks a shape: its west, south, east and north extremes"""
+    import numpy as np
+
+    order = [np.argmin(points[:, 0]), np.argmin(points[:, 1]), np.argmax(points[:, 0]), np.argmax(points[:, 1])]
+    ring = points[sorted(set(int(i) for i in order))]
+    return np.vstack([ring, ring[:1]])
+
+def _feature_id(feature):
+    properties = feature.get("properties") or {}
+    for key in ID_PROPERTIES:
+        value = properties.get(key)
+        if value and value != "-99":
+            return str(value)
+    return str(feature["id"]) if feature.get("id") is not None else None
+
+def _polygons(geometry, arcs=None):
+    """Normalize a (Multi)Polygon to a list of polygons, each a list of (n, 2) rings"""
+    import numpy as np
+
+    if not geometry:
+        return []
+    kind = geometry.get("type")
+    if arcs is not None:
+        parts = geometry.get("arcs") or []
+        to_ring = lambda indices: _topojson_ring(indices, arcs)
+    else:
+        parts = geometry.get("coordinates") or []
+        to_ring = lambda coordinates: np.asarray(coordinates, dtype=float)[:, :2]
+    if kind == "Polygon":
+        parts = [parts]
+    elif kind != "MultiPolygon":
+        return []
+    return [[to_ring(ring) for ring in polygon] for polygon in parts]
+
+def _topojson_arcs(topology):
+    """Absolute coordinates of every arc, undoing quantization and delta encoding"""
+    import numpy as np
+
+    transform = topology.get("transform")
+    arcs = []
+    for arc in topology.get("arcs", []):
+        points = np.asarray(arc, dtype=float)[:, :2]
+        if transform:
+            points = np.cumsum(points, axis=0) * transform["scale"] + transform["translate"]
+        arcs.append(points)
+    return arcs
+
+def _topojson_ring(indices, arcs):
+    import numpy as np
+
+    pieces = []
+    for i, index in enumerate(indices):
+        points = arcs[index] if index >= 0 else arcs[~index][::-1]
+        # Consecutive arcs share their joining point
+        pieces.append(points if i == 0 else points[1:])
+    return np.vstack(pieces)
+
+def _read_features(path):
+    """[(id, polygons)] from a GeoJSON FeatureCollection or a TopoJSON Topology"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    if data.get("type") == "Topology":
+        arcs = _topojson_arcs(data)
+        features = []
+        for obj in data.get("objects", {}).values():
+            for geometry in obj.get("geometries", [obj]):
+                features.append((_feature_id(geometry), _polygons(geometry, arcs)))
+    else:
+        features = [(_feature_id(f), _polygons(f.get("geometry"))) for f in data.get("features", [])]
+    return [(fid, polygons) for fid, polygons in features if fid and polygons]
+
+class GeometryStore:
+    """Simplified feature geometry per zoom level plus a grid index over bounding boxes"""
+
+    def __init__(self, features, etag):
+        import numpy as np
+
+        self.etag = etag
+        self.ids = [fid for fid, _ in features]
+        bounds = []
+        for _, polygons in features:
+            points = np.vstack([ring for polygon in polygons for ring in polygon])
+            bounds.append([*points.min(axis=0), *points.max(axis=0)])
+        self.bboxes = np.array(bounds, dtype=float).reshape(-1, 4)
+        self.levels = [self._simplify(features, zoom) for zoom in range(ZOOM_LEVELS)]
+        self.grid = {}
+        for index, (west, south, east, north) in enumerate(self.bboxes):
+            for cell in self._cells(west, south, east, north):
+                self.grid.setdefault(cell, []).append(index)
+        self._encoded = {}
+        self._encoded_lock = threading.Lock()
+
+    @staticmethod
+    def _cells(west, south, east, north):
+        x0, x1 = int(math.floor(west / GRID_CELL_DEGREES)), int(math.floor(east / GRID_CELL_DEGREES))
+        y0, y1 = int(math.floor(south / GRID_CELL_DEGREES)), int(math.floor(north / GRID_CELL_DEGREES))
+        return [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+    @staticmethod
+    def _simplify(features, zoom):
+        """GeoJSON geometry dicts for ``zoom``; coordinates rounded to a tenth of a pixel"""
+        tolerance = zoom_tolerance(zoom)
+        decimals = max(0, math.ceil(-math.log10(tolerance / 10)))
+        simplified = []
+        for _, polygons in features:
+            parts = []
+            for polygon in polygons:
+                rings = [simplify_ring(ring, tolerance) for ring in polygon]
+                if len(rings[0]) < 4:
+                    continue  # outer ring is below a pixel at this zoom
+                parts.append([ring.round(decimals).tolist() for ring in rings if len(ring) >= 4])
+            if not parts:
+                # Keep tiny countries visible (and hoverable) as a marker-sized shape
+                largest = max((polygon[0] for polygon in polygons), key=len)
+                parts = [[_extreme_ring(largest).round(decimals).tolist()]]
+            simplified.append({"type": "MultiPolygon", "coordinates": parts})
+        return simplified
+
+    def query(self, west, south, east, north):
+        """Indices of features whose bounding box intersects the given box"""
+        candidates = set()
+        for cell in self._cells(west, south, east, north):
+            candidates.update(self.grid.get(cell, ()))
+        return sorted(
+            i for i in candidates
+            if self.bboxes[i][0] <= east and self.bboxes[i][2] >= west
+            and self.bboxes[i][1] <= north and self.bboxes[i][3] >= south
+        )
+
+    def feature_collection(self, zoom, indices=None):
+        geometries = self.levels[zoom]
+        if indices is None:
+            indices = range(len(self.ids))
+        return {
+            "type": "FeatureCollection",
+            "features": [
+                {"type": "Feature", "id": self.ids[i], "properties": {}, "geometry": geometries[i]}
+                for i in indices
+            ]
+        }
+
+    def encode(self, zoom, encoding=None, bbox=None):
+        """GeoJSON bytes for ``zoom``, compressed with ``encoding``; whole-world results are cached"""
+        if bbox is not None:
+            return _compress(self._dump(self.feature_collection(zoom, self.query(*bbox))), encoding, level=5)
+        key = (zoom, encoding)
+        with self._encoded_lock:
+            if key not in self._encoded:
+                self._encoded[key] = _compress(self._dump(self.feature_collection(zoom)), encoding, level=9)
+            return self._encoded[key]
+
+    @staticmethod
+    def _dump(collection):
+        return json.dumps(collection, separators=(",", ":")).encode("utf-8")
+
+def _compress(data, encoding, level):
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=level)
+    return data
+
+def load_geometry():
+    """The geometry store for GEOMETRY_FILE (None when no file is bundled)"""
+    global _store
+    if _store is None and geometry_available():
+        with _store_lock:
+            if _store is None:
+                with open(GEOMETRY_FILE, "rb") as f:
+                    etag = hashlib.sha256(f.read()).hexdigest()[:16]
+                features = _read_features(GEOMETRY_FILE)
+                _store = GeometryStore(features, etag)
+                print(f"Loaded {len(features)} shapes from {GEOMETRY_FILE}")
+    return _store
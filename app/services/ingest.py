@@ -1,4 +1,4 @@
-from app.services.scraper import get_country_summary
+from app.services.scraper.wikipedia import get_country_summary
 from app.models.base import SessionLocal
 from app.models.entities import Country
 
@@ -7,7 +7,7 @@ def add_country(name, capital, iso_code):
     db = SessionLocal()
     data = get_country_summary(name)
     if data:
-        country = Country(name=name, capital=capital, iso_code=iso_code)
+        country = Country(name=name, capital=capital, iso_code_alpha3=iso_code)
         db.add(country)
         db.commit()
     db.close()
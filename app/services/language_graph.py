@@ -0,0 +1,226 @@
+"""
+Language analytics over the country x language incidence matrix.
+
+From ``CountryLanguage`` it builds the sparse incidence matrix ``A``
+(countries x languages) and derives everything with sparse products:
+
+- ``A.T @ A``: languages sharing countries (the co-occurrence network),
+- ``A @ A.T``: countries sharing a language,
+- connected components of the language network ("communities": languages
+  linked through any chain of multilingual countries),
+- speaker estimates: each country's population split evenly across its
+  languages, i.e. ``(A / row sums).T @ population``.
+
+scipy.sparse does the products and component labelling when installed. The
+NumPy fallback expands each country's (or language's) entries into pairs
+with ``np.repeat`` and labels components by min-label propagation. Neither
+path loops over countries or languages in Python.
+
+The summary is computed once per dataset version. The pre-render stage
+stores it as a JSON artifact, and APIs and charts read it from there.
+"""
+
+import json
+import numpy as np
+
+try:
+    import scipy.sparse as sparse
+    from scipy.sparse.csgraph import connected_components
+except ImportError:  # scipy is optional, the NumPy path gives identical results
+    sparse = None
+
+from app.models.base import SessionLocal
+from app.models.entities import Country, CountryLanguage, Language
+from app.services import artifacts
+from app.services.versioning import VersionedCache, current_dataset_version
+
+ARTIFACT_NAME = "language_graph"
+TOP_PAIRS = 200
+TOP_COUNTRY_LINKS = 300
+TOP_COMMUNITY_LANGUAGES = 10
+
+_summaries = VersionedCache("language_graph")
+
+def gram(rows, cols, n_cols, weights=None):
+    """COO (i, j, value) of ``M.T @ M`` where ``M[rows, cols] = weights`` (1 when omitted)"""
+    weights = np.ones(len(rows)) if weights is None else np.asarray(weights, dtype=float)
+    if sparse is not None:
+        n_rows = int(rows.max()) + 1 if len(rows) else 0
+        m = sparse.csr_matrix((weights, (rows, cols)), shape=(n_rows, n_cols))
+        product = (m.T @ m).tocsr()
+        # Canonical (row-major) order so ties rank the same on both paths
+        product.sort_indices()
+        product = product.tocoo()
+        return product.row, product.col, product.data
+
+    # Pair up every two entries that share a row, then sum duplicates
+    order = np.argsort(rows, kind="stable")
+    rows, cols, weights = rows[order], cols[order], weights[order]
+    starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]]) if len(rows) else np.empty(0, dtype=np.int64)
+    sizes = np.diff(np.r_[starts, len(rows)])
+    pairs_per_entry = np.repeat(sizes, sizes)
+    left = np.repeat(np.arange(len(rows)), pairs_per_entry)
+    first_pair = np.cumsum(pairs_per_entry) - pairs_per_entry
+    right = np.repeat(np.repeat(starts, sizes), pairs_per_entry) + np.arange(len(left)) - np.repeat(first_pair, pairs_per_entry)
+    keys = cols[left].astype(np.int64) * n_cols + cols[right]
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    values = np.bincount(inverse, weights=weights[left] * weights[right])
+    return unique_keys // n_cols, unique_keys % n_cols, values
+
+def component_labels(n, i, j):
+    """Connected component of each of ``n`` nodes given undirected edges (i, j), labelled 0..k-1"""
+    if sparse is not None:
+        graph = sparse.coo_matrix((np.ones(len(i)), (i, j)), shape=(n, n))
+        return connected_components(graph, directed=False)[1]
+
+    labels = np.arange(n)
+    while True:
+        previous = labels.copy()
+        # Every node takes the smallest label among its neighbours, then
+        # pointer jumping shortcuts chains of labels
+        np.minimum.at(labels, i, labels[j])
+        np.minimum.at(labels, j, labels[i])
+        labels = labels[labels]
+        if np.array_equal(labels, previous):
+            break
+    return np.unique(labels, return_inverse=True)[1]
+
+def _load_incidence(db):
+    links = db.query(CountryLanguage.country_id, CountryLanguage.language_id, CountryLanguage.is_official).filter(
+        CountryLanguage.country_id.isnot(None),
+        CountryLanguage.language_id.isnot(None)
+    ).all()
+    languages = db.query(Language.id, Language.name).order_by(Language.id).all()
+    countries = db.query(Country.id, Country.name, Country.iso_code_alpha3, Country.population,
+                         Country.latitude, Country.longitude).order_by(Country.id).all()
+    return links, languages, countries
+
+def build_summary():
+    """Compute language statistics, communities and network summaries from the database"""
+    db = SessionLocal()
+    try:
+        links, languages, countries = _load_incidence(db)
+    finally:
+        db.close()
+    if not links:
+        return None
+
+    language_ids = np.array([row.id for row in languages], dtype=np.int64)
+    language_names = [row.name for row in languages]
+    country_ids = np.array([row.id for row in countries], dtype=np.int64)
+    population = np.array([float(row.population or 0) for row in countries])
+
+    n_languages = len(language_ids)
+    link_country = np.array([row.country_id for row in links], dtype=np.int64)
+    link_language = np.array([row.language_id for row in links], dtype=np.int64)
+    link_official = np.array([bool(row.is_official) for row in links])
+    # Map database ids to dense row/column indices; drop links to missing rows
+    c = np.minimum(np.searchsorted(country_ids, link_country), len(country_ids) - 1)
+    l = np.minimum(np.searchsorted(language_ids, link_language), n_languages - 1)
+    valid = (country_ids[c] == link_country) & (language_ids[l] == link_language)
+    # A country listing a language twice still counts once
+    keys = np.unique(c[valid] * n_languages + l[valid])
+    official_keys = np.unique(c[valid & link_official] * n_languages + l[valid & link_official])
+    c, l = keys // n_languages, keys % n_languages
+
+    # Per-language counts and population-weighted speakers
+    languages_per_country = np.bincount(c, minlength=len(country_ids))
+    country_count = np.bincount(l, minlength=n_languages)
+    official_count = np.bincount(official_keys % n_languages, minlength=n_languages)
+    speakers = np.bincount(l, weights=population[c] / languages_per_country[c], minlength=n_languages)
+
+    # Language co-occurrence: languages sharing at least one country
+    li, lj, shared = gram(c, l, n_languages)
+    off_diagonal = li != lj
+    li, lj, shared = li[off_diagonal], lj[off_diagonal], shared[off_diagonal]
+    community = component_labels(n_languages, li, lj)
+
+    # Country network: countries sharing at least one language
+    ci, cj, shared_languages = gram(l, c, len(country_ids))
+    upper = ci < cj
+    ci, cj, shared_languages = ci[upper], cj[upper], shared_languages[upper]
+    degree = np.bincount(np.r_[ci, cj], minlength=len(country_ids))
+    has_language = languages_per_country > 0
+
+    spoken = np.flatnonzero(country_count > 0)
+    by_speakers = spoken[np.argsort(-speakers[spoken], kind="stable")]
+    language_stats = [{
+        "id": int(language_ids[i]),
+        "name": language_names[i],
+        "countries": int(country_count[i]),
+        "official_countries": int(official_count[i]),
+        "speakers": round(float(speakers[i])),
+        "community": int(community[i])
+    } for i in by_speakers]
+
+    community_speakers = np.bincount(community[spoken], weights=speakers[spoken], minlength=community.max() + 1)
+    community_languages = np.bincount(community[spoken], minlength=community.max() + 1)
+    # Countries per community: a country belongs to its languages' (single) community
+    country_community = np.full(len(country_ids), -1)
+    country_community[c] = community[l]
+    community_countries = np.bincount(country_community[country_community >= 0], minlength=community.max() + 1)
+    communities = []
+    for label in np.argsort(-community_speakers, kind="stable"):
+        if community_languages[label] == 0:
+            continue
+        members = by_speakers[community[by_speakers] == label]
+        communities.append({
+            "id": int(label),
+            "languages": int(community_languages[label]),
+            "countries": int(community_countries[label]),
+            "speakers": round(float(community_speakers[label])),
+            "top_languages": [language_names[i] for i in members[:TOP_COMMUNITY_LANGUAGES]],
+            "top_language_speakers": [round(float(speakers[i])) for i in members[:TOP_COMMUNITY_LANGUAGES]]
+        })
+
+    # Each undirected pair appears twice in the product; keep i < j
+    upper = li < lj
+    pair_order = np.argsort(-shared[upper], kind="stable")[:TOP_PAIRS]
+    pairs = [{
+        "a": language_names[a], "b": language_names[b], "countries": int(n)
+    } for a, b, n in zip(li[upper][pair_order], lj[upper][pair_order], shared[upper][pair_order])]
+
+    # Strongest country links: most shared languages, then largest combined population
+    link_order = np.lexsort((-(population[ci] + population[cj]), -shared_languages))[:TOP_COUNTRY_LINKS]
+    country_links = []
+    for a, b, n in zip(ci[link_order], cj[link_order], shared_languages[link_order]):
+        country_links.append({
+            "a": countries[a].iso_code_alpha3, "b": countries[b].iso_code_alpha3,
+            "a_name": countries[a].name, "b_name": countries[b].name,
+            "a_lat": countries[a].latitude, "a_lon": countries[a].longitude,
+            "b_lat": countries[b].latitude, "b_lon": countries[b].longitude,
+            "shared_languages": int(n)
+        })
+
+    return {
+        "version": current_dataset_version(),
+        "countries": int(has_language.sum()),
+        "languages": int(len(spoken)),
+        "language_stats": language_stats,
+        "communities": communities,
+        "pairs": pairs,
+        "country_network": {
+            "edges": int(len(ci)),
+            "isolated_countries": int((has_language & (degree == 0)).sum()),
+            "mean_degree": round(float(degree[has_language].mean()), 3) if has_language.any() else 0,
+            "top_links": country_links
+        }
+    }
+
+def store_summary(version, best=False):
+    """Compute the summary and store it as an artifact of ``version``"""
+    summary = build_summary()
+    if summary is not None:
+        artifacts.store_artifact(version, ARTIFACT_NAME, "summary.json", json.dumps(summary).encode("utf-8"), best)
+    return summary
+
+def load_summary():
+    """Language summary at the current version (None without language data)"""
+    return _summaries.get_or_create("summary", _load_or_build)
+
+def _load_or_build():
+    version = current_dataset_version()
+    data = artifacts.load_artifact(version, ARTIFACT_NAME, "summary.json")
+    if data is not None:
+        return json.loads(data)
+    return store_summary(version)
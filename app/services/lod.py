@@ -0,0 +1,144 @@
+"""
+Level of detail for scatter charts with many points.
+
+The chart engine runs every figure through ``apply_level_of_detail``:
+
+- up to ``WEBGL_POINTS`` markers the figure is left alone,
+- above that, scatter traces become WebGL ``scattergl`` traces, which the
+  browser draws on the GPU instead of as one SVG node per marker,
+- above ``BIN_POINTS`` the points are binned server-side into a
+  ``BINS`` x ``BINS`` 2D histogram (in log space on log axes) and drawn as a
+  heatmap, so the payload stays the same size however many points there are.
+
+Binned charts get ``layout.meta.lod``; the zoom script then fetches the
+points inside the visible window from ``/visualize/charts/<name>/detail.json``,
+which answers with the raw points once few enough are left, or with a finer
+histogram of the window otherwise.
+
+Animated figures (Plotly frames or the frame player) are never binned, as
+their frames restyle individual points; they only switch to WebGL.
+"""
+
+import os
+import numpy as np
+from app.services.versioning import VersionedCache
+
+WEBGL_POINTS = int(os.environ.get("WIKI_LOD_WEBGL_POINTS") or 2000)
+BIN_POINTS = int(os.environ.get("WIKI_LOD_BIN_POINTS") or 50000)
+BINS = 150
+
+_points = VersionedCache("lod_points")
+
+def scatter_count(fig):
+    return sum(len(trace.x) for trace in fig.data if trace.type == "scatter" and trace.x is not None)
+
+def scatter_points(fig):
+    """All scatter markers of a figure as flat arrays, plus whether each axis is logarithmic"""
+    log_x, log_y = fig.layout.xaxis.type == "log", fig.layout.yaxis.type == "log"
+    xs, ys, texts = [], [], []
+    for trace in fig.data:
+        if trace.type != "scatter" or trace.x is None:
+            continue
+        x = np.asarray(trace.x, dtype=float)
+        y = np.asarray(trace.y, dtype=float)
+        text = trace.text if trace.text is not None and not isinstance(trace.text, str) else trace.hovertext
+        xs.append(x)
+        ys.append(y)
+        texts.append(np.asarray(text, dtype=object) if text is not None and not isinstance(text, str)
+                     else np.full(len(x), None, dtype=object))
+    x = np.concatenate(xs) if xs else np.empty(0)
+    y = np.concatenate(ys) if ys else np.empty(0)
+    text = np.concatenate(texts) if texts else np.empty(0, dtype=object)
+    # Points a log axis can't show would also break the log-space bins
+    keep = np.isfinite(x) & np.isfinite(y)
+    if log_x:
+        keep &= x > 0
+    if log_y:
+        keep &= y > 0
+    return {"x": x[keep], "y": y[keep], "text": text[keep], "log_x": log_x, "log_y": log_y}
+
+def load_points(name, build):
+    """Scatter points of chart ``name`` at the current version; ``build()`` returns its full-detail figure"""
+    return _points.get_or_create(name, lambda: scatter_points(build()))
+
+def bin_points(x, y, log_x=False, log_y=False, bins=BINS):
+    """2D histogram of the points as heatmap data; empty bins are None so they stay transparent"""
+    bx = np.log10(x) if log_x else x
+    by = np.log10(y) if log_y else y
+    counts, x_edges, y_edges = np.histogram2d(bx, by, bins=bins)
+    x_centers = (x_edges[:-1] + x_edges[1:]) / 2
+    y_centers = (y_edges[:-1] + y_edges[1:]) / 2
+    return {
+        "x": (10 ** x_centers if log_x else x_centers).tolist(),
+        "y": (10 ** y_centers if log_y else y_centers).tolist(),
+        # Heatmap rows run along y
+        "z": [[int(count) if count else None for count in row] for row in counts.T]
+    }
+
+def _webgl(trace):
+    import plotly.graph_objects as go
+    if trace.type != "scatter":
+        return trace
+    properties = trace.to_plotly_json()
+    properties.pop("type")
+    return go.Scattergl(properties, skip_invalid=True)
+
+def apply_level_of_detail(fig, name):
+    """Figure with scatter traces switched to WebGL or binned, depending on how many points they hold"""
+    import plotly.graph_objects as go
+    count = scatter_count(fig)
+    if count <= WEBGL_POINTS:
+        return fig
+    meta = fig.layout.meta if isinstance(fig.layout.meta, dict) else {}
+    if count <= BIN_POINTS or fig.frames or "frames" in meta:
+        return go.Figure([_webgl(trace) for trace in fig.data], layout=fig.layout, frames=fig.frames)
+
+    points = scatter_points(fig)
+    binned = go.Figure(layout=fig.layout)
+    binned.add_trace(go.Heatmap(
+        **bin_points(points["x"], points["y"], points["log_x"], points["log_y"]),
+        colorscale="Viridis",
+        colorbar=dict(title="Points"),
+        hovertemplate="%{x:,.4g}, %{y:,.4g}<br>%{z:,} points<extra></extra>",
+        name="Density"
+    ))
+    # Filled with the raw points by the zoom script once few enough are in view
+    binned.add_trace(go.Scattergl(
+        x=[], y=[], text=[], mode="markers", name="Detail",
+        marker=dict(size=5, color="#f59e0b"),
+        hovertemplate="<b>%{text}</b><br>%{x:,.4g}, %{y:,.4g}<extra></extra>"
+    ))
+    for trace in fig.data:
+        if trace.type != "scatter":
+            binned.add_trace(trace)
+    binned.update_layout(
+        showlegend=False,
+        meta=dict(meta, lod={
+            "url": f"/visualize/charts/{name}/detail.json",
+            "log_x": points["log_x"],
+            "log_y": points["log_y"],
+            "heatmap": 0,
+            "detail": 1
+        })
+    )
+    return binned
+
+def detail(points, x0=None, x1=None, y0=None, y1=None):
+    """Points inside a window, or a histogram of the window if there are still too many"""
+    inside = np.ones(len(points["x"]), dtype=bool)
+    for values, low, high in ((points["x"], x0, x1), (points["y"], y0, y1)):
+        if low is not None:
+            inside &= values >= low
+        if high is not None:
+            inside &= values <= high
+    rows = np.flatnonzero(inside)
+    if len(rows) > BIN_POINTS:
+        binned = bin_points(points["x"][rows], points["y"][rows], points["log_x"], points["log_y"])
+        return dict(binned, mode="bins", points=int(len(rows)))
+    return {
+        "mode": "points",
+        "points": int(len(rows)),
+        "x": points["x"][rows].tolist(),
+        "y": points["y"][rows].tolist(),
+        "text": [None if text is None else str(text) for text in points["text"][rows]]
+    }
@@ -0,0 +1,199 @@
+"""
+Lightweight timing instrumentation exposed in Prometheus text format.
+
+Timings are recorded into labelled histograms kept in process memory. Work is
+attributed to a *scope* (``chart:<name>`` while a chart renders,
+``scrape:<task>`` during a scrape) so SQL queries and session flushes, which
+are timed through SQLAlchemy events, show up against the chart or source that
+issued them.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_current_scope = ContextVar("wiki_metrics_scope", default="none")
+
+class Histogram:
+    """Cumulative-bucket histogram with one series per label combination"""
+
+    def __init__(self, name, documentation, label_names, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"buckets": [0] * len(self.buckets), "count": 0, "sum": 0.0}
+            if index < len(self.buckets):
+                series["buckets"][index] += 1
+            series["count"] += 1
+            series["sum"] += seconds
+
+    def series(self):
+        """Copy of the current series as {label tuple: (count, sum)}"""
+        with self._lock:
+            return {key: (s["count"], s["sum"]) for key, s in self._series.items()}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, dict(s, buckets=list(s["buckets"]))) for key, s in self._series.items())
+        for key, series in items:
+            labels = [f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, key)]
+            cumulative = 0
+            for bound, count in zip(self.buckets, series["buckets"]):
+                cumulative += count
+                bucket_labels = ",".join(labels + ['le="%s"' % bound])
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {cumulative}")
+            bucket_labels = ",".join(labels + ['le="+Inf"'])
+            lines.append(f"{self.name}_bucket{{{bucket_labels}}} {series['count']}")
+            label_text = "{" + ",".join(labels) + "}" if labels else ""
+            lines.append(f"{self.name}_sum{label_text} {series['sum']:.6f}")
+            lines.append(f"{self.name}_count{label_text} {series['count']}")
+        return "\n".join(lines)
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+REGISTRY = {}
+_registry_lock = threading.Lock()
+
+def histogram(name, documentation, label_names, buckets=DEFAULT_BUCKETS):
+    """Get or create the histogram called ``name``"""
+    with _registry_lock:
+        if name not in REGISTRY:
+            REGISTRY[name] = Histogram(name, documentation, label_names, buckets)
+        return REGISTRY[name]
+
+HTTP_REQUEST_SECONDS = histogram(
+    "wiki_http_request_seconds", "Time spent handling HTTP requests", ["endpoint", "method", "status"])
+SQL_QUERY_SECONDS = histogram(
+    "wiki_sql_query_seconds", "Time spent executing SQL statements", ["scope", "statement"])
+DB_FLUSH_SECONDS = histogram(
+    "wiki_db_flush_seconds", "Time spent flushing ORM sessions", ["scope"])
+STAGE_SECONDS = histogram(
+    "wiki_stage_seconds", "Time spent in chart and scrape pipeline stages", ["scope", "stage"])
+SCRAPER_HTTP_SECONDS = histogram(
+    "wiki_scraper_http_seconds", "Time spent on outgoing scraper HTTP calls", ["scope", "host", "status"])
+
+def current_scope():
+    return _current_scope.get()
+
+@contextmanager
+def scope(name):
+    """Attribute everything timed inside the block to ``name``"""
+    token = _current_scope.set(name)
+    try:
+        yield
+    finally:
+        _current_scope.reset(token)
+
+@contextmanager
+def stage(name):
+    """Time a pipeline stage (DataFrame build, figure build, to_html...) in the current scope"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, scope=current_scope(), stage=name)
+
+def observe_scraper_http(host, status, seconds):
+    SCRAPER_HTTP_SECONDS.observe(seconds, scope=current_scope(), host=host, status=status)
+
+def snapshot():
+    """Current totals of every histogram, for computing per-job deltas"""
+    return {name: hist.series() for name, hist in REGISTRY.items()}
+
+def summarize_since(before, scope_prefix=None):
+    """Per-series count and total seconds recorded since ``before = snapshot()``.
+
+    With ``scope_prefix`` only series whose scope label starts with it are kept.
+    """
+    summary = []
+    for name, hist in REGISTRY.items():
+        previous = before.get(name, {})
+        for key, (count, total) in hist.series().items():
+            labels = dict(zip(hist.label_names, key))
+            if scope_prefix is not None and not labels.get("scope", "").startswith(scope_prefix):
+                continue
+            old_count, old_total = previous.get(key, (0, 0.0))
+            if count > old_count:
+                summary.append({
+                    "metric": name,
+                    "labels": labels,
+                    "count": count - old_count,
+                    "seconds": round(total - old_total, 6),
+                })
+    summary.sort(key=lambda item: item["seconds"], reverse=True)
+    return summary
+
+def render_prometheus(extra_lines=()):
+    """All histograms in Prometheus text exposition format (version 0.0.4)"""
+    parts = [hist.render() for hist in REGISTRY.values()]
+    parts.extend(extra_lines)
+    return "\n".join(parts) + "\n"
+
+# SQL statements and session flushes are timed for every engine and session
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("wiki_query_start", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("wiki_query_start")
+    if starts:
+        elapsed = time.perf_counter() - starts.pop()
+        verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+        SQL_QUERY_SECONDS.observe(elapsed, scope=current_scope(), statement=verb)
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    starts = context.connection.info.get("wiki_query_start") if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+@event.listens_for(Session, "before_flush")
+def _before_flush(session, flush_context, instances):
+    session.info["wiki_flush_start"] = time.perf_counter()
+
+@event.listens_for(Session, "after_flush_postexec")
+def _after_flush(session, flush_context):
+    start = session.info.pop("wiki_flush_start", None)
+    if start is not None:
+        DB_FLUSH_SECONDS.observe(time.perf_counter() - start, scope=current_scope())
+
+def init_app(app):
+    """Record per-request timings for a Flask app"""
+    from flask import g, request
+
+    @app.before_request
+    def _start_request_timer():
+        g.wiki_request_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request_time(response):
+        start = g.pop("wiki_request_start", None)
+        if start is not None:
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                endpoint=request.endpoint or "unknown",
+                method=request.method,
+                status=response.status_code,
+            )
+        return response
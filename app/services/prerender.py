@@ -0,0 +1,107 @@
+"""
+Post-ingest stage that renders every registered chart ahead of the first visitor.
+
+Charts are rendered in parallel on a process pool (Plotly serialization is CPU
+bound, so threads would just queue behind the GIL) and written to the artifact
+store under the dataset version they were built from. Each worker gets a batch
+of charts reading the same data sources, so every source is loaded once per
+batch rather than once per chart.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from app.models.base import IN_MEMORY
+from app.services.artifacts import prune_artifacts
+from app.services.versioning import current_dataset_version
+
+def _prerender_chart_batch(names, version):
+    """Worker entry point: render a batch of charts and store their compressed artifacts.
+
+    Returns {name: error message or None}, so one failing chart doesn't lose the batch.
+    """
+    from app.routes.visualize import render_chart, render_charts, store_chart_artifacts
+    try:
+        pages = render_charts(names)
+    except Exception:
+        # A source failed to load: fall back to charts one by one to isolate it
+        pages = {}
+    results = {}
+    for name in names:
+        try:
+            page = pages.get(name) or render_chart(name)
+            store_chart_artifacts(version, name, page, best=True)
+            results[name] = None
+        except Exception as e:
+            results[name] = str(e)
+    return results
+
+def chart_batches(registry, count):
+    """Split chart names into ``count`` batches, keeping charts with the same sources together"""
+    names = sorted(registry, key=lambda name: registry[name].sources)
+    size = -(-len(names) // max(1, count))
+    return [names[start:start + size] for start in range(0, len(names), size)]
+
+def _prerender_frames(code, version):
+    """Worker entry point: write the animation frames of one indicator"""
+    from app.services.frames import build_frames
+    build_frames(version, code, best=True)
+    return f"frames:{code}"
+
+def _prerender_distances(version):
+    """Worker entry point: write the all-pairs country distance matrix"""
+    from app.services.spatial import store_distance_matrix
+    store_distance_matrix(version)
+    return "distances"
+
+def _prerender_language_graph(version):
+    """Worker entry point: store the language analytics summary"""
+    from app.services.language_graph import store_summary
+    store_summary(version, best=True)
+    return "language_graph"
+
+def worker_pool(workers):
+    """Process pool for rendering; a single thread for an in-memory database,
+    which spawned workers would each open empty"""
+    if IN_MEMORY:
+        return ThreadPoolExecutor(max_workers=1)
+    # Spawn rather than fork: the scrape runs in a background thread and the
+    # parent's database connections must not leak into the workers
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+def prerender_charts(version=None, max_workers=None):
+    """Render all charts in ``visualize_bp`` plus the dataset snapshot, frame sets, distance and language data for ``version`` (default: current)"""
+    from app.routes.visualize import CHART_REGISTRY
+    from app.services.scraper.indicators import INDICATORS
+    from app.services.snapshot import store_snapshot
+
+    if version is None:
+        version = current_dataset_version()
+    # Written before the pool starts so every worker maps the same bundle
+    store_snapshot(version)
+    names = list(CHART_REGISTRY)
+    workers = 1 if IN_MEMORY else max_workers or max(1, min(len(names), os.cpu_count() or 1))
+
+    print(f"Pre-rendering {len(names)} charts for dataset version {version} ({workers} workers)...")
+    rendered, failed = [], {}
+    with worker_pool(workers) as pool:
+        futures = {pool.submit(_prerender_chart_batch, batch, version): batch for batch in chart_batches(CHART_REGISTRY, workers)}
+        futures.update({pool.submit(_prerender_frames, code, version): [f"frames:{code}"] for code in INDICATORS})
+        futures[pool.submit(_prerender_distances, version)] = ["distances"]
+        futures[pool.submit(_prerender_language_graph, version)] = ["language_graph"]
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+                results = result if isinstance(result, dict) else {result: None}
+            except Exception as e:
+                results = {name: str(e) for name in futures[future]}
+            for name, error in results.items():
+                if error is None:
+                    rendered.append(name)
+                else:
+                    print(f"Error pre-rendering chart {name}: {error}")
+                    failed[name] = error
+
+    prune_artifacts(version)
+    print(f"Pre-rendered {len(rendered)} charts ({len(failed)} failed)")
+    return rendered, failed
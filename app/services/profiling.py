@@ -0,0 +1,223 @@
+"""
+On-demand profiling for chart requests and scrape jobs.
+
+A ``ProfileSession`` wraps a unit of work with cProfile, counts the SQL
+statements it issues and records allocation statistics with tracemalloc.
+Results are stored per request or job ID under ``database/profiles/<id>/``:
+``profile.pstats`` (loadable with ``pstats``/snakeviz) and ``summary.json``
+(hot functions, SQL counts, allocation sites) used by the admin page.
+
+Only one session runs at a time: cProfile and tracemalloc are process-wide,
+so concurrent sessions would mix their numbers. cProfile only sees the thread
+that started it; every summary says so (``SCOPE``). The newest
+``MAX_PROFILES`` profiles are kept.
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import shutil
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.models.base import DATABASE_DIR
+
+PROFILE_DIR = os.path.join(DATABASE_DIR, "profiles")
+TOP_N = 25
+# Stored profiles kept; the oldest are deleted when a new one is written
+MAX_PROFILES = int(os.environ.get("WIKI_MAX_PROFILES", 0)) or 50
+# What the numbers cover, shown with every profile
+SCOPE = (
+    "Function timings cover the thread that ran the work only: work it hands to other threads "
+    "(such as the indicator downloads) or to worker processes (chart pre-rendering) is missing from them. "
+    "Memory covers every thread of this process; SQL counts include threads started with the job's context."
+)
+
+_active_session = ContextVar("wiki_profile_session", default=None)
+_session_lock = threading.Lock()
+
+class ProfilerBusy(Exception):
+    """Raised when another profiling session is already running"""
+
+class ProfileSession:
+    """Context manager capturing cProfile, SQL and allocation stats for one unit of work"""
+
+    def __init__(self, kind, target, profile_id=None):
+        self.kind = kind
+        self.target = target
+        self.profile_id = profile_id or f"{kind}-{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+        self.sql_counts = Counter()
+        self.sql_statements = Counter()
+        self._profiler = cProfile.Profile()
+        self._started_tracemalloc = False
+        self._start = None
+
+    def start(self):
+        if not _session_lock.acquire(blocking=False):
+            raise ProfilerBusy("Another profiling session is running")
+        _active_session.set(self)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            self._started_tracemalloc = True
+        tracemalloc.reset_peak()
+        self._start = time.perf_counter()
+        self._profiler.enable()
+        return self
+
+    def stop(self, error=None):
+        """Stop collecting and write the artifacts; returns the summary dict"""
+        self._profiler.disable()
+        duration = time.perf_counter() - self._start
+        try:
+            current, peak = tracemalloc.get_traced_memory()
+            allocations = tracemalloc.take_snapshot().statistics("lineno")[:TOP_N]
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+            _active_session.set(None)
+            return self._write(duration, current, peak, allocations, error)
+        finally:
+            _session_lock.release()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.summary = self.stop(error=str(exc) if exc else None)
+        return False
+
+    def _write(self, duration, current, peak, allocations, error):
+        directory = os.path.join(PROFILE_DIR, self.profile_id)
+        os.makedirs(directory, exist_ok=True)
+        self._profiler.dump_stats(os.path.join(directory, "profile.pstats"))
+
+        summary = {
+            "id": self.profile_id,
+            "kind": self.kind,
+            "target": self.target,
+            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "duration_seconds": round(duration, 6),
+            "error": error,
+            "scope": SCOPE,
+            "sql": {
+                "total": sum(self.sql_counts.values()),
+                "by_statement": dict(self.sql_counts.most_common()),
+                "top_statements": [
+                    {"statement": text, "count": count} for text, count in self.sql_statements.most_common(10)
+                ],
+            },
+            "memory": {
+                "current_bytes": current,
+                "peak_bytes": peak,
+                "top_allocations": [
+                    {"location": str(stat.traceback[0]), "size_bytes": stat.size, "count": stat.count}
+                    for stat in allocations
+                ],
+            },
+            "hot_functions": hot_functions(self._profiler),
+        }
+        with open(os.path.join(directory, "summary.json"), "w") as f:
+            json.dump(summary, f, indent=2)
+        prune_profiles(MAX_PROFILES)
+        return summary
+
+def hot_functions(profiler, limit=TOP_N):
+    """Top functions by own time from a profiler or pstats file"""
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, line, func), (cc, nc, tottime, cumtime, callers) in stats.stats.items():
+        rows.append({
+            "function": f"{func} ({os.path.basename(filename)}:{line})",
+            "calls": nc,
+            "own_seconds": round(tottime, 6),
+            "cumulative_seconds": round(cumtime, 6),
+        })
+    rows.sort(key=lambda row: row["own_seconds"], reverse=True)
+    return rows[:limit]
+
+def is_profiling():
+    """True while the current request or job is being profiled"""
+    return _active_session.get() is not None
+
+def list_profiles():
+    """Summaries of stored profiles, newest first"""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    summaries = []
+    for entry in os.listdir(PROFILE_DIR):
+        summary = load_profile(entry)
+        if summary:
+            summaries.append(summary)
+    summaries.sort(key=lambda s: s["created_at"], reverse=True)
+    return summaries
+
+def prune_profiles(keep=MAX_PROFILES):
+    """Delete all but the newest ``keep`` stored profiles"""
+    if not os.path.isdir(PROFILE_DIR):
+        return
+    directories = [entry for entry in os.scandir(PROFILE_DIR) if entry.is_dir()]
+    directories.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in directories[keep:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+def load_profile(profile_id):
+    if os.path.basename(profile_id) != profile_id:
+        return None
+    try:
+        with open(os.path.join(PROFILE_DIR, profile_id, "summary.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def profile_stats_path(profile_id):
+    if os.path.basename(profile_id) != profile_id:
+        return None
+    path = os.path.join(PROFILE_DIR, profile_id, "profile.pstats")
+    return path if os.path.exists(path) else None
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    session = _active_session.get()
+    if session is not None:
+        text = " ".join(statement.split())
+        session.sql_counts[text.split(" ", 1)[0].upper() if text else "UNKNOWN"] += 1
+        session.sql_statements[text[:200]] += 1
+
+def init_app(app):
+    """Profile requests that carry the secret key in X-Profile or ?profile="""
+    from flask import g, request
+
+    def requested():
+        key = request.headers.get("X-Profile") or request.args.get("profile")
+        return bool(key) and key == app.config["SECRET_KEY"]
+
+    @app.before_request
+    def _start_request_profile():
+        if requested():
+            try:
+                g.wiki_profile = ProfileSession("request", f"{request.method} {request.path}").start()
+            except ProfilerBusy:
+                g.wiki_profile = None
+
+    @app.after_request
+    def _finish_request_profile(response):
+        session = g.pop("wiki_profile", None)
+        if session is not None:
+            session.stop()
+            response.headers["X-Profile-Id"] = session.profile_id
+        elif requested():
+            response.headers["X-Profile-Id"] = "busy"
+        return response
+
+    @app.teardown_request
+    def _abort_request_profile(exc):
+        # after_request is skipped when the view raises; still release the profiler
+        session = g.pop("wiki_profile", None)
+        if session is not None:
+            session.stop(error=str(exc) if exc else None)
@@ -0,0 +1,94 @@
+"""
+Checkpoints for the fetch phase of an ingest.
+
+Every finished HTTP step (the REST Countries download, each World Bank
+indicator page) is committed to ``ingest_checkpoint`` with its parsed result
+as soon as it completes. If the job dies before the ingest commits, the next
+run of the same job loads those results instead of fetching them again and
+only makes the calls that never finished. The ingest deletes its checkpoints
+in the same transaction that loads the data, so a completed job always
+starts fresh next time.
+
+Checkpoints older than ``MAX_AGE`` are discarded rather than resumed, so a
+job restarted days later doesn't load stale upstream data.
+"""
+
+import gzip
+import json
+import threading
+from datetime import datetime, timedelta
+from app.models.base import SessionLocal
+from app.models.entities import IngestCheckpoint
+
+MAX_AGE = timedelta(hours=24)
+
+class Checkpoints:
+    """Finished fetch steps of one ingest job"""
+
+    def __init__(self, job, max_age=MAX_AGE):
+        self.job = job
+        self.resumed = 0
+        # Steps finish on several fetch threads; one writer at a time
+        self._lock = threading.Lock()
+        db = SessionLocal()
+        try:
+            expired = datetime.now() - max_age
+            db.query(IngestCheckpoint).filter(
+                IngestCheckpoint.job == job, IngestCheckpoint.completed_at < expired
+            ).delete()
+            db.commit()
+            self.steps = {
+                step: payload
+                for step, payload in db.query(IngestCheckpoint.step, IngestCheckpoint.payload).filter_by(job=job)
+            }
+        finally:
+            db.close()
+        if self.steps:
+            print(f"🔁 Resuming {job} ingest: {len(self.steps)} fetch steps already done")
+
+    def __contains__(self, step):
+        return step in self.steps
+
+    def load(self, step):
+        return json.loads(gzip.decompress(self.steps[step]))
+
+    def save(self, step, result):
+        """Record ``step`` as done; committed right away so it survives a crash"""
+        payload = gzip.compress(json.dumps(result).encode("utf-8"))
+        with self._lock:
+            db = SessionLocal()
+            try:
+                db.merge(IngestCheckpoint(job=self.job, step=step, payload=payload, completed_at=datetime.now()))
+                db.commit()
+            finally:
+                db.close()
+            self.steps[step] = payload
+
+    def run(self, step, fetch):
+        """Result of ``step``: from its checkpoint, or by calling ``fetch()`` and saving it.
+
+        A ``None`` result means the fetch failed softly; it is not saved.
+        """
+        if step in self:
+            with self._lock:
+                self.resumed += 1
+            return self.load(step)
+        result = fetch()
+        if result is not None:
+            self.save(step, result)
+        return result
+
+    def discard(self, step):
+        """Forget ``step`` so the next run fetches it again, e.g. after its result was rejected"""
+        with self._lock:
+            db = SessionLocal()
+            try:
+                db.query(IngestCheckpoint).filter_by(job=self.job, step=step).delete()
+                db.commit()
+            finally:
+                db.close()
+            self.steps.pop(step, None)
+
+    def clear(self, db):
+        """Delete the job's checkpoints in the caller's (ingest) transaction"""
+        db.query(IngestCheckpoint).filter_by(job=self.job).delete()
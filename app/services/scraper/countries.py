@@ -1,12 +1,20 @@
-import requests
 import json
 from datetime import datetime
 from app.models.base import SessionLocal
 from app.models.entities import Country, Continent, Language, CountryLanguage
+from app.models.init_db import init_db
+from app.services import metrics
+from app.services.versioning import bump_dataset_version, publish_dataset_version
+from app.services.aggregates import refresh_aggregates
+from app.services.change_history import load_tracked, diff_countries, record_changes, carry_forward
+from .reference import clear_reference_data, currency_links, timezone_links, store_currencies_and_timezones
+from .checkpoints import Checkpoints
+from .http_client import http_get
+from .validation import ValidationError, validate_countries
 from sqlalchemy.exc import IntegrityError
 
 REST_COUNTRIES_API = "https://restcountries.com/v3.1/all"
-WORLD_BANK_API_BASE = "https://api.worldbank.org/v2/country/{}/indicator/NY.GDP.MKTP.CD,NY.GDP.PCAP.CD?format=json&date=2022&per_page=100"
+REST_COUNTRIES_STEP = "source:restcountries"
 
 def safe_get(data, *keys, default=None):
     """Safely get nested dictionary values"""
@@ -42,139 +50,202 @@ def calculate_population_density(population, area):
         return population / area
     return None
 
-def fetch_economic_data(iso_code):
-    """Fetch GDP data from World Bank API"""
-    if not iso_code:
-        return None, None
-    
-    try:
-        url = WORLD_BANK_API_BASE.format(iso_code.lower())
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            if len(data) > 1 and data[1]:  # World Bank API returns metadata as first element
-                for item in data[1]:
-                    if item.get('indicator', {}).get('id') == 'NY.GDP.MKTP.CD':
-                        gdp_total = safe_float(item.get('value'))
-                    elif item.get('indicator', {}).get('id') == 'NY.GDP.PCAP.CD':
-                        gdp_per_capita = safe_float(item.get('value'))
-                return gdp_total, gdp_per_capita
-    except Exception as e:
-        print(f"Error fetching economic data for {iso_code}: {e}")
-    
-    return None, None
-
 def clear_existing_data(db):
-    """Clear existing data to avoid duplicates"""
+    """Delete the scraped data inside the caller's transaction.
+
+    Not committed here: the ingest commits the wipe together with the new
+    data, so a failed ingest leaves the previous dataset in place.
+    """
+    # Delete in correct order to avoid foreign key constraints
+    db.query(CountryLanguage).delete()
+    clear_reference_data(db)
+    db.query(Country).delete()
+    db.query(Continent).delete()
+    db.query(Language).delete()
+    print("Cleared existing data")
+
+def parse_country(item):
+    """Country column values from one REST Countries record (None if it has no name)"""
+    # Extract name information
+    name_data = item.get("name", {})
+    common_name = safe_get(name_data, "common")
+    official_name = safe_get(name_data, "official")
+
+    if not common_name:
+        return None
+
+    # Basic location info
+    capital_list = item.get("capital", [])
+    capital = capital_list[0] if capital_list else None
+    region = item.get("region")
+    subregion = item.get("subregion")
+
+    # ISO codes
+    iso_alpha2 = item.get("cca2")
+    iso_alpha3 = item.get("cca3")
+    iso_numeric = item.get("ccn3")
+
+    # Demographics
+    population = safe_int(item.get("population"))
+    area = safe_float(item.get("area"))
+    population_density = calculate_population_density(population, area)
+
+    # Geography
+    latlng = item.get("latlng", [])
+    latitude = safe_float(latlng[0]) if len(latlng) > 0 else None
+    longitude = safe_float(latlng[1]) if len(latlng) > 1 else None
+    landlocked = item.get("landlocked", False)
+
+    # Economic indicators (Gini coefficient from REST Countries)
+    gini_data = item.get("gini", {})
+    gini_coefficient = None
+    if gini_data:
+        # Get the most recent Gini coefficient
+        years = sorted(gini_data.keys(), reverse=True)
+        if years:
+            gini_coefficient = safe_float(gini_data[years[0]])
+
+    # URLs for visual elements
+    flags = item.get("flags", {})
+    flag_url = flags.get("png") or flags.get("svg")
+
+    coat_of_arms = item.get("coatOfArms", {})
+    coat_of_arms_url = coat_of_arms.get("png") or coat_of_arms.get("svg")
+
+    # JSON fields
+    currencies = item.get("currencies", {})
+    timezones = item.get("timezones", [])
+    borders = item.get("borders", [])
+
+    # Communication
+    idd = item.get("idd", {})
+    calling_codes = []
+    if idd.get("root") and idd.get("suffixes"):
+        for suffix in idd.get("suffixes", []):
+            calling_codes.append(f"{idd['root']}{suffix}")
+
+    top_level_domains = item.get("tld", [])
+
+    return dict(
+        name=common_name,
+        official_name=official_name,
+        capital=capital,
+        region=region,
+        subregion=subregion,
+
+        iso_code_alpha2=iso_alpha2,
+        iso_code_alpha3=iso_alpha3,
+        iso_code_numeric=iso_numeric,
+
+        population=population,
+        area=area,
+        population_density=population_density,
+
+        gini_coefficient=gini_coefficient,
+
+        latitude=latitude,
+        longitude=longitude,
+        landlocked=landlocked,
+
+        flag_url=flag_url,
+        coat_of_arms_url=coat_of_arms_url,
+
+        currencies=currencies,
+        timezones=timezones,
+        calling_codes=calling_codes,
+        top_level_domains=top_level_domains,
+        borders=borders
+    )
+
+
+def fetch_rest_countries():
+    """All countries from the REST Countries API, or None if the request fails"""
     try:
-        # Delete in correct order to avoid foreign key constraints
-        db.query(CountryLanguage).delete()
-        db.query(Country).delete()
-        db.query(Continent).delete()
-        db.query(Language).delete()
-        db.commit()
-        print("Cleared existing data")
-    except Exception as e:
-        print(f"Error clearing data: {e}")
-        db.rollback()
+        print("Attempting to fetch from REST Countries API...")
+        with metrics.stage("fetch_countries"):
+            response = http_get(REST_COUNTRIES_API, timeout=30)
+        if response.status_code == 200:
+            countries_data = response.json()
+            print(f"✅ Retrieved data for {len(countries_data)} countries from API")
+            return countries_data or None
+        print(f"⚠️ API returned status {response.status_code}")
+    except Exception as api_error:
+        print(f"⚠️ API request failed: {api_error}")
+    return None
 
 def fetch_and_store_countries():
-    """Fetch comprehensive country data and store in database"""
-    db = SessionLocal()
+    """Fetch comprehensive country data and store in database.
+
+    All HTTP calls happen first and are checkpointed (see checkpoints.py), so
+    a restarted job only repeats the ones that never finished. The parsed
+    batch is then validated (see validation.py); hard failures stop the
+    ingest before anything is written. The wipe and load run as one
+    transaction, which also records what changed against the previous
+    dataset (see change_history.py).
+    """
+    init_db()
+    print("Starting comprehensive country data scraping...")
+    checkpoints = Checkpoints("countries")
+    
+    # Try to fetch data from REST Countries API
+    countries_data = checkpoints.run(REST_COUNTRIES_STEP, fetch_rest_countries)
+    
+    # Use sample data as fallback
+    if not countries_data:
+        print("🔄 Using sample data as fallback...")
+        from .sample_data import get_sample_countries_data
+        countries_data = get_sample_countries_data()
+        print(f"📊 Using {len(countries_data)} sample countries for development")
     
+    # Economic indicators: multi-year World Bank series, loaded in bulk below
+    from .indicators import (
+        LATEST_VALUE_COLUMNS, fetch_all_indicator_series, gini_series_from_rest_countries, keep_failed_series,
+        store_indicator_series
+    )
+    series_by_code = fetch_all_indicator_series(checkpoints)
+    # Country columns fed by an indicator that couldn't be fetched this run
+    unavailable_columns = [column for code, column in LATEST_VALUE_COLUMNS.items() if code not in series_by_code]
+    if checkpoints.resumed:
+        print(f"🔁 Reused {checkpoints.resumed} checkpointed fetch steps")
+    
+    # Parse every country, then check the batch as a whole before writing
+    parsed = []
+    for item in countries_data:
+        try:
+            country = parse_country(item)
+        except Exception as e:
+            print(f"Error processing country {safe_get(item, 'name', 'common', default='Unknown')}: {e}")
+            continue
+        if country is not None:
+            parsed.append((item, country))
+    
+    db = SessionLocal()
     try:
-        print("Starting comprehensive country data scraping...")
+        with metrics.stage("validate"):
+            report = validate_countries([fields for item, fields in parsed], previous_count=db.query(Country).count())
+        report.print()
+        if not report.ok:
+            # A rejected batch must not be replayed from its checkpoint next run
+            checkpoints.discard(REST_COUNTRIES_STEP)
+            raise ValidationError(report)
         
-        # Clear existing data
+        # The previous dataset's tracked fields, for the change history
+        with metrics.stage("diff"):
+            previous = load_tracked(db)
+        # Indicator values reference the countries about to be replaced
+        series_by_code = keep_failed_series(db, series_by_code)
         clear_existing_data(db)
         
-        # Try to fetch data from REST Countries API
-        countries_data = None
-        try:
-            print("Attempting to fetch from REST Countries API...")
-            response = requests.get(REST_COUNTRIES_API, timeout=30, headers={'User-Agent': 'Wiki-Visualizer/1.0'})
-            if response.status_code == 200:
-                countries_data = response.json()
-                print(f"✅ Retrieved data for {len(countries_data)} countries from API")
-            else:
-                print(f"⚠️ API returned status {response.status_code}")
-        except Exception as api_error:
-            print(f"⚠️ API request failed: {api_error}")
-        
-        # Use sample data as fallback
-        if not countries_data:
-            print("🔄 Using sample data as fallback...")
-            from .sample_data import get_sample_countries_data
-            countries_data = get_sample_countries_data()
-            print(f"📊 Using {len(countries_data)} sample countries for development")
-        
         continent_cache = {}
         language_cache = {}
+        currency_rows = []
+        timezone_rows = []
         processed_count = 0
         
-        for item in countries_data:
+        for item, fields in parsed:
             try:
-                # Extract name information
-                name_data = item.get("name", {})
-                common_name = safe_get(name_data, "common")
-                official_name = safe_get(name_data, "official")
-                
-                if not common_name:
-                    continue
-                
-                # Basic location info
-                capital_list = item.get("capital", [])
-                capital = capital_list[0] if capital_list else None
-                region = item.get("region")
-                subregion = item.get("subregion")
-                
-                # ISO codes
-                iso_alpha2 = item.get("cca2")
-                iso_alpha3 = item.get("cca3")
-                iso_numeric = item.get("ccn3")
-                
-                # Demographics
-                population = safe_int(item.get("population"))
-                area = safe_float(item.get("area"))
-                population_density = calculate_population_density(population, area)
-                
-                # Geography
-                latlng = item.get("latlng", [])
-                latitude = safe_float(latlng[0]) if len(latlng) > 0 else None
-                longitude = safe_float(latlng[1]) if len(latlng) > 1 else None
-                landlocked = item.get("landlocked", False)
-                
-                # Economic indicators (Gini coefficient from REST Countries)
-                gini_data = item.get("gini", {})
-                gini_coefficient = None
-                if gini_data:
-                    # Get the most recent Gini coefficient
-                    years = sorted(gini_data.keys(), reverse=True)
-                    if years:
-                        gini_coefficient = safe_float(gini_data[years[0]])
-                
-                # URLs for visual elements
-                flags = item.get("flags", {})
-                flag_url = flags.get("png") or flags.get("svg")
-                
-                coat_of_arms = item.get("coatOfArms", {})
-                coat_of_arms_url = coat_of_arms.get("png") or coat_of_arms.get("svg")
-                
-                # JSON fields
-                currencies = item.get("currencies", {})
-                timezones = item.get("timezones", [])
-                borders = item.get("borders", [])
-                
-                # Communication
-                idd = item.get("idd", {})
-                calling_codes = []
-                if idd.get("root") and idd.get("suffixes"):
-                    for suffix in idd.get("suffixes", []):
-                        calling_codes.append(f"{idd['root']}{suffix}")
-                
-                top_level_domains = item.get("tld", [])
-                
                 # Handle continent
+                region = fields["region"]
                 if region:
                     if region not in continent_cache:
                         continent = db.query(Continent).filter_by(name=region).first()
@@ -187,50 +258,15 @@ def fetch_and_store_countries():
                 else:
                     continent = None
                 
-                # Fetch economic data from World Bank (optional, can be slow)
-                gdp_total, gdp_per_capita = None, None
-                if iso_alpha2 and processed_count < 50:  # Limit API calls for performance
-                    gdp_total, gdp_per_capita = fetch_economic_data(iso_alpha2)
-                
                 # Create country record
-                country = Country(
-                    name=common_name,
-                    official_name=official_name,
-                    capital=capital,
-                    region=region,
-                    subregion=subregion,
-                    
-                    iso_code_alpha2=iso_alpha2,
-                    iso_code_alpha3=iso_alpha3,
-                    iso_code_numeric=iso_numeric,
-                    
-                    population=population,
-                    area=area,
-                    population_density=population_density,
-                    
-                    gdp_total=gdp_total,
-                    gdp_per_capita=gdp_per_capita,
-                    gini_coefficient=gini_coefficient,
-                    
-                    latitude=latitude,
-                    longitude=longitude,
-                    landlocked=landlocked,
-                    
-                    flag_url=flag_url,
-                    coat_of_arms_url=coat_of_arms_url,
-                    
-                    currencies=currencies,
-                    timezones=timezones,
-                    calling_codes=calling_codes,
-                    top_level_domains=top_level_domains,
-                    borders=borders,
-                    
-                    continent_id=continent.id if continent else None
-                )
+                country = Country(**fields, continent_id=continent.id if continent else None)
                 
                 db.add(country)
                 db.flush()  # Get the country ID
                 
+                currency_rows += currency_links(country.id, item)
+                timezone_rows += timezone_links(country.id, item)
+                
                 # Handle languages
                 languages_data = item.get("languages", {})
                 if isinstance(languages_data, dict):
@@ -256,12 +292,39 @@ def fetch_and_store_countries():
                     print(f"Processed {processed_count} countries...")
                     
             except Exception as e:
-                print(f"Error processing country {safe_get(item, 'name', 'common', default='Unknown')}: {e}")
+                print(f"Error processing country {fields['name']}: {e}")
                 continue
         
-        # Commit all changes
-        db.commit()
-        print(f"Successfully processed {processed_count} countries")
+        # Currencies and timezones as indexed link tables
+        db.flush()
+        with metrics.stage("store_reference"):
+            store_currencies_and_timezones(db, currency_rows, timezone_rows)
+        
+        # Indicator series also fill in each country's latest GDP and Gini values
+        series_by_code["SI.POV.GINI"] = (
+            gini_series_from_rest_countries(countries_data) + series_by_code.get("SI.POV.GINI", [])
+        )
+        with metrics.stage("store_indicators"):
+            store_indicator_series(db, series_by_code)
+            if unavailable_columns:
+                carry_forward(db, previous, unavailable_columns)
+        with metrics.stage("refresh_aggregates"):
+            refresh_aggregates(db)
+        
+        with metrics.stage("diff"):
+            changes = diff_countries(previous, load_tracked(db))
+        
+        # Commit all changes together with the new dataset version and its
+        # change history; the checkpoints go in the same commit since their
+        # data is now stored
+        checkpoints.clear(db)
+        with metrics.stage("commit"):
+            version = bump_dataset_version(db)
+            record_changes(db, changes, version)
+            db.commit()
+        publish_dataset_version(version)
+        print(f"Successfully processed {processed_count} countries (dataset version {version})")
+        return version
         
     except Exception as e:
         print(f"Critical error in country scraping: {e}")
@@ -0,0 +1,208 @@
+"""
+HTTP client shared by every scraper.
+
+``http_get`` goes through one ``ScraperClient``, which gives each upstream host:
+
+- a keep-alive connection pool (one ``requests.Session``),
+- a token bucket limiting requests per second. The rate adapts like TCP
+  congestion control: it creeps up towards the host's configured maximum
+  after every success and halves on a 429, so throughput settles just below
+  whatever the upstream tolerates,
+- a cap on concurrent requests,
+- retries with exponential backoff and full jitter on connection errors,
+  timeouts, truncated bodies, 429 and 5xx. A ``Retry-After`` header wins
+  over the backoff,
+- a circuit breaker. After ``BREAKER_FAILURES`` consecutive failed requests
+  (a request fails once its retries are used up) the host is skipped for
+  ``BREAKER_RESET_SECONDS`` (calls raise ``CircuitOpenError``), so a dead
+  upstream fails fast instead of stalling the scrape. After that, one trial
+  request decides whether it closes again.
+
+Every attempt is timed into the scraper HTTP histogram by host and status.
+"""
+
+import random
+import threading
+import time
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from app.services import metrics
+
+USER_AGENT = "Wiki-Visualizer/1.0"
+# Requests per second (upper bound for the adaptive rate), burst size and
+# concurrent requests per host
+HOST_POLICIES = {
+    "restcountries.com": {"rate": 5, "burst": 5, "concurrency": 2},
+    "api.worldbank.org": {"rate": 10, "burst": 10, "concurrency": 4},
+    "en.wikipedia.org": {"rate": 20, "burst": 20, "concurrency": 4},
+}
+DEFAULT_POLICY = {"rate": 5, "burst": 5, "concurrency": 2}
+DEFAULT_TIMEOUT = 30
+
+RETRIES = 4
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRY_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30
+BREAKER_FAILURES = 5
+BREAKER_RESET_SECONDS = 60
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a host whose circuit breaker is open"""
+
+class TokenBucket:
+    """Thread-safe token bucket whose rate can be lowered and raised at runtime"""
+
+    def __init__(self, rate, burst):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take a token, sleeping until one is available"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def throttled(self):
+        """Upstream said slow down: halve the rate"""
+        with self._lock:
+            self.rate = max(self.max_rate / 64, self.rate / 2)
+            self.tokens = min(self.tokens, 0)
+
+    def succeeded(self):
+        """Probe back up towards the configured rate"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+class CircuitBreaker:
+    """Opens after consecutive failures; lets one trial call through once the reset time has passed"""
+
+    def __init__(self, failures=BREAKER_FAILURES, reset_seconds=BREAKER_RESET_SECONDS):
+        self.max_failures = failures
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self._lock = threading.Lock()
+
+    def before_call(self, host):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.reset_seconds or self.trial_running:
+                raise CircuitOpenError(f"Circuit open for {host} after {self.failures} consecutive failures")
+            self.trial_running = True
+
+    def record(self, success):
+        with self._lock:
+            self.trial_running = False
+            if success:
+                self.failures = 0
+                self.opened_at = None
+            else:
+                self.failures += 1
+                if self.failures >= self.max_failures:
+                    self.opened_at = time.monotonic()
+
+class _Host:
+    def __init__(self, policy):
+        self.bucket = TokenBucket(policy["rate"], policy["burst"])
+        self.slots = threading.BoundedSemaphore(policy["concurrency"])
+        self.breaker = CircuitBreaker()
+
+def backoff_seconds(attempt, response=None):
+    """Delay before retry ``attempt`` (0-based): Retry-After if given, else full-jitter exponential"""
+    retry_after = response.headers.get("Retry-After") if response is not None and hasattr(response, "headers") else None
+    if retry_after and retry_after.strip().isdigit():
+        return min(float(retry_after), BACKOFF_MAX_SECONDS)
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+class ScraperClient:
+    """Rate-limited, retrying HTTP client with per-host pools, limits and circuit breakers"""
+
+    def __init__(self, policies=HOST_POLICIES, default_policy=DEFAULT_POLICY, retries=RETRIES):
+        self.policies = policies
+        self.default_policy = default_policy
+        self.retries = retries
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        # Enough pooled connections for every concurrent request to a host
+        pool_size = max(policy["concurrency"] for policy in [default_policy, *policies.values()])
+        adapter = HTTPAdapter(pool_connections=len(policies) + 1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.hosts = {}
+        self._lock = threading.Lock()
+
+    def host(self, name):
+        with self._lock:
+            if name not in self.hosts:
+                self.hosts[name] = _Host(self.policies.get(name, self.default_policy))
+            return self.hosts[name]
+
+    def get(self, url, timeout=DEFAULT_TIMEOUT, **kwargs):
+        """GET ``url``, retrying transient failures; returns the last response or raises the last error.
+
+        The circuit breaker sees the whole call, retries included, as one
+        success or failure.
+        """
+        name = urlparse(url).netloc
+        host = self.host(name)
+        host.breaker.before_call(name)
+        success = False
+        try:
+            for attempt in range(self.retries + 1):
+                response, error = None, None
+                with host.slots:
+                    host.bucket.acquire()
+                    start = time.perf_counter()
+                    try:
+                        response = self.session.get(url, timeout=timeout, **kwargs)
+                    except RETRY_ERRORS as e:
+                        error = e
+                    finally:
+                        status = response.status_code if response is not None else "error"
+                        metrics.observe_scraper_http(name, status, time.perf_counter() - start)
+
+                if response is not None and response.status_code == 429:
+                    # Throttling isn't an outage: slow down without tripping the breaker
+                    host.bucket.throttled()
+                    success = True
+                elif error is None and response.status_code not in RETRY_STATUSES:
+                    host.bucket.succeeded()
+                    success = True
+                    return response
+                else:
+                    success = False
+
+                if attempt == self.retries:
+                    break
+                delay = backoff_seconds(attempt, response)
+                print(f"⚠️ {name} returned {error or response.status_code}, retrying in {delay:.1f}s "
+                      f"({attempt + 1}/{self.retries})")
+                time.sleep(delay)
+
+            if error is not None:
+                raise error
+            return response
+        finally:
+            # Also on unexpected errors, so a half-open breaker's trial always ends
+            host.breaker.record(success)
+
+client = ScraperClient()
+
+def http_get(url, **kwargs):
+    """GET through the shared scraper client"""
+    return client.get(url, **kwargs)
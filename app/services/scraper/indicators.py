@@ -0,0 +1,202 @@
+"""
+Yearly country indicators from the World Bank, stored as a time series.
+
+Each indicator is fetched for every country and year in one paginated call
+(``country/all``) instead of one request per country, then bulk-inserted into
+``indicator_value`` keyed by (country, indicator, year). The latest value of
+each series is copied onto ``Country`` so single-snapshot charts keep working.
+An indicator whose fetch fails keeps its stored series (``keep_failed_series``).
+"""
+
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from sqlalchemy import update
+from app.models.dialects import bulk_insert, upsert
+from app.models.entities import Country, Indicator, IndicatorValue
+from app.services import metrics
+from .http_client import http_get
+
+WORLD_BANK_INDICATOR_API = (
+    "https://api.worldbank.org/v2/country/all/indicator/{code}"
+    "?format=json&date={start}:{end}&per_page={per_page}&page={page}"
+)
+START_YEAR = 1960
+PER_PAGE = 20000
+
+# World Bank code -> (name, unit)
+INDICATORS = {
+    "SP.POP.TOTL": ("Population, total", "people"),
+    "NY.GDP.MKTP.CD": ("GDP (current US$)", "USD"),
+    "NY.GDP.PCAP.CD": ("GDP per capita (current US$)", "USD"),
+    "SI.POV.GINI": ("Gini index", "index"),
+}
+
+# Country columns that hold the latest value of a series
+LATEST_VALUE_COLUMNS = {
+    "NY.GDP.MKTP.CD": "gdp_total",
+    "NY.GDP.PCAP.CD": "gdp_per_capita",
+    "SI.POV.GINI": "gini_coefficient",
+}
+
+def fetch_indicator_page(code, page, start_year, end_year):
+    """One page of an indicator as {"pages": total pages, "series": [(iso3, year, value)]}"""
+    from .countries import safe_float
+
+    url = WORLD_BANK_INDICATOR_API.format(code=code, start=start_year, end=end_year, per_page=PER_PAGE, page=page)
+    response = http_get(url, timeout=60)
+    if response.status_code != 200:
+        raise RuntimeError(f"World Bank API returned status {response.status_code} for {code}")
+    data = response.json()
+    if not isinstance(data, list) or len(data) < 2 or not data[1]:
+        # World Bank reports errors and empty results as a lone metadata element
+        return {"pages": 0, "series": []}
+    series = []
+    for item in data[1]:
+        iso3 = item.get("countryiso3code")
+        value = safe_float(item.get("value"))
+        year = item.get("date")
+        if iso3 and value is not None and year and str(year).isdigit():
+            series.append((iso3, int(year), value))
+    return {"pages": int(data[0].get("pages", 1)), "series": series}
+
+def fetch_indicator_series(code, start_year=START_YEAR, end_year=None, checkpoints=None):
+    """Fetch all countries' yearly values for one indicator as [(iso3, year, value)].
+
+    With ``checkpoints``, pages fetched by an earlier, unfinished run are reused.
+    """
+    end_year = end_year or datetime.now().year
+    series = []
+    page, pages = 1, 1
+    while page <= pages:
+        fetch = lambda: fetch_indicator_page(code, page, start_year, end_year)
+        if checkpoints is not None:
+            result = checkpoints.run(f"indicator:{code}:{start_year}-{end_year}:page:{page}", fetch)
+        else:
+            result = fetch()
+        # Pages can be all nulls (recent years come first), so only the page
+        # count says when the series ends
+        pages = result["pages"]
+        series += [tuple(row) for row in result["series"]]
+        page += 1
+    return series
+
+def fetch_all_indicator_series(checkpoints=None):
+    """Fetch every configured indicator; failed indicators are logged and skipped.
+
+    Indicators are fetched concurrently; the HTTP client caps how many
+    requests actually run against the World Bank at once.
+    """
+    def fetch(code):
+        try:
+            with metrics.stage(f"indicator:{code}"):
+                series = fetch_indicator_series(code, checkpoints=checkpoints)
+            print(f"✅ Retrieved {len(series)} values for indicator {code}")
+            return series
+        except Exception as e:
+            print(f"⚠️ Error fetching indicator {code}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=len(INDICATORS)) as pool:
+        # Each task runs in a copy of the caller's context to keep its metrics scope
+        futures = {code: pool.submit(contextvars.copy_context().run, fetch, code) for code in INDICATORS}
+    series_by_code = {code: future.result() for code, future in futures.items()}
+    return {code: series for code, series in series_by_code.items() if series is not None}
+
+def gini_series_from_rest_countries(countries_data):
+    """Gini values for every year REST Countries reports, as [(iso3, year, value)]"""
+    from .countries import safe_float
+
+    series = []
+    for item in countries_data:
+        iso3 = item.get("cca3")
+        for year, value in (item.get("gini") or {}).items():
+            value = safe_float(value)
+            if iso3 and value is not None and str(year).isdigit():
+                series.append((iso3, int(year), value))
+    return series
+
+def keep_failed_series(db, series_by_code):
+    """Add the stored values of indicators missing from ``series_by_code``, then release the stored rows.
+
+    Runs inside the ingest transaction before the country wipe. A failed
+    fetch shouldn't erase an indicator's history, but its rows point at
+    country ids that the reload replaces, so they are read back keyed by ISO
+    code and ``store_indicator_series`` writes them again with the new ids.
+    Returns the combined ``{code: [(iso3, year, value)]}``.
+    """
+    series_by_code = dict(series_by_code)
+    failed = [code for code in INDICATORS if code not in series_by_code]
+    if failed:
+        rows = (
+            db.query(Indicator.code, Country.iso_code_alpha3, IndicatorValue.year, IndicatorValue.value)
+            .join(Indicator, Indicator.id == IndicatorValue.indicator_id)
+            .join(Country, Country.id == IndicatorValue.country_id)
+            .filter(Indicator.code.in_(failed), Country.iso_code_alpha3.isnot(None))
+            .all()
+        )
+        for code, iso3, year, value in rows:
+            series_by_code.setdefault(code, []).append((iso3, year, value))
+        for code in failed:
+            if code in series_by_code:
+                print(f"↩️ Kept {len(series_by_code[code])} stored values for indicator {code} (fetch failed)")
+    db.query(IndicatorValue).delete()
+    return series_by_code
+
+def store_indicator_series(db, series_by_code):
+    """Bulk-insert indicator values and copy the latest ones onto Country.
+
+    Must run inside the ingest transaction after countries are flushed.
+    Returns the number of values stored.
+    """
+    country_ids = dict(
+        db.query(Country.iso_code_alpha3, Country.id).filter(Country.iso_code_alpha3.isnot(None)).all()
+    )
+
+    # Indicators outlive ingests; refresh names and units in place
+    upsert(db, Indicator, [
+        {"code": code, "name": name, "unit": unit} for code, (name, unit) in INDICATORS.items()
+    ], index_elements=["code"], update_columns=["name", "unit"])
+    indicator_ids = dict(db.query(Indicator.code, Indicator.id).all())
+
+    # Replace only the indicators given; the others keep their values
+    replaced = [indicator_ids[code] for code in series_by_code if code in indicator_ids]
+    db.query(IndicatorValue).filter(IndicatorValue.indicator_id.in_(replaced)).delete(synchronize_session=False)
+
+    stored = 0
+    latest = {}  # country_id -> {column: (year, value)}
+    for code, series in series_by_code.items():
+        indicator_id = indicator_ids.get(code)
+        if indicator_id is None:
+            continue
+        # Later entries win, so callers can append higher-priority sources last
+        values = {}
+        for iso3, year, value in series:
+            country_id = country_ids.get(iso3)
+            if country_id is not None:
+                values[(country_id, year)] = value
+
+        rows = [
+            {"country_id": country_id, "indicator_id": indicator_id, "year": year, "value": value}
+            for (country_id, year), value in values.items()
+        ]
+        bulk_insert(db, IndicatorValue, rows)
+        stored += len(rows)
+
+        column = LATEST_VALUE_COLUMNS.get(code)
+        if column:
+            for (country_id, year), value in values.items():
+                current = latest.setdefault(country_id, {}).get(column)
+                if current is None or year > current[0]:
+                    latest[country_id][column] = (year, value)
+
+    updates = [
+        dict({"id": country_id}, **{column: value for column, (year, value) in columns.items()})
+        for country_id, columns in latest.items()
+    ]
+    # Bulk UPDATE by primary key groups rows by their set of columns
+    if updates:
+        db.execute(update(Country), updates)
+
+    print(f"Stored {stored} indicator values for {len(country_ids)} countries")
+    return stored
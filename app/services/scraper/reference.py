@@ -0,0 +1,74 @@
+"""
+Currency and timezone reference tables.
+
+The REST Countries ``currencies`` and ``timezones`` fields are normalized into
+``currency``/``timezone`` rows and ``country_currency``/``country_timezone``
+link tables, so questions like "countries using EUR" or "countries at
+UTC+01:00" become indexed joins instead of JSON parsing. Links are collected
+while countries are processed and inserted in bulk before the ingest commit.
+"""
+
+import re
+from app.models.dialects import bulk_insert
+from app.models.entities import Currency, CountryCurrency, Timezone, CountryTimezone
+
+UTC_OFFSET = re.compile(r"^UTC(?:([+-])(\d{1,2}):?(\d{2})?)?$")
+
+def parse_utc_offset(name):
+    """Minutes east of UTC for names like ``UTC``, ``UTC+05:30`` or ``UTC-03:00``"""
+    match = UTC_OFFSET.match((name or "").strip())
+    if not match:
+        return None
+    sign, hours, minutes = match.groups()
+    if not sign:
+        return 0
+    offset = int(hours) * 60 + int(minutes or 0)
+    return -offset if sign == "-" else offset
+
+def currency_links(country_id, item):
+    """[(country_id, code, name, symbol)] for one REST Countries record"""
+    currencies = item.get("currencies") or {}
+    if not isinstance(currencies, dict):
+        return []
+    return [
+        (country_id, code, (info or {}).get("name"), (info or {}).get("symbol"))
+        for code, info in currencies.items() if code
+    ]
+
+def timezone_links(country_id, item):
+    """[(country_id, timezone name)] for one REST Countries record"""
+    return [(country_id, name) for name in item.get("timezones") or [] if name]
+
+def clear_reference_data(db):
+    db.query(CountryCurrency).delete()
+    db.query(CountryTimezone).delete()
+    db.query(Currency).delete()
+    db.query(Timezone).delete()
+
+def store_currencies_and_timezones(db, currencies, timezones):
+    """Bulk-insert reference rows and country links collected by currency_links/timezone_links.
+
+    Must run inside the ingest transaction after countries are flushed.
+    """
+    currency_info = {}
+    for _, code, name, symbol in currencies:
+        currency_info.setdefault(code, {"code": code, "name": name, "symbol": symbol})
+    bulk_insert(db, Currency, list(currency_info.values()))
+    currency_ids = dict(db.query(Currency.code, Currency.id).all())
+
+    timezone_names = sorted({name for _, name in timezones})
+    bulk_insert(db, Timezone, [
+        {"name": name, "utc_offset_minutes": parse_utc_offset(name)} for name in timezone_names
+    ])
+    timezone_ids = dict(db.query(Timezone.name, Timezone.id).all())
+
+    # Sets drop duplicate entries within one country's record
+    bulk_insert(db, CountryCurrency, [
+        {"country_id": country_id, "currency_id": currency_ids[code]}
+        for country_id, code in sorted({(country_id, code) for country_id, code, _, _ in currencies})
+    ])
+    bulk_insert(db, CountryTimezone, [
+        {"country_id": country_id, "timezone_id": timezone_ids[name]}
+        for country_id, name in sorted(set(timezones))
+    ])
+    print(f"Stored {len(currency_ids)} currencies and {len(timezone_ids)} timezones")
@@ -5,13 +5,18 @@ This populates the database with realistic sample data for development and testi
 
 import json
 from app.models.base import SessionLocal
-from app.models.entities import Country, Continent, Language, CountryLanguage
+from app.models.entities import Country, Continent, Language, CountryLanguage, IndicatorValue
+from app.services.versioning import bump_dataset_version, publish_dataset_version
+from app.services.aggregates import refresh_aggregates
+from .reference import clear_reference_data, currency_links, timezone_links, store_currencies_and_timezones
 
 def clear_existing_data(db):
     """Clear existing data to avoid duplicates"""
     try:
         # Delete in correct order to avoid foreign key constraints
         db.query(CountryLanguage).delete()
+        db.query(IndicatorValue).delete()
+        clear_reference_data(db)
         db.query(Country).delete()
         db.query(Continent).delete()
         db.query(Language).delete()
@@ -321,6 +326,8 @@ def populate_with_sample_data():
         
         continent_cache = {}
         language_cache = {}
+        currency_rows = []
+        timezone_rows = []
         processed_count = 0
         
         for item in sample_data:
@@ -434,6 +441,9 @@ def populate_with_sample_data():
                 db.add(country)
                 db.flush()
                 
+                currency_rows += currency_links(country.id, item)
+                timezone_rows += timezone_links(country.id, item)
+                
                 # Handle languages
                 languages_data = item.get("languages", {})
                 if isinstance(languages_data, dict):
@@ -461,8 +471,14 @@ def populate_with_sample_data():
                 print(f"❌ Error processing country {item.get('name', {}).get('common', 'Unknown')}: {e}")
                 continue
         
-        # Commit all changes
+        db.flush()
+        store_currencies_and_timezones(db, currency_rows, timezone_rows)
+        refresh_aggregates(db)
+        
+        # Commit all changes together with the new dataset version
+        version = bump_dataset_version(db)
         db.commit()
+        publish_dataset_version(version)
         print(f"🎉 Successfully populated database with {processed_count} countries!")
         
         # Print summary
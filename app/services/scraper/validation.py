@@ -0,0 +1,174 @@
+"""
+Quality checks over a parsed batch of countries, run before anything is written.
+
+The batch is turned into NumPy columns once and every check is a vectorized
+expression over them:
+
+- ranges: latitude, longitude, population, area, Gini (rows with latitude
+  out of range but a longitude that would fit are flagged as swapped),
+- duplicate ISO alpha-2 and alpha-3 codes,
+- null rates per column,
+- ``borders`` codes that don't match any country in the batch,
+- zero areas and implausible population densities,
+- a batch much smaller than the dataset it would replace.
+
+Out-of-range values, duplicate codes and columns that are mostly empty are
+errors: the ingest stops before it wipes anything and the previous dataset
+stays live. Everything else is a warning. Either way the report is printed
+and kept in ``last_report`` for the scrape status.
+"""
+
+import time
+
+# Column -> (min, max) of plausible values; values outside are errors
+RANGES = {
+    "latitude": (-90, 90),
+    "longitude": (-180, 180),
+    "population": (0, 2e10),
+    "area": (0, 2e7),  # Russia is 1.7e7 km²
+    "gini_coefficient": (0, 100),
+}
+NUMERIC_COLUMNS = ["latitude", "longitude", "population", "area", "gini_coefficient", "population_density"]
+# Column -> null rate above which a warning is reported
+NULL_RATE_WARNINGS = {
+    "iso_code_alpha2": 0.05,
+    "iso_code_alpha3": 0.05,
+    "region": 0.1,
+    "population": 0.1,
+    "area": 0.1,
+    "latitude": 0.1,
+    "longitude": 0.1,
+}
+# A column this empty means the upstream format changed
+NULL_RATE_ERROR = 0.5
+UNIQUE_COLUMNS = ["iso_code_alpha2", "iso_code_alpha3"]
+MAX_POPULATION_DENSITY = 50000  # people per km²; Macau is about 21000
+UNKNOWN_BORDER_RATE = 0.05
+MIN_BATCH_RATIO = 0.5
+EXAMPLES = 5
+
+last_report = None
+
+class ValidationError(RuntimeError):
+    """Raised when a batch has hard failures; carries the report"""
+
+    def __init__(self, report):
+        super().__init__(f"Validation failed: {'; '.join(report.errors)}")
+        self.report = report
+
+class ValidationReport:
+    def __init__(self, rows):
+        self.rows = rows
+        self.errors = []
+        self.warnings = []
+        self.null_rates = {}
+        self.seconds = 0.0
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def as_dict(self):
+        return {
+            "rows": self.rows,
+            "ok": self.ok,
+            "errors": self.errors,
+            "warnings": self.warnings,
+            "null_rates": self.null_rates,
+            "milliseconds": round(self.seconds * 1000, 3),
+        }
+
+    def print(self):
+        status = "✅ passed" if self.ok else "❌ failed"
+        print(f"Validation {status} for {self.rows} countries in {self.seconds * 1000:.1f}ms "
+              f"({len(self.errors)} errors, {len(self.warnings)} warnings)")
+        for error in self.errors:
+            print(f"   ❌ {error}")
+        for warning in self.warnings:
+            print(f"   ⚠️ {warning}")
+
+def _numeric(fields, name):
+    import numpy as np
+    return np.fromiter(
+        (np.nan if row[name] is None else row[name] for row in fields), dtype=float, count=len(fields)
+    )
+
+def _strings(fields, name):
+    import numpy as np
+    return np.array([row[name] or None for row in fields], dtype=object)
+
+def _examples(names, mask):
+    found = names[mask]
+    more = f" and {len(found) - EXAMPLES} more" if len(found) > EXAMPLES else ""
+    return ", ".join(str(name) for name in found[:EXAMPLES]) + more
+
+def validate_countries(fields, previous_count=0):
+    """Check parsed country rows (dicts of Country columns); returns a ValidationReport"""
+    global last_report
+    import numpy as np
+    start = time.perf_counter()
+    report = ValidationReport(len(fields))
+    if not fields:
+        report.errors.append("no countries parsed")
+        report.seconds = time.perf_counter() - start
+        last_report = report
+        return report
+
+    names = _strings(fields, "name")
+    numeric = {name: _numeric(fields, name) for name in NUMERIC_COLUMNS}
+    strings = {name: _strings(fields, name) for name in ["region", *UNIQUE_COLUMNS]}
+
+    # NaN compares false, so missing values never count as out of range
+    for name, (low, high) in RANGES.items():
+        values = numeric[name]
+        bad = (values < low) | (values > high)
+        if bad.any():
+            report.errors.append(f"{int(bad.sum())} rows with {name} outside [{low:g}, {high:g}]: {_examples(names, bad)}")
+    latitude, longitude = numeric["latitude"], numeric["longitude"]
+    swapped = (np.abs(latitude) > 90) & (np.abs(longitude) <= 90)
+    if swapped.any():
+        report.errors.append(f"{int(swapped.sum())} rows look like swapped latitude/longitude: {_examples(names, swapped)}")
+
+    for name in UNIQUE_COLUMNS:
+        codes = strings[name]
+        present = codes != None
+        values, counts = np.unique(codes[present].astype(str), return_counts=True)
+        duplicated = values[counts > 1]
+        if len(duplicated):
+            report.errors.append(f"duplicate {name}: {', '.join(duplicated[:EXAMPLES])}")
+
+    columns = {**numeric, **strings}
+    for name, threshold in NULL_RATE_WARNINGS.items():
+        values = columns[name]
+        missing = np.isnan(values) if values.dtype == float else values == None
+        rate = float(missing.mean())
+        report.null_rates[name] = round(rate, 4)
+        if rate > NULL_RATE_ERROR:
+            report.errors.append(f"{name} is missing for {rate:.0%} of countries")
+        elif rate > threshold:
+            report.warnings.append(f"{name} is missing for {rate:.0%} of countries")
+
+    zero_area = numeric["area"] == 0
+    if zero_area.any():
+        report.warnings.append(f"{int(zero_area.sum())} rows with zero area: {_examples(names, zero_area)}")
+    dense = numeric["population_density"] > MAX_POPULATION_DENSITY
+    if dense.any():
+        report.warnings.append(f"{int(dense.sum())} rows denser than {MAX_POPULATION_DENSITY} people/km²: {_examples(names, dense)}")
+
+    # Referential check: every border code should be a country in this batch
+    borders = [row["borders"] or [] for row in fields]
+    border_codes = np.array([code for codes in borders for code in codes], dtype=object)
+    if len(border_codes):
+        unknown = ~np.isin(border_codes.astype(str), strings["iso_code_alpha3"][strings["iso_code_alpha3"] != None].astype(str))
+        rate = float(unknown.mean())
+        if rate > UNKNOWN_BORDER_RATE:
+            report.warnings.append(
+                f"{rate:.0%} of border codes match no country: {', '.join(np.unique(border_codes[unknown].astype(str))[:EXAMPLES])}"
+            )
+
+    if previous_count and len(fields) < previous_count * MIN_BATCH_RATIO:
+        report.warnings.append(f"batch has {len(fields)} countries, the current dataset {previous_count}")
+
+    report.seconds = time.perf_counter() - start
+    last_report = report
+    return report
@@ -0,0 +1,22 @@
+"""
+Country summaries from Wikipedia's REST API, through the shared scraper client.
+"""
+
+from urllib.parse import quote
+from .http_client import http_get
+
+WIKIPEDIA_SUMMARY_API = "https://en.wikipedia.org/api/rest_v1/page/summary/{title}"
+SUMMARY_LENGTH = 500
+
+def get_country_summary(name: str):
+    """Fetch a short summary of a country from Wikipedia (None if there is no page)"""
+    response = http_get(WIKIPEDIA_SUMMARY_API.format(title=quote(name.replace(" ", "_"), safe="")), timeout=30)
+    if response.status_code == 404:
+        return None
+    if response.status_code != 200:
+        raise RuntimeError(f"Wikipedia API returned status {response.status_code} for {name}")
+    page = response.json()
+    return {
+        "title": page.get("title", name),
+        "summary": (page.get("extract") or "")[:SUMMARY_LENGTH]
+    }
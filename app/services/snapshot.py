@@ -0,0 +1,333 @@
+"""
+Immutable read-side snapshot of the country dataset.
+
+Chart routes used to materialize full ``Country`` ORM instances (identity map
+entry, instance state, ~30 attributes, decoded JSON columns) on every request.
+The snapshot instead loads the columns charts actually read once per dataset
+version, as a struct of NumPy arrays:
+
+- numeric columns are float64 with NaN for missing values,
+- low-cardinality strings (region, subregion, continent, and the language,
+  currency and timezone links) are dictionary-encoded: small integer codes
+  plus one interned copy of each distinct string,
+- many-to-many links are parallel ``(country row, category code)`` arrays,
+  so per-category aggregates are a ``np.bincount``.
+
+Rows are ordered by country id. Nothing in the snapshot is mutated after it
+is built, so it is shared by all requests at that version.
+
+The snapshot is written once per version as a bundle of ``.npy`` files next
+to the version's artifacts (``database/artifacts/v<version>/snapshot/``)
+and every process maps those files read-only. Array data then lives in the
+shared page cache, so extra web workers add no per-worker copy; only the
+category lists in ``meta.json`` are decoded per process. Names and ISO codes
+are stored as one UTF-8 buffer plus offsets and decoded for the rows a chart
+asks for.
+"""
+
+import json
+import os
+import shutil
+import sys
+import threading
+import numpy as np
+from sqlalchemy import select
+from app.models.base import SessionLocal
+from app.models.entities import (
+    Country, Continent, Language, CountryLanguage,
+    Currency, CountryCurrency, Timezone, CountryTimezone
+)
+from app.services import artifacts
+from app.services.versioning import VersionedCache, current_dataset_version
+
+BUNDLE_DIR = "snapshot"
+FORMAT_VERSION = 1
+FLOAT_COLUMNS = (
+    "population", "area", "population_density", "gdp_total", "gdp_per_capita", "gini", "latitude", "longitude"
+)
+STRING_COLUMNS = ("name", "iso3")
+CATEGORICAL_COLUMNS = ("region", "subregion", "continent")
+LINK_COLUMNS = ("languages", "currencies", "timezones")
+
+_snapshots = VersionedCache("snapshot")
+
+def _heap_bytes(array):
+    """Bytes of ``array`` held privately; memory-mapped arrays live in the shared page cache"""
+    return 0 if isinstance(array, np.memmap) else array.nbytes
+
+class Categorical:
+    """Dictionary-encoded strings: ``categories[codes[i]]``, code -1 for missing"""
+
+    __slots__ = ("codes", "categories")
+
+    def __init__(self, values, categories=None):
+        if categories is None:
+            categories = sorted({v for v in values if v is not None})
+        self.categories = np.array([sys.intern(c) for c in categories], dtype=object)
+        lookup = {c: i for i, c in enumerate(self.categories)}
+        dtype = np.int16 if len(self.categories) < 2 ** 15 else np.int32
+        self.codes = np.fromiter((lookup.get(v, -1) for v in values), dtype=dtype, count=len(values))
+
+    @classmethod
+    def from_codes(cls, codes, categories):
+        categorical = cls.__new__(cls)
+        categorical.codes = codes
+        categorical.categories = np.array([sys.intern(c) for c in categories], dtype=object)
+        return categorical
+
+    def __len__(self):
+        return len(self.codes)
+
+    def decode(self, rows=None, missing=None):
+        """Strings for ``rows`` (all rows by default) as an object array"""
+        codes = self.codes if rows is None else self.codes[rows]
+        if not len(self.categories):
+            return np.full(len(codes), missing, dtype=object)
+        return np.where(codes >= 0, self.categories[np.maximum(codes, 0)], missing)
+
+    def present(self):
+        return self.codes >= 0
+
+    def count(self, rows=None):
+        """Number of rows per category"""
+        codes = self.codes if rows is None else self.codes[rows]
+        return np.bincount(codes[codes >= 0], minlength=len(self.categories))
+
+    def sum(self, values, rows=None):
+        """Sum of ``values`` per category, NaN treated as 0"""
+        codes = self.codes if rows is None else self.codes[rows]
+        values = values if rows is None else values[rows]
+        keep = codes >= 0
+        return np.bincount(codes[keep], weights=np.nan_to_num(values[keep]), minlength=len(self.categories))
+
+    def nbytes(self):
+        return _heap_bytes(self.codes) + self.categories.nbytes + sum(sys.getsizeof(c) for c in self.categories)
+
+class Strings:
+    """Immutable strings as one UTF-8 buffer plus offsets; empty strings read back as None"""
+
+    __slots__ = ("offsets", "data")
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    @classmethod
+    def from_values(cls, values):
+        encoded = [(v or "").encode("utf-8") for v in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        return cls(offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, rows):
+        """Decoded strings for ``rows`` (indices, mask or slice) as an object array"""
+        rows = np.arange(len(self))[rows]
+        buffer = memoryview(self.data)
+        starts, ends = self.offsets[rows], self.offsets[rows + 1]
+        return np.array([
+            str(buffer[a:b], "utf-8") if b > a else None for a, b in zip(starts.tolist(), ends.tolist())
+        ], dtype=object)
+
+    def present(self):
+        return np.diff(self.offsets) > 0
+
+    def nbytes(self):
+        return _heap_bytes(self.offsets) + _heap_bytes(self.data)
+
+class Links:
+    """Many-to-many links from country rows to a categorical value"""
+
+    __slots__ = ("rows", "values")
+
+    def __init__(self, rows, values):
+        self.rows = rows
+        self.values = values
+
+    def __len__(self):
+        return len(self.rows)
+
+    def country_count(self):
+        """Countries per category"""
+        return self.values.count()
+
+    def sum(self, column):
+        """Sum of a per-country column over each category's countries"""
+        return self.values.sum(column[self.rows])
+
+    def nbytes(self):
+        return _heap_bytes(self.rows) + self.values.nbytes()
+
+class CountrySnapshot:
+    """Struct-of-arrays view of every country at one dataset version"""
+
+    __slots__ = (
+        "ids", "name", "iso3", "region", "subregion", "continent",
+        "population", "area", "population_density", "gdp_total", "gdp_per_capita", "gini",
+        "latitude", "longitude", "languages", "currencies", "currency_names", "timezones", "timezone_offsets"
+    )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def rows_for_ids(self, ids):
+        """Snapshot rows of country ids (ids must exist)"""
+        return np.searchsorted(self.ids, np.asarray(ids, dtype=np.int64))
+
+    def nbytes(self):
+        """Approximate private memory held by the snapshot, including string objects"""
+        total = 0
+        for slot in self.__slots__:
+            value = getattr(self, slot)
+            if isinstance(value, (Categorical, Links, Strings)):
+                total += value.nbytes()
+            elif isinstance(value, np.ndarray):
+                total += _heap_bytes(value)
+                if value.dtype == object:
+                    total += sum(sys.getsizeof(v) for v in value if v is not None)
+            else:
+                total += sys.getsizeof(value)
+        return total
+
+def _float_column(values):
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+def _links(db, link_table, link_column, target_table, target_column, snapshot, categories=None):
+    """Links of ``link_table`` resolved to ``target_column`` strings, in country row order"""
+    rows = db.execute(
+        select(link_table.country_id, target_column)
+        .join(target_table, getattr(link_table, link_column) == target_table.id)
+        .order_by(link_table.country_id)
+    ).all()
+    country_ids = np.array([r[0] for r in rows], dtype=np.int64)
+    positions = np.searchsorted(snapshot.ids, country_ids)
+    # Drop links to countries that are gone (ids not in the snapshot)
+    valid = (positions < len(snapshot.ids))
+    valid[valid] = snapshot.ids[positions[valid]] == country_ids[valid]
+    values = [r[1] for r, ok in zip(rows, valid) if ok]
+    return Links(positions[valid].astype(np.int32), Categorical(values, categories))
+
+def build_snapshot():
+    """Load the dataset into a new CountrySnapshot with a handful of column queries"""
+    db = SessionLocal()
+    try:
+        continents = dict(db.execute(select(Continent.id, Continent.name)).all())
+        rows = db.execute(
+            select(
+                Country.id, Country.name, Country.iso_code_alpha3, Country.region, Country.subregion,
+                Country.continent_id, Country.population, Country.area, Country.population_density,
+                Country.gdp_total, Country.gdp_per_capita, Country.gini_coefficient,
+                Country.latitude, Country.longitude
+            ).order_by(Country.id)
+        ).all()
+        columns = list(zip(*rows)) if rows else [()] * 14
+
+        snapshot = CountrySnapshot()
+        snapshot.ids = np.array(columns[0], dtype=np.int64)
+        snapshot.name = Strings.from_values(columns[1])
+        snapshot.iso3 = Strings.from_values(columns[2])
+        snapshot.region = Categorical(columns[3])
+        snapshot.subregion = Categorical(columns[4])
+        # Every continent is a category, even one without countries
+        snapshot.continent = Categorical(
+            [continents.get(cid) for cid in columns[5]],
+            categories=sorted(name for name in continents.values() if name)
+        )
+        snapshot.population = _float_column(columns[6])
+        snapshot.area = _float_column(columns[7])
+        density = _float_column(columns[8])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            derived = np.where(snapshot.area > 0, snapshot.population / snapshot.area, np.nan)
+        snapshot.population_density = np.where(np.isnan(density) | (density == 0), derived, density)
+        snapshot.gdp_total = _float_column(columns[9])
+        snapshot.gdp_per_capita = _float_column(columns[10])
+        snapshot.gini = _float_column(columns[11])
+        snapshot.latitude = _float_column(columns[12])
+        snapshot.longitude = _float_column(columns[13])
+
+        snapshot.languages = _links(db, CountryLanguage, "language_id", Language, Language.name, snapshot)
+        snapshot.currencies = _links(db, CountryCurrency, "currency_id", Currency, Currency.code, snapshot)
+        names = dict(db.execute(select(Currency.code, Currency.name)).all())
+        snapshot.currency_names = np.array([names.get(code) for code in snapshot.currencies.values.categories], dtype=object)
+        snapshot.timezones = _links(db, CountryTimezone, "timezone_id", Timezone, Timezone.name, snapshot)
+        offsets = dict(db.execute(select(Timezone.name, Timezone.utc_offset_minutes)).all())
+        snapshot.timezone_offsets = _float_column([offsets.get(name) for name in snapshot.timezones.values.categories])
+    finally:
+        db.close()
+    return snapshot
+
+def _bundle_path(version):
+    return artifacts.raw_artifact_path(version, BUNDLE_DIR)
+
+def store_snapshot(version, snapshot=None):
+    """Write ``snapshot`` (built from the database by default) as the bundle of ``version``"""
+    path = _bundle_path(version)
+    if os.path.exists(os.path.join(path, "meta.json")):
+        return path
+    if snapshot is None:
+        snapshot = build_snapshot()
+
+    arrays = {"ids": snapshot.ids, "timezone_offsets": snapshot.timezone_offsets}
+    meta = {"format": FORMAT_VERSION, "version": version, "countries": len(snapshot), "categories": {}}
+    for column in FLOAT_COLUMNS:
+        arrays[column] = getattr(snapshot, column)
+    for column in STRING_COLUMNS:
+        arrays[f"{column}.offsets"] = getattr(snapshot, column).offsets
+        arrays[f"{column}.data"] = getattr(snapshot, column).data
+    for column in CATEGORICAL_COLUMNS:
+        arrays[f"{column}.codes"] = getattr(snapshot, column).codes
+        meta["categories"][column] = getattr(snapshot, column).categories.tolist()
+    for column in LINK_COLUMNS:
+        links = getattr(snapshot, column)
+        arrays[f"{column}.rows"] = links.rows
+        arrays[f"{column}.codes"] = links.values.codes
+        meta["categories"][column] = links.values.categories.tolist()
+    meta["currency_names"] = snapshot.currency_names.tolist()
+
+    # Write into a private directory and rename it into place, so readers
+    # never see a partial bundle; the name is per process and thread so
+    # concurrent first requests after a version bump don't collide
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    os.makedirs(tmp_path, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_path, f"{name}.npy"), np.ascontiguousarray(array))
+    with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+        json.dump(meta, f)
+    try:
+        os.rename(tmp_path, path)
+    except OSError:
+        # Another process published the bundle first
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    return path
+
+def open_snapshot(path):
+    """CountrySnapshot whose arrays are read-only memory maps of the bundle at ``path``"""
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+
+    def array(name):
+        return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+    snapshot = CountrySnapshot()
+    snapshot.ids = array("ids")
+    for column in FLOAT_COLUMNS:
+        setattr(snapshot, column, array(column))
+    for column in STRING_COLUMNS:
+        setattr(snapshot, column, Strings(array(f"{column}.offsets"), array(f"{column}.data")))
+    for column in CATEGORICAL_COLUMNS:
+        setattr(snapshot, column, Categorical.from_codes(array(f"{column}.codes"), meta["categories"][column]))
+    for column in LINK_COLUMNS:
+        values = Categorical.from_codes(array(f"{column}.codes"), meta["categories"][column])
+        setattr(snapshot, column, Links(array(f"{column}.rows"), values))
+    snapshot.currency_names = np.array(meta["currency_names"], dtype=object)
+    snapshot.timezone_offsets = array("timezone_offsets")
+    return snapshot
+
+def load_snapshot():
+    """Snapshot at the current dataset version, mapped from its bundle (written on first use)"""
+    return _snapshots.get_or_create("countries", _map_or_build)
+
+def _map_or_build():
+    return open_snapshot(store_snapshot(current_dataset_version()))
@@ -0,0 +1,161 @@
+"""
+Spatial queries over country centroids.
+
+Centroids are stored as unit vectors on the sphere. Straight-line (chord)
+distance between unit vectors grows monotonically with great-circle
+distance, so a KD-tree over them answers nearest-neighbour and radius
+queries exactly. scipy's cKDTree is used when it is installed; otherwise a
+vectorized brute-force scan over the vectors does the same. Reported
+distances are haversine kilometres.
+
+The index is rebuilt once per dataset version. The pre-render stage also
+writes the all-pairs distance matrix as float32 ``.npy`` next to the version's
+artifacts, and readers memory-map it.
+"""
+
+import os
+import threading
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # scipy is optional, brute force is fast enough for a few thousand points
+    cKDTree = None
+
+from app.models.base import SessionLocal
+from app.models.entities import Country
+from app.services import artifacts
+from app.services.versioning import VersionedCache, current_dataset_version
+
+EARTH_RADIUS_KM = 6371.0088
+DISTANCE_MATRIX_FILE = "country_distances.npy"
+# Above this the float32 matrix would take more than ~100 MB
+MAX_MATRIX_COUNTRIES = 5000
+
+_indexes = VersionedCache("centroid_index")
+
+def unit_vectors(lat, lon):
+    """(n, 3) unit vectors for latitudes and longitudes in degrees"""
+    lat, lon = np.radians(lat), np.radians(lon)
+    cos_lat = np.cos(lat)
+    return np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)])
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km; arguments in degrees and broadcast against each other"""
+    lat1, lon1, lat2, lon2 = (np.radians(v) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+def chord_for_km(radius_km):
+    """Unit-sphere chord length spanning ``radius_km`` along the surface"""
+    return 2 * np.sin(min(radius_km / EARTH_RADIUS_KM, np.pi) / 2)
+
+class CentroidIndex:
+    """Countries with coordinates, in country-id order, plus a KD-tree over their unit vectors"""
+
+    def __init__(self, ids, names, iso3, lat, lon):
+        self.ids = ids
+        self.names = names
+        self.iso3 = iso3
+        self.lat = lat
+        self.lon = lon
+        self.vectors = unit_vectors(lat, lon)
+        self.tree = cKDTree(self.vectors) if cKDTree is not None and len(ids) else None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def nearest(self, lat, lon, k):
+        """Row indices and km distances of the ``k`` closest countries, nearest first"""
+        k = min(k, len(self))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        query = unit_vectors(lat, lon)[0]
+        if self.tree is not None:
+            _, rows = self.tree.query(query, k=k)
+            rows = np.atleast_1d(rows)
+        else:
+            # Largest dot product is the smallest chord
+            dots = self.vectors @ query
+            rows = np.argpartition(-dots, k - 1)[:k]
+        distances = haversine_km(lat, lon, self.lat[rows], self.lon[rows])
+        order = np.argsort(distances, kind="stable")
+        return rows[order], distances[order]
+
+    def within(self, lat, lon, radius_km, limit=None):
+        """Row indices and km distances of countries within ``radius_km``, nearest first"""
+        if not len(self):
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        query = unit_vectors(lat, lon)[0]
+        chord = chord_for_km(radius_km)
+        if self.tree is not None:
+            rows = np.asarray(self.tree.query_ball_point(query, chord), dtype=np.int64)
+        else:
+            rows = np.flatnonzero(np.linalg.norm(self.vectors - query, axis=1) <= chord)
+        distances = haversine_km(lat, lon, self.lat[rows], self.lon[rows])
+        # The chord test can admit points a rounding error beyond the radius
+        inside = distances <= radius_km
+        rows, distances = rows[inside], distances[inside]
+        order = np.argsort(distances, kind="stable")[:limit]
+        return rows[order], distances[order]
+
+    def distance_matrix(self):
+        """All-pairs haversine distances as float32, computed in row blocks"""
+        n = len(self)
+        matrix = np.empty((n, n), dtype=np.float32)
+        block = 512
+        for start in range(0, n, block):
+            stop = min(start + block, n)
+            matrix[start:stop] = haversine_km(
+                self.lat[start:stop, None], self.lon[start:stop, None], self.lat[None, :], self.lon[None, :]
+            )
+        return matrix
+
+def load_centroid_index():
+    """Index over countries with coordinates at the current dataset version"""
+    return _indexes.get_or_create("countries", _build_index)
+
+def _build_index():
+    db = SessionLocal()
+    try:
+        rows = db.query(Country.id, Country.name, Country.iso_code_alpha3, Country.latitude, Country.longitude).filter(
+            Country.latitude.isnot(None),
+            Country.longitude.isnot(None)
+        ).order_by(Country.id).all()
+    finally:
+        db.close()
+
+    columns = list(zip(*rows)) or [(), (), (), (), ()]
+    return CentroidIndex(
+        ids=np.array(columns[0], dtype=np.int64),
+        names=np.array(columns[1], dtype=object),
+        iso3=np.array(columns[2], dtype=object),
+        lat=np.array(columns[3], dtype=float),
+        lon=np.array(columns[4], dtype=float),
+    )
+
+def store_distance_matrix(version):
+    """Write the all-pairs distance matrix for ``version``; returns its path, or None if too large"""
+    index = load_centroid_index()
+    if len(index) > MAX_MATRIX_COUNTRIES:
+        print(f"Skipping distance matrix: {len(index)} countries exceeds {MAX_MATRIX_COUNTRIES}")
+        return None
+    path = artifacts.raw_artifact_path(version, DISTANCE_MATRIX_FILE)
+    # Per process and thread: concurrent builders must never share a file,
+    # or one could publish the matrix while another is still writing it
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, index.distance_matrix())
+    os.replace(tmp_path, path)
+    return path
+
+def load_distance_matrix():
+    """Memory-mapped float32 distance matrix at the current version, rows in index order (None if too large)"""
+    return _indexes.get_or_create("distances", _open_distance_matrix)
+
+def _open_distance_matrix():
+    version = current_dataset_version()
+    path = artifacts.raw_artifact_path(version, DISTANCE_MATRIX_FILE)
+    if not os.path.exists(path) and store_distance_matrix(version) is None:
+        return None
+    return np.load(path, mmap_mode="r")
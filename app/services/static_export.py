@@ -0,0 +1,168 @@
+"""
+Static copy of the site's read-only pages, for a CDN or any plain file server.
+
+``export_static`` writes the current dataset version as::
+
+    index.html                              home page
+    visualize/index.html                    chart categories
+    visualize/countries/index.html
+    visualize/organizations/index.html
+    changes/index.html                      changes dashboard (unfiltered)
+    <chart rule>/index.html                 every registered chart
+    visualize/charts/<name>.json            figure JSON
+    visualize/frames/<version>/<code>/...   animation frames
+    visualize/geometry/<zoom>.geojson       local map shapes, if bundled
+    assets/plotly-<hash>.min.js             shared by every chart page
+    manifest.json
+
+Chart pages load plotly.js from the content-hashed asset instead of inlining
+it, so browsers fetch it once for the whole site and can cache it forever.
+Every file gets ``.gz`` and ``.br`` (with the optional brotli package)
+siblings for servers that serve precompressed files (nginx gzip_static and
+brotli_static, Caddy's precompressed, most CDNs).
+
+Charts render in parallel on a process pool while the other pages are
+written. The export is built next to ``directory`` and swapped in when
+complete, so a server never sees a half-written site. Setting
+``WIKI_STATIC_EXPORT_DIR`` re-exports after every scrape.
+
+Pages are rendered with ``STATIC_EXPORT`` set in the app config, so templates
+leave out what needs the app: the scrape button, and the change filters and
+JSON link. Zooming into binned scatter charts for detail needs the app too;
+static copies keep the overview.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import as_completed
+from datetime import datetime
+from app.services import artifacts
+from app.services.versioning import current_dataset_version
+
+EXPORT_DIR = os.environ.get("WIKI_STATIC_EXPORT_DIR")
+STATIC_PAGES = ["/", "/visualize", "/visualize/countries", "/visualize/organizations", "/changes"]
+ASSET_DIR = "assets"
+MANIFEST_FILE = "manifest.json"
+SUFFIXES = {"gzip": "gz", "br": "br"}
+
+def page_path(rule):
+    """File serving ``rule`` on a static server: the directory's index.html"""
+    return "/".join([*rule.strip("/").split("/"), "index.html"]).lstrip("/")
+
+def write_file(root, relative_path, data):
+    """Write ``data`` plus its precompressed siblings; returns ``relative_path``"""
+    path = os.path.join(root, *relative_path.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    for encoding, compressed in artifacts.compressed_variants(data, best=True):
+        with open(f"{path}.{SUFFIXES[encoding]}", "wb") as f:
+            f.write(compressed)
+    return relative_path
+
+def write_plotly_asset(root):
+    """Write plotly.js under a content-hashed name; returns its URL"""
+    from plotly.offline import get_plotlyjs
+    data = get_plotlyjs().encode("utf-8")
+    return "/" + write_file(root, f"{ASSET_DIR}/plotly-{hashlib.sha256(data).hexdigest()[:16]}.min.js", data)
+
+def _export_chart_batch(names, root, plotlyjs):
+    """Worker entry point: render a batch of charts into the export"""
+    from app.routes.visualize import CHART_REGISTRY, render_charts
+    written = []
+    for name, page in render_charts(names, plotlyjs).items():
+        written.append(write_file(root, page_path(CHART_REGISTRY[name].rule), page["html"].encode("utf-8")))
+        if page["figure"] is not None:
+            written.append(write_file(root, f"visualize/charts/{name}.json", page["figure"].encode("utf-8")))
+    return written
+
+def _export_url(client, root, url, relative_path):
+    """Write what the app serves at ``url``; returns the path, or None if it isn't there"""
+    response = client.get(url)
+    if response.status_code != 200:
+        return None
+    return write_file(root, relative_path, response.get_data())
+
+def _export_pages(client, root):
+    return [_export_url(client, root, url, page_path(url)) for url in STATIC_PAGES]
+
+def _export_frames(client, root, version):
+    """Frame sets the frame player streams, for every indicator with data"""
+    from app.services.scraper.indicators import INDICATORS
+    written = []
+    for code in INDICATORS:
+        base = f"visualize/frames/{version}/{code}"
+        meta = _export_url(client, root, f"/{base}/meta.json", f"{base}/meta.json")
+        if meta is None:
+            continue
+        written.append(meta)
+        with open(os.path.join(root, *base.split("/"), "meta.json")) as f:
+            chunks = json.load(f)["chunks"]
+        written += [_export_url(client, root, f"/{base}/{chunk}.bin", f"{base}/{chunk}.bin") for chunk in range(chunks)]
+    return written
+
+def _export_geometry(client, root):
+    from app.services import geometry
+    if not geometry.geometry_available():
+        return []
+    return [
+        _export_url(client, root, geometry.GEOMETRY_URL.format(zoom=zoom), geometry.GEOMETRY_URL.format(zoom=zoom).lstrip("/"))
+        for zoom in range(geometry.ZOOM_LEVELS)
+    ]
+
+def _publish(build_dir, directory):
+    """Swap the finished export in place of the previous one"""
+    old_dir = f"{directory}.old-{os.getpid()}"
+    if os.path.exists(directory):
+        os.replace(directory, old_dir)
+    os.replace(build_dir, directory)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+def export_static(directory, version=None, max_workers=None):
+    """Write the static site for the current dataset version to ``directory``; returns the manifest"""
+    from app import create_app
+    from app.routes.visualize import CHART_REGISTRY
+    from app.models.base import IN_MEMORY
+    from app.services.prerender import chart_batches, worker_pool
+
+    if version is None:
+        version = current_dataset_version()
+    directory = os.path.abspath(directory)
+    build_dir = f"{directory}.tmp-{os.getpid()}"
+    shutil.rmtree(build_dir, ignore_errors=True)
+    os.makedirs(build_dir)
+    workers = 1 if IN_MEMORY else max_workers or max(1, min(len(CHART_REGISTRY), os.cpu_count() or 1))
+
+    try:
+        plotlyjs = write_plotly_asset(build_dir)
+        files = [plotlyjs.lstrip("/")]
+        with worker_pool(workers) as pool:
+            futures = [
+                pool.submit(_export_chart_batch, batch, build_dir, plotlyjs)
+                for batch in chart_batches(CHART_REGISTRY, workers)
+            ]
+            # The other pages and data files are fetched meanwhile
+            app = create_app()
+            app.config["STATIC_EXPORT"] = True
+            client = app.test_client()
+            files += _export_pages(client, build_dir)
+            files += _export_frames(client, build_dir, version)
+            files += _export_geometry(client, build_dir)
+            for future in as_completed(futures):
+                files += future.result()
+
+        manifest = {
+            "dataset_version": version,
+            "exported_at": datetime.now().isoformat(timespec="seconds"),
+            "plotlyjs": plotlyjs,
+            "files": sorted(path for path in files if path is not None)
+        }
+        with open(os.path.join(build_dir, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f, indent=2)
+        _publish(build_dir, directory)
+    except Exception:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+    return manifest
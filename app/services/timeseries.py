@@ -0,0 +1,97 @@
+"""
+Columnar read cache for indicator time series.
+
+An indicator is loaded with one indexed query into a dense
+countries x years float64 matrix (NaN where there is no value) and cached until
+the dataset version changes. Year-range and latest-value reads are then NumPy
+slices, independent of how many decades or indicators are stored.
+"""
+
+import numpy as np
+from sqlalchemy import select
+from app.models.base import SessionLocal
+from app.models.entities import Country, Indicator, IndicatorValue
+from app.services.versioning import VersionedCache
+
+_matrices = VersionedCache("indicator_matrices")
+
+class IndicatorMatrix:
+    """Dense matrix of one indicator: ``values[country_index, year_index]``"""
+
+    __slots__ = ("code", "name", "years", "country_ids", "iso3", "names", "regions", "values")
+
+    def __init__(self, code, name, years, country_ids, iso3, names, regions, values):
+        self.code = code
+        self.name = name
+        self.years = years
+        self.country_ids = country_ids
+        self.iso3 = iso3
+        self.names = names
+        self.regions = regions
+        self.values = values
+
+    def year_range(self, start=None, end=None):
+        """(years, values) restricted to ``start <= year <= end``; the values are a view"""
+        lo = 0 if start is None else int(np.searchsorted(self.years, start, side="left"))
+        hi = len(self.years) if end is None else int(np.searchsorted(self.years, end, side="right"))
+        return self.years[lo:hi], self.values[:, lo:hi]
+
+    def latest(self):
+        """(latest year, value) per country; year is -1 and value NaN where there is none"""
+        present = ~np.isnan(self.values)
+        # Index of the last present column in each row
+        last = self.values.shape[1] - 1 - np.argmax(present[:, ::-1], axis=1)
+        has_any = present.any(axis=1)
+        years = np.where(has_any, self.years[last], -1)
+        values = np.where(has_any, self.values[np.arange(len(last)), last], np.nan)
+        return years, values
+
+    def top_per_year(self, n):
+        """Row indices of the ``n`` largest values in every year, as an (n, years) array"""
+        ranked = np.where(np.isnan(self.values), -np.inf, self.values)
+        order = np.argsort(-ranked, axis=0, kind="stable")
+        return order[:n]
+
+def load_indicator_matrix(code):
+    """Matrix for indicator ``code`` at the current dataset version (None if no data)"""
+    return _matrices.get_or_create(code, lambda: _build_matrix(code))
+
+def _build_matrix(code):
+    db = SessionLocal()
+    try:
+        indicator = db.execute(select(Indicator.id, Indicator.name).where(Indicator.code == code)).first()
+        if indicator is None:
+            return None
+        rows = db.execute(
+            select(IndicatorValue.country_id, IndicatorValue.year, IndicatorValue.value)
+            .where(IndicatorValue.indicator_id == indicator.id)
+        ).all()
+        if not rows:
+            return None
+        countries = {
+            row.id: row for row in db.execute(
+                select(Country.id, Country.iso_code_alpha3, Country.name, Country.region)
+            )
+        }
+    finally:
+        db.close()
+
+    country_col, year_col, value_col = (np.array(column) for column in zip(*rows))
+    country_ids, country_index = np.unique(country_col.astype(np.int64), return_inverse=True)
+    first_year, last_year = int(year_col.min()), int(year_col.max())
+    years = np.arange(first_year, last_year + 1, dtype=np.int16)
+
+    values = np.full((len(country_ids), len(years)), np.nan)
+    values[country_index, year_col.astype(np.int64) - first_year] = value_col.astype(np.float64)
+
+    info = [countries.get(int(cid)) for cid in country_ids]
+    return IndicatorMatrix(
+        code=code,
+        name=indicator.name,
+        years=years,
+        country_ids=country_ids,
+        iso3=np.array([c.iso_code_alpha3 if c else None for c in info], dtype=object),
+        names=np.array([c.name if c else None for c in info], dtype=object),
+        regions=np.array([(c.region if c else None) or "Unknown" for c in info], dtype=object),
+        values=values,
+    )
@@ -0,0 +1,180 @@
+"""
+Dataset version tracking shared by every process.
+
+The authoritative version lives in the single-row ``dataset_version`` table and
+is bumped inside the same transaction that commits an ingest. After the commit
+the new number is also written to a small marker file next to the database, so
+web workers can notice a change with a single ``os.stat`` call instead of a
+query per request. In-process caches subscribe to changes (or use
+``VersionedCache``) and are emptied exactly when the version moves.
+"""
+
+import os
+import threading
+from datetime import datetime
+from app.models.base import SessionLocal, DATABASE_DIR
+from app.models.entities import DatasetVersion
+
+VERSION_FILE = os.path.join(DATABASE_DIR, "dataset.version")
+
+_lock = threading.Lock()
+_marker_stat = None
+_current_version = None
+_subscribers = []
+
+def _read_marker():
+    """Read the version number stored in the marker file (None if unavailable)"""
+    try:
+        with open(VERSION_FILE) as f:
+            return int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return None
+
+def read_dataset_version(db=None):
+    """Read the committed dataset version from the database"""
+    own_session = db is None
+    if own_session:
+        db = SessionLocal()
+    try:
+        row = db.get(DatasetVersion, 1)
+        return row.version if row else 0
+    finally:
+        if own_session:
+            db.close()
+
+def bump_dataset_version(db):
+    """Increment the dataset version inside the caller's transaction.
+
+    The new value only becomes visible when the caller commits, so readers
+    never see a version whose data is not there yet. Call
+    ``publish_dataset_version`` after the commit to notify other processes.
+    """
+    row = db.query(DatasetVersion).filter_by(id=1).with_for_update().first()
+    if row is None:
+        row = DatasetVersion(id=1, version=0)
+        db.add(row)
+    # Never hand out a number lower than one already published, even if the
+    # database file was recreated, so version-keyed artifacts are never reused
+    row.version = max(row.version or 0, _read_marker() or 0) + 1
+    row.updated_at = datetime.now()
+    db.flush()
+    return row.version
+
+def publish_dataset_version(version):
+    """Write the marker file atomically so other processes pick up the change"""
+    tmp_path = f"{VERSION_FILE}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(str(version))
+    os.replace(tmp_path, VERSION_FILE)
+    current_dataset_version()
+
+def reset_dataset_version():
+    """Publish a new version for a recreated (empty) database; returns it.
+
+    Stored artifacts were built from the old data, so they are deleted
+    first: no worker may serve them as current or stale. The version
+    moves past the marker, so workers polling it drop their caches.
+    """
+    from app.services.artifacts import clear_artifacts
+    clear_artifacts()
+    db = SessionLocal()
+    try:
+        version = bump_dataset_version(db)
+        db.commit()
+    finally:
+        db.close()
+    publish_dataset_version(version)
+    return version
+
+def current_dataset_version():
+    """Return the current dataset version, notifying subscribers when it changed.
+
+    Costs one ``os.stat`` on the marker file per call; the database is only
+    consulted when the marker is missing.
+    """
+    global _marker_stat, _current_version
+
+    try:
+        st = os.stat(VERSION_FILE)
+        marker_stat = (st.st_mtime_ns, st.st_size, st.st_ino)
+    except OSError:
+        marker_stat = None
+
+    with _lock:
+        if marker_stat is not None and marker_stat == _marker_stat:
+            return _current_version
+
+        version = _read_marker() if marker_stat is not None else None
+        if version is None:
+            try:
+                version = read_dataset_version()
+            except Exception as e:
+                print(f"Error reading dataset version: {e}")
+                version = 0
+
+        previous = _current_version
+        _marker_stat = marker_stat
+        _current_version = version
+        callbacks = list(_subscribers) if previous is not None and previous != version else []
+
+    for callback in callbacks:
+        try:
+            callback(version)
+        except Exception as e:
+            print(f"Error in dataset version subscriber: {e}")
+
+    return version
+
+def subscribe(callback):
+    """Register ``callback(new_version)`` to run when the dataset version changes"""
+    with _lock:
+        _subscribers.append(callback)
+    return callback
+
+class VersionedCache:
+    """In-process cache that empties itself when the dataset version changes"""
+
+    def __init__(self, name):
+        self.name = name
+        self._data = {}
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _sync(self):
+        version = current_dataset_version()
+        if version != self._version:
+            self._data.clear()
+            self._version = version
+        return version
+
+    @property
+    def version(self):
+        with self._lock:
+            return self._sync()
+
+    def get(self, key, default=None):
+        with self._lock:
+            self._sync()
+            return self._data.get(key, default)
+
+    def set(self, key, value):
+        with self._lock:
+            self._sync()
+            self._data[key] = value
+
+    def get_or_create(self, key, factory):
+        """Return the cached value for ``key``, building it with ``factory()`` on a miss"""
+        with self._lock:
+            version = self._sync()
+            if key in self._data:
+                return self._data[key]
+        value = factory()
+        with self._lock:
+            # Only keep the value if no new dataset arrived while building it
+            if self._sync() == version:
+                self._data[key] = value
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
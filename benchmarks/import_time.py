@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Cold-start import benchmark for the Flask app.
+
+Runs ``python -X importtime`` on ``create_app()`` in fresh interpreters, takes
+the median cumulative import time and wall-clock startup, and compares them
+with the stored baseline. Exits non-zero on a regression or when a module that
+must load lazily (pandas, Plotly) is imported at startup.
+
+Usage:
+    python benchmarks/import_time.py                    # check against baseline
+    python benchmarks/import_time.py --update-baseline  # record a new baseline
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+BASELINE_FILE = Path(__file__).resolve().parent / "import_time_baseline.json"
+
+# Modules that must not be imported by create_app() itself
+LAZY_MODULES = ["pandas", "plotly", "numpy"]
+
+CHILD_CODE = """
+import time
+start = time.perf_counter()
+from app import create_app
+create_app()
+print("STARTUP_SECONDS=%f" % (time.perf_counter() - start))
+"""
+
+def measure_once():
+    """Start one interpreter and return (import_us, startup_s, imported module names)"""
+    env = dict(os.environ)
+    env.pop("WIKI_PRELOAD_CHARTS", None)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD_CODE],
+        cwd=project_root, env=env, capture_output=True, text=True, check=True
+    )
+
+    import_us = 0
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        modules.add(name.strip())
+        # Top-level imports have no extra indentation; nested ones are
+        # already included in their parent's cumulative time
+        if name.startswith(" ") and not name.startswith("  "):
+            import_us += int(cumulative)
+
+    startup = None
+    for line in result.stdout.splitlines():
+        if line.startswith("STARTUP_SECONDS="):
+            startup = float(line.split("=", 1)[1])
+    return import_us, startup, modules
+
+def run_benchmark(runs):
+    measure_once()  # warm the bytecode cache so every run measures the same thing
+    import_times, startups, modules = [], [], set()
+    for _ in range(runs):
+        import_us, startup, imported = measure_once()
+        import_times.append(import_us)
+        startups.append(startup)
+        modules |= imported
+    return {
+        "runs": runs,
+        "import_us_median": statistics.median(import_times),
+        "startup_seconds_median": statistics.median(startups),
+        "lazy_modules_loaded": sorted(m for m in modules if m in LAZY_MODULES),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark create_app() cold start")
+    parser.add_argument("--runs", type=int, default=5, help="interpreters to start (default: 5)")
+    parser.add_argument("--tolerance", type=float, default=None,
+                        help="allowed slowdown factor over baseline (default: from baseline file)")
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the new baseline")
+    args = parser.parse_args()
+
+    print("⏱️  Measuring create_app() cold start...")
+    results = run_benchmark(args.runs)
+    print(f"   Import time (median):  {results['import_us_median'] / 1000:.1f} ms")
+    print(f"   Startup time (median): {results['startup_seconds_median'] * 1000:.1f} ms")
+
+    failed = False
+    if results["lazy_modules_loaded"]:
+        print(f"   ❌ Heavy modules imported at startup: {', '.join(results['lazy_modules_loaded'])}")
+        failed = True
+
+    if args.update_baseline:
+        baseline = {
+            "import_us_median": results["import_us_median"],
+            "startup_seconds_median": results["startup_seconds_median"],
+            "tolerance": args.tolerance or 1.5,
+        }
+        BASELINE_FILE.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"   📝 Baseline written to {BASELINE_FILE}")
+    elif BASELINE_FILE.exists():
+        baseline = json.loads(BASELINE_FILE.read_text())
+        tolerance = args.tolerance or baseline.get("tolerance", 1.5)
+        limit = baseline["import_us_median"] * tolerance
+        if results["import_us_median"] > limit:
+            print(f"   ❌ Import time regressed: {results['import_us_median'] / 1000:.1f} ms "
+                  f"> {limit / 1000:.1f} ms allowed ({tolerance}x baseline)")
+            failed = True
+        else:
+            print(f"   ✅ Within {tolerance}x of baseline ({baseline['import_us_median'] / 1000:.1f} ms)")
+    else:
+        print("   ⚠️ No baseline recorded yet, run with --update-baseline")
+
+    return not failed
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
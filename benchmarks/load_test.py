@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Load-test and benchmark suite for ingest, queries and chart rendering.
+
+For each dataset size a fresh interpreter gets its own throwaway database
+directory and then:
+  1. generates a synthetic REST Countries dataset (see synthetic.py),
+  2. times fetch_and_store_countries() end to end with HTTP stubbed out,
+  3. requests every /visualize/* route through the Flask test client,
+     recording the cold (first) latency, warm latency percentiles and
+     response bytes,
+  4. reports peak RSS.
+
+Results are written as JSON to benchmarks/results/ so runs can be compared.
+
+Usage:
+    python benchmarks/load_test.py                          # 250, 10k and 100k countries
+    python benchmarks/load_test.py --sizes 250 --requests 50
+    python benchmarks/load_test.py --compare benchmarks/results/<older>.json
+    python benchmarks/load_test.py --database-url sqlite://    # in-memory SQLite
+    python benchmarks/load_test.py --database-url postgresql+psycopg://localhost/wiki_bench
+
+``--database-url`` runs the same suite against another backend (see
+WIKI_DATABASE_URL in app/models/base.py). Server databases are reused
+between sizes, since every ingest replaces the dataset.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+DEFAULT_SIZES = [250, 10_000, 100_000]
+
+def percentile(values, pct):
+    """Linear-interpolated percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+class StubResponse:
+    """Minimal stand-in for requests.Response; JSON is decoded on access like the real one"""
+
+    def __init__(self, text, status_code=200):
+        self.text = text
+        self.status_code = status_code
+
+    def json(self):
+        return json.loads(self.text)
+
+def make_stub_get(countries):
+    from urllib.parse import urlparse, parse_qs
+    from synthetic import world_bank_indicator_items, world_bank_response
+
+    countries_json = json.dumps(countries)
+    indicator_items = {}
+
+    def stub_get(url, *args, **kwargs):
+        if "restcountries" in url:
+            return StubResponse(countries_json)
+        if "worldbank" in url:
+            parsed = urlparse(url)
+            code = parsed.path.rsplit("/indicator/", 1)[1]
+            query = parse_qs(parsed.query)
+            if code not in indicator_items:
+                indicator_items[code] = world_bank_indicator_items(countries, code)
+            page = world_bank_response(
+                indicator_items[code], int(query.get("page", ["1"])[0]), int(query.get("per_page", ["50"])[0])
+            )
+            return StubResponse(json.dumps(page))
+        return StubResponse("null", status_code=404)
+    return stub_get
+
+def benchmark_routes(app, requests_per_route):
+    """Time every argument-free GET route under /visualize"""
+    routes = sorted(
+        rule.rule for rule in app.url_map.iter_rules()
+        if rule.rule.startswith("/visualize") and not rule.arguments and "GET" in rule.methods
+    )
+    client = app.test_client()
+    results = {}
+    for route in routes:
+        start = time.perf_counter()
+        identity = client.get(route)
+        cold_ms = (time.perf_counter() - start) * 1000
+
+        timings = []
+        compressed_bytes = None
+        for _ in range(requests_per_route):
+            start = time.perf_counter()
+            response = client.get(route, headers={"Accept-Encoding": "br, gzip"})
+            timings.append((time.perf_counter() - start) * 1000)
+            compressed_bytes = len(response.data)
+
+        results[route] = {
+            "status": identity.status_code,
+            "cold_ms": round(cold_ms, 3),
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p90_ms": round(percentile(timings, 90), 3),
+            "p99_ms": round(percentile(timings, 99), 3),
+            "bytes": len(identity.data),
+            "bytes_compressed": compressed_bytes,
+            "content_encoding": response.headers.get("Content-Encoding"),
+        }
+    return results
+
+def run_size(size, requests_per_route):
+    """Benchmark one dataset size inside the current (fresh) interpreter"""
+    from synthetic import generate_countries
+    from app.models.base import engine
+    from app.services.scraper.countries import fetch_and_store_countries
+    from app import create_app
+
+    engine.echo = False  # statement logging would dominate the timings
+
+    start = time.perf_counter()
+    stub_get = make_stub_get(generate_countries(size))
+    generate_seconds = time.perf_counter() - start
+
+    with mock.patch("requests.Session.get", side_effect=stub_get):
+        start = time.perf_counter()
+        version = fetch_and_store_countries()
+        ingest_seconds = time.perf_counter() - start
+    rss_after_ingest = peak_rss_mb()
+
+    app = create_app()
+    routes = benchmark_routes(app, requests_per_route)
+
+    return {
+        "countries": size,
+        "dataset_version": version,
+        "generate_seconds": round(generate_seconds, 3),
+        "ingest_seconds": round(ingest_seconds, 3),
+        "ingest_countries_per_second": round(size / ingest_seconds, 1) if ingest_seconds else None,
+        "peak_rss_mb_after_ingest": round(rss_after_ingest, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "routes": routes,
+    }
+
+def run_in_subprocess(size, requests_per_route, database_url=None):
+    """Run one size in a child interpreter with its own database directory"""
+    with tempfile.TemporaryDirectory(prefix="wiki-bench-") as data_dir:
+        result_file = os.path.join(data_dir, "result.json")
+        env = dict(os.environ, WIKI_DATABASE_DIR=data_dir)
+        if database_url:
+            env["WIKI_DATABASE_URL"] = database_url
+        with open(os.path.join(data_dir, "output.log"), "w") as log:
+            subprocess.run(
+                [sys.executable, __file__, "--worker", str(size),
+                 "--requests", str(requests_per_route), "--result-file", result_file],
+                cwd=project_root, env=env, stdout=log, stderr=subprocess.STDOUT, check=True
+            )
+        with open(result_file) as f:
+            return json.load(f)
+
+def database_label(database_url):
+    """``database_url`` for the results file, without credentials"""
+    if not database_url:
+        return "sqlite file"
+    from sqlalchemy.engine import make_url
+    return make_url(database_url).render_as_string(hide_password=True)
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=project_root, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(current, previous_path):
+    """Print ingest and warm p50 ratios against an earlier results file"""
+    previous = json.loads(Path(previous_path).read_text())
+    print(f"\n📊 Compared with {previous_path} ({previous.get('commit')}):")
+    for size, result in current["sizes"].items():
+        old = previous.get("sizes", {}).get(size)
+        if not old:
+            continue
+        ratio = result["ingest_seconds"] / old["ingest_seconds"] if old["ingest_seconds"] else float("nan")
+        print(f"   {size} countries: ingest {result['ingest_seconds']:.2f}s ({ratio:.2f}x)")
+        for route, stats in result["routes"].items():
+            old_stats = old["routes"].get(route)
+            if old_stats and old_stats["p50_ms"]:
+                print(f"      {route}: p50 {stats['p50_ms']:.2f}ms ({stats['p50_ms'] / old_stats['p50_ms']:.2f}x)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ingest and chart routes")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="dataset sizes")
+    parser.add_argument("--requests", type=int, default=20, help="warm requests per route (default: 20)")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/load_test-<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--database-url", help="database to benchmark (default: SQLite file in a temp directory)")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = run_size(args.worker, args.requests)
+        with open(args.result_file, "w") as f:
+            json.dump(result, f)
+        return True
+
+    results = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "requests_per_route": args.requests,
+        "database": database_label(args.database_url),
+        "sizes": {},
+    }
+    for size in args.sizes:
+        print(f"🚀 Benchmarking {size} countries...")
+        result = run_in_subprocess(size, args.requests, args.database_url)
+        results["sizes"][str(size)] = result
+        print(f"   Ingest: {result['ingest_seconds']:.2f}s, peak RSS {result['peak_rss_mb']:.0f} MiB")
+        for route, stats in result["routes"].items():
+            print(f"   {route}: cold {stats['cold_ms']:.1f}ms, p50 {stats['p50_ms']:.2f}ms, "
+                  f"p99 {stats['p99_ms']:.2f}ms, {stats['bytes']} bytes")
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"load_test-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2) + "\n")
+    print(f"\n📝 Results written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
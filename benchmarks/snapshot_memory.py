@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for the chart dataset snapshot.
+
+Ingests a synthetic dataset into a throwaway database, then measures with
+tracemalloc how many bytes per country stay allocated when holding
+  1. every ``Country`` as a loaded ORM instance (what chart routes used to do),
+  2. the columnar ``CountrySnapshot`` (app/services/snapshot.py) built in memory,
+  3. the same snapshot memory-mapped from its on-disk bundle, as web workers
+     hold it. Mapped pages are shared page cache, so only the remainder is
+     paid again by every additional worker.
+
+Usage:
+    python benchmarks/snapshot_memory.py
+    python benchmarks/snapshot_memory.py --size 100000
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from unittest import mock
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+def retained_bytes(load):
+    """Bytes still allocated after ``load()`` returns, while its result is alive"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = load()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size, elapsed
+
+def run(size):
+    from synthetic import generate_countries
+    from load_test import make_stub_get
+    from app.models.base import SessionLocal, engine
+    from app.models.entities import Country
+    from app.services.scraper.countries import fetch_and_store_countries
+    from app.services.snapshot import build_snapshot, open_snapshot, store_snapshot
+    from app.services.versioning import current_dataset_version
+
+    engine.echo = False
+    with mock.patch("requests.Session.get", side_effect=make_stub_get(generate_countries(size))):
+        fetch_and_store_countries()
+
+    def load_orm():
+        db = SessionLocal()
+        return db, db.query(Country).all()
+
+    (db, countries), orm_bytes, orm_seconds = retained_bytes(load_orm)
+    db.close()
+    del countries
+    snapshot, snapshot_bytes, snapshot_seconds = retained_bytes(build_snapshot)
+    path = store_snapshot(current_dataset_version(), snapshot)
+    mapped, mapped_bytes, mapped_seconds = retained_bytes(lambda: open_snapshot(path))
+
+    print(f"📊 {len(snapshot)} countries")
+    print(f"   ORM objects: {orm_bytes / len(snapshot):,.0f} bytes/country, loaded in {orm_seconds:.2f}s")
+    print(f"   Snapshot:    {snapshot_bytes / len(snapshot):,.0f} bytes/country, built in {snapshot_seconds:.2f}s "
+          f"({snapshot.nbytes() / len(snapshot):,.0f} bytes/country by nbytes())")
+    print(f"   Mapped:      {mapped_bytes / len(mapped):,.0f} bytes/country per worker, mapped in {mapped_seconds * 1000:.1f}ms")
+    print(f"   Ratio:       {orm_bytes / snapshot_bytes:.1f}x smaller in memory, "
+          f"{orm_bytes / max(mapped_bytes, 1):.0f}x smaller per worker when mapped")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare ORM and snapshot memory per country")
+    parser.add_argument("--size", type=int, default=10_000, help="synthetic countries (default: 10000)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="wiki-bench-") as data_dir:
+        # Must be set before app.models.base creates the engine
+        os.environ["WIKI_DATABASE_DIR"] = data_dir
+        return run(args.size)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,113 @@
+"""
+Synthetic datasets in the REST Countries v3.1 shape for benchmarks.
+
+Records carry every field ``fetch_and_store_countries`` reads, with realistic
+value ranges, so ingest and chart code paths behave as they do on real data.
+Generation is seeded and deterministic for a given size.
+"""
+
+import random
+import string
+
+REGIONS = {
+    "Africa": ["Northern Africa", "Western Africa", "Eastern Africa", "Middle Africa", "Southern Africa"],
+    "Americas": ["North America", "Caribbean", "Central America", "South America"],
+    "Asia": ["Eastern Asia", "South-Eastern Asia", "Southern Asia", "Western Asia", "Central Asia"],
+    "Europe": ["Northern Europe", "Western Europe", "Southern Europe", "Eastern Europe"],
+    "Oceania": ["Australia and New Zealand", "Melanesia", "Micronesia", "Polynesia"],
+}
+CURRENCIES = ["USD", "EUR", "GBP", "JPY", "CNY", "INR", "BRL", "XOF", "XAF", "AUD", "CAD", "CHF"]
+
+_ALPHABET = string.ascii_uppercase + string.digits
+
+def _code(index, width):
+    """Deterministic unique code; grows beyond ``width`` once the space is used up"""
+    chars = []
+    while True:
+        index, rem = divmod(index, len(_ALPHABET))
+        chars.append(_ALPHABET[rem])
+        if index == 0 and len(chars) >= width:
+            break
+    return "".join(reversed(chars))
+
+def generate_countries(count, seed=42, language_pool=None):
+    """Return ``count`` synthetic country records in REST Countries format"""
+    rng = random.Random(seed)
+    if language_pool is None:
+        language_pool = max(20, count // 5)
+    languages = [f"Language {i:05d}" for i in range(language_pool)]
+    region_names = list(REGIONS)
+    codes3 = [_code(i, 3) for i in range(count)]
+
+    countries = []
+    for i in range(count):
+        region = rng.choice(region_names)
+        subregion = rng.choice(REGIONS[region])
+        population = int(10 ** rng.uniform(3, 9.2))
+        area = round(10 ** rng.uniform(0.5, 7.2), 1)
+        spoken = rng.sample(languages, k=rng.randint(1, 3))
+        offsets = sorted({rng.randint(-12, 14) for _ in range(rng.randint(1, 3))})
+        neighbours = rng.sample(codes3, k=min(count - 1, rng.randint(0, 5)))
+        currency = rng.choice(CURRENCIES)
+
+        countries.append({
+            "name": {"common": f"Country {i:06d}", "official": f"Republic of Country {i:06d}"},
+            "capital": [f"Capital {i:06d}"],
+            "region": region,
+            "subregion": subregion,
+            "cca2": _code(i, 2),
+            "cca3": codes3[i],
+            "ccn3": f"{i % 1000:03d}",
+            "population": population,
+            "area": area,
+            "latlng": [round(rng.uniform(-60, 75), 4), round(rng.uniform(-180, 180), 4)],
+            "landlocked": rng.random() < 0.2,
+            "gini": {str(rng.randint(2005, 2022)): round(rng.uniform(24, 63), 1)} if rng.random() < 0.7 else {},
+            "flags": {"png": f"https://flagcdn.com/w320/{i}.png", "svg": f"https://flagcdn.com/{i}.svg"},
+            "coatOfArms": {},
+            "currencies": {currency: {"name": f"{currency} currency", "symbol": "$"}},
+            "timezones": [f"UTC{o:+03d}:00" if o else "UTC" for o in offsets],
+            "borders": [code for code in neighbours if code != codes3[i]],
+            "idd": {"root": f"+{rng.randint(1, 9)}", "suffixes": [str(rng.randint(0, 99))]},
+            "tld": [f".{codes3[i].lower()}"],
+            "languages": {f"l{j}": name for j, name in enumerate(spoken)},
+        })
+    return countries
+
+def world_bank_indicator_items(countries, code, years=range(2013, 2023), seed=0):
+    """Fake World Bank ``country/all/indicator/<code>`` items for the given countries"""
+    rng = random.Random(f"{code}-{seed}")
+    items = []
+    for country in countries:
+        population = country["population"]
+        gdp_per_capita = 10 ** rng.uniform(2.5, 5)
+        for offset, year in enumerate(years):
+            growth = (1 + rng.uniform(-0.02, 0.05)) ** offset
+            if code == "SP.POP.TOTL":
+                value = population * (0.9 + 0.01 * offset)
+            elif code == "NY.GDP.PCAP.CD":
+                value = gdp_per_capita * growth
+            elif code == "NY.GDP.MKTP.CD":
+                value = gdp_per_capita * growth * population
+            elif code == "SI.POV.GINI":
+                if rng.random() > 0.2:
+                    continue  # Gini surveys are sparse
+                value = rng.uniform(24, 63)
+            else:
+                continue
+            items.append({
+                "indicator": {"id": code},
+                "country": {"id": country["cca2"], "value": country["name"]["common"]},
+                "countryiso3code": country["cca3"],
+                "date": str(year),
+                "value": value,
+            })
+    return items
+
+def world_bank_response(items, page, per_page):
+    """One page of a World Bank API response, metadata element first"""
+    pages = max(1, -(-len(items) // per_page))
+    return [
+        {"page": page, "pages": pages, "per_page": per_page, "total": len(items)},
+        items[(page - 1) * per_page:page * per_page],
+    ]
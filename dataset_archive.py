@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Export the dataset to Parquet/Arrow files, or load such an archive.
+
+Usage:
+    python dataset_archive.py export archives/2025-09-01
+    python dataset_archive.py export archives/latest --format arrow
+    python dataset_archive.py import archives/2025-09-01
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or import the whole dataset as columnar files")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="write every table to a directory")
+    export_parser.add_argument("directory")
+    export_parser.add_argument("--format", choices=["parquet", "arrow"], default="parquet",
+                               help="file format (default: parquet)")
+    import_parser = commands.add_parser("import", help="replace the dataset with an exported directory")
+    import_parser.add_argument("directory")
+    import_parser.add_argument("--prerender", action="store_true", help="pre-render charts for the new version")
+    args = parser.parse_args()
+
+    from app.models.base import engine
+    from app.services.dataset_archive import export_dataset, import_dataset
+    engine.echo = False  # one statement per batch is not worth logging
+
+    start = time.perf_counter()
+    try:
+        if args.command == "export":
+            print(f"📦 Exporting dataset to {args.directory}...")
+            manifest = export_dataset(args.directory, args.format)
+            total = sum(table["rows"] for table in manifest["tables"].values())
+            print(f"✅ Exported {total} rows from {len(manifest['tables'])} tables in {time.perf_counter() - start:.2f}s")
+        else:
+            print(f"📥 Importing dataset from {args.directory}...")
+            version = import_dataset(args.directory)
+            print(f"✅ Imported dataset version {version} in {time.perf_counter() - start:.2f}s")
+            if args.prerender:
+                from app.services.prerender import prerender_charts
+                prerender_charts(version)
+    except Exception as e:
+        print(f"❌ Dataset {args.command} failed: {e}")
+        return False
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Export the read-only pages and every chart as a static site.
+
+Usage:
+    python export_static.py site/
+    python export_static.py /var/www/wiki --workers 4
+
+Serve the directory with any static file server; precompressed .gz/.br
+files sit next to every file.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the site's read-only pages into a static directory")
+    parser.add_argument("directory")
+    parser.add_argument("--workers", type=int, default=None, help="chart render processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    from app.models.base import engine
+    from app.services.static_export import export_static
+    engine.echo = False
+
+    start = time.perf_counter()
+    print(f"🌐 Exporting static site to {args.directory}...")
+    try:
+        manifest = export_static(args.directory, max_workers=args.workers)
+    except Exception as e:
+        print(f"❌ Static export failed: {e}")
+        return False
+    print(f"✅ Exported {len(manifest['files'])} files for dataset version {manifest['dataset_version']} "
+          f"in {time.perf_counter() - start:.2f}s")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -12,7 +12,7 @@ from pathlib import Path
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
-from app.models.base import Base, engine, DATABASE_PATH
+from app.models.base import Base, engine, DATABASE_PATH, DIALECT
 from app.models.entities import Continent, Country, Language, CountryLanguage
 
 def initialize_database():
@@ -22,15 +22,21 @@ def initialize_database():
         print("🚀 Initializing Wiki Visualizer Database")
         print("=" * 60)
         
+        if DIALECT != "sqlite":
+            # Server database (WIKI_DATABASE_URL): drop the tables instead of a file
+            print(f"🗑️  Dropping existing tables on {engine.url.render_as_string(hide_password=True)}...")
+            Base.metadata.drop_all(bind=engine)
         # Check if database file exists
-        if os.path.exists(DATABASE_PATH):
+        elif os.path.exists(DATABASE_PATH):
             print(f"📁 Database file exists at: {DATABASE_PATH}")
             print("🗑️  Removing existing database to create new schema...")
-            # Remove existing database
-            os.remove(DATABASE_PATH)
+            # Remove existing database (and its write-ahead log)
+            for path in (DATABASE_PATH, f"{DATABASE_PATH}-wal", f"{DATABASE_PATH}-shm"):
+                if os.path.exists(path):
+                    os.remove(path)
             print("✅ Removed existing database file")
         
-        print(f"📍 Database location: {DATABASE_PATH}")
+        print(f"📍 Database location: {engine.url.render_as_string(hide_password=True)}")
         
         # Create all tables
         print("🔨 Creating database tables...")
@@ -45,9 +51,15 @@ def initialize_database():
         for table in sorted(tables):
             print(f"   - {table}")
         
+        # Running workers would keep serving charts of the old data otherwise
+        from app.services.versioning import reset_dataset_version
+        version = reset_dataset_version()
+        print(f"🔢 Published dataset version {version} and removed stored charts")
+        
         print("\n🎉 Database initialization completed successfully!")
         print("\n📋 Next steps:")
         print("   1. Run the scraper to populate data: python -c 'from app.services.scraper.countries import fetch_and_store_countries; fetch_and_store_countries()'")
+        print("      or load an exported archive: python dataset_archive.py import <directory>")
         print("   2. Start the application: python run.py")
         print("   3. Visit http://localhost:5000 to see your data!")
         
@@ -2,6 +2,11 @@
 """
 Comprehensive test script for Wiki Visualizer functionality.
 Tests database, scraping, and visualization systems.
+
+Runs against the configured database; to check an in-memory database too:
+    WIKI_DATABASE_URL=sqlite:// WIKI_DATABASE_DIR=$(mktemp -d) python test_system.py
+The PostgreSQL-only write paths are compiled either way, and run against a
+server (in a rolled-back transaction) when WIKI_TEST_POSTGRES_URL is set.
 """
 
 import sys
@@ -15,9 +20,11 @@ def test_database_connection():
     """Test database connectivity and schema"""
     try:
         print("🔍 Testing database connection...")
-        from app.models.base import SessionLocal, engine
+        from app.models.base import SessionLocal, engine, DIALECT
         from app.models.entities import Country, Continent, Language
+        from app.models.init_db import init_db
         
+        init_db()
         db = SessionLocal()
         
         # Test basic queries
@@ -25,7 +32,7 @@ def test_database_connection():
         continents_count = db.query(Continent).count()
         languages_count = db.query(Language).count()
         
-        print(f"   ✅ Database connected successfully")
+        print(f"   ✅ Database connected successfully ({DIALECT})")
         print(f"   📊 Data: {countries_count} countries, {continents_count} continents, {languages_count} languages")
         
         db.close()
@@ -35,6 +42,224 @@ def test_database_connection():
         print(f"   ❌ Database test failed: {e}")
         return False
 
+def test_postgresql_statements():
+    """Test the PostgreSQL write paths: compiled always, run when WIKI_TEST_POSTGRES_URL is set"""
+    try:
+        print("🐘 Testing PostgreSQL statements...")
+        import csv
+        import io
+        import os
+        from datetime import datetime
+        from unittest import mock
+        from sqlalchemy import create_engine, select
+        from sqlalchemy.dialects import postgresql
+        from sqlalchemy.orm import Session
+        from app.models import dialects
+        from app.models.base import Base
+        from app.models.entities import Country, CountryChange, Indicator, IndicatorValue
+        from app.services import aggregates
+
+        upsert = str(dialects.upsert_statement(Indicator, ["code"], ["name", "unit"], "postgresql").compile(
+            dialect=postgresql.dialect(), column_keys=["code", "name", "unit"]
+        ))
+        if "ON CONFLICT (code) DO UPDATE SET name = excluded.name, unit = excluded.unit" not in upsert:
+            print(f"   ❌ Unexpected upsert: {upsert}")
+            return False
+
+        table = CountryChange.__table__
+        rows = [
+            {"version": -1, "iso_code_alpha3": "TST", "change": "updated", "field": "borders",
+             "old_value": ["AAA"], "new_value": ["AAA", "BBB"]},
+            {"version": -1, "iso_code_alpha3": "TSU", "change": "added", "field": None,
+             "old_value": None, "new_value": "Testland, Republic of"},
+        ]
+        columns = [column for column in table.columns if column.name in rows[0]]
+        copy = dialects.copy_statement(table, columns)
+        data = list(csv.reader(io.StringIO(dialects.copy_data(columns, rows))))
+        if (copy != 'COPY "country_change" ("version", "iso_code_alpha3", "change", "field", "old_value", "new_value") '
+                    "FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+                or data[0] != ["-1", "TST", "updated", "borders", '["AAA"]', '["AAA", "BBB"]']
+                or data[1] != ["-1", "TSU", "added", "\\N", "\\N", '"Testland, Republic of"']):
+            print(f"   ❌ Unexpected COPY statement or data: {copy} {data}")
+            return False
+
+        create, refresh = aggregates.materialized_view_statements(postgresql.dialect())
+        if (not create.startswith("CREATE MATERIALIZED VIEW IF NOT EXISTS region_summary AS SELECT country.region")
+                or "GROUP BY country.region" not in create or "%(" in create
+                or refresh != "REFRESH MATERIALIZED VIEW region_summary"):
+            print(f"   ❌ Unexpected materialized view statements: {create} / {refresh}")
+            return False
+
+        reset = dialects.sequence_reset_statement(Country)
+        if (reset != "SELECT setval(pg_get_serial_sequence('\"country\"', 'id'), "
+                     'COALESCE(MAX("id"), 1), MAX("id") IS NOT NULL) FROM "country"'
+                or dialects.sequence_reset_statement(IndicatorValue) is not None):
+            print(f"   ❌ Unexpected sequence reset: {reset}")
+            return False
+        print("   ✅ COPY, ON CONFLICT, materialized view and sequence reset statements compile for PostgreSQL")
+
+        url = os.environ.get("WIKI_TEST_POSTGRES_URL")
+        if not url:
+            print("   ⏭️ Skipped running them: set WIKI_TEST_POSTGRES_URL, e.g. postgresql+psycopg://user@localhost/wiki_test")
+            return True
+
+        # Everything happens in one transaction that is rolled back, DDL included
+        with create_engine(url).connect() as connection:
+            transaction = connection.begin()
+            try:
+                Base.metadata.create_all(connection)
+                db = Session(bind=connection)
+                with mock.patch.object(dialects, "DIALECT", "postgresql"), mock.patch.object(aggregates, "DIALECT", "postgresql"):
+                    dialects.bulk_insert(db, CountryChange, [dict(row, changed_at=datetime.now()) for row in rows])
+                    for name in ("Old name", "New name"):
+                        dialects.upsert(db, Indicator, [{"code": "TEST.CODE", "name": name, "unit": "%"}],
+                                        index_elements=["code"], update_columns=["name", "unit"])
+                    db.add(Country(name="Testland", region="Test region", population=5, area=2.0, iso_code_alpha3="TST"))
+                    db.flush()
+                    aggregates.refresh_aggregates(db)
+                    # An imported id far past the sequence, then a row that takes the next one
+                    dialects.bulk_insert(db, Country, [{"id": 900000, "name": "Importland", "iso_code_alpha3": "TSI"}])
+                    dialects.reset_sequences(db, [Country, IndicatorValue])
+                    next_country = Country(name="Nextland", iso_code_alpha3="TSN")
+                    db.add(next_country)
+                    db.flush()
+
+                copied = db.execute(
+                    select(CountryChange.old_value, CountryChange.new_value)
+                    .where(CountryChange.version == -1).order_by(CountryChange.iso_code_alpha3)
+                ).all()
+                indicators = db.execute(select(Indicator.name).where(Indicator.code == "TEST.CODE")).scalars().all()
+                summary = db.execute(
+                    select(aggregates.region_summary.c.country_count, aggregates.region_summary.c.population)
+                    .where(aggregates.region_summary.c.region == "Test region")
+                ).all()
+                if ([tuple(row) for row in copied] != [(["AAA"], ["AAA", "BBB"]), (None, "Testland, Republic of")]
+                        or indicators != ["New name"] or [tuple(row) for row in summary] != [(1, 5)]
+                        or next_country.id != 900001):
+                    print(f"   ❌ PostgreSQL round trip returned {copied}, {indicators}, {summary}, id {next_country.id}")
+                    return False
+            finally:
+                transaction.rollback()
+        print("   ✅ COPY, ON CONFLICT, materialized view and sequence reset work on PostgreSQL")
+        return True
+
+    except Exception as e:
+        print(f"   ❌ PostgreSQL statements test failed: {e}")
+        return False
+
+def test_http_client():
+    """Test the scraper HTTP client: retries, Retry-After, 429 throttling and the circuit breaker"""
+    try:
+        print("🌐 Testing scraper HTTP client...")
+        from unittest import mock
+        import requests
+        from app.services.scraper import http_client
+
+        url = "https://upstream.test/data"
+
+        def response(status, retry_after=None):
+            result = requests.Response()
+            result.status_code = status
+            if retry_after is not None:
+                result.headers["Retry-After"] = str(retry_after)
+            return result
+
+        def client(retries=http_client.RETRIES):
+            return http_client.ScraperClient(
+                policies={}, default_policy={"rate": 1000, "burst": 1000, "concurrency": 4}, retries=retries
+            )
+
+        with mock.patch.object(http_client.time, "sleep") as sleep:
+            # Connection error, then 503, then success
+            with mock.patch("requests.Session.get", side_effect=[
+                requests.ConnectionError("reset"), response(503), response(200)
+            ]) as get:
+                result = client().get(url)
+            if result.status_code != 200 or get.call_count != 3 or sleep.call_count != 2:
+                print(f"   ❌ Retry then success: status {result.status_code} after {get.call_count} calls")
+                return False
+
+            # Retry-After wins over the backoff, up to the cap; a 429 halves the host's rate
+            sleep.reset_mock()
+            scraper = client()
+            with mock.patch("requests.Session.get", side_effect=[
+                response(429, retry_after=7), response(503, retry_after=3600), response(200)
+            ]):
+                scraper.get(url)
+            bucket = scraper.host("upstream.test").bucket
+            # The emptied token bucket also sleeps, for milliseconds at this rate
+            delays = [call.args[0] for call in sleep.call_args_list if call.args[0] >= 1]
+            if delays != [7.0, http_client.BACKOFF_MAX_SECONDS] or not bucket.rate < bucket.max_rate:
+                print(f"   ❌ Retry-After delays {delays}, rate {bucket.rate}/{bucket.max_rate}")
+                return False
+        print("   ✅ Retries, Retry-After (capped) and 429 throttling work")
+
+        # The breaker opens after BREAKER_FAILURES failed requests and fails fast
+        scraper = client(retries=0)
+        breaker = scraper.host("upstream.test").breaker
+        with mock.patch("requests.Session.get", return_value=response(503)) as get:
+            for _ in range(http_client.BREAKER_FAILURES):
+                scraper.get(url)
+            try:
+                scraper.get(url)
+                print("   ❌ Open breaker let a request through")
+                return False
+            except http_client.CircuitOpenError:
+                pass
+        if get.call_count != http_client.BREAKER_FAILURES:
+            print(f"   ❌ Open breaker called upstream ({get.call_count} calls)")
+            return False
+
+        # After the cool-down one trial goes through; a trial ending in an
+        # unexpected error re-opens the breaker instead of wedging it
+        breaker.opened_at -= breaker.reset_seconds
+        with mock.patch("requests.Session.get", side_effect=requests.TooManyRedirects("loop")):
+            try:
+                scraper.get(url)
+            except requests.TooManyRedirects:
+                pass
+        if breaker.trial_running or breaker.opened_at is None:
+            print("   ❌ Failed trial left the breaker half-open")
+            return False
+
+        concurrent = []
+        def trial(*args, **kwargs):
+            # Calls made while the trial runs are still rejected
+            try:
+                scraper.get(url)
+                concurrent.append("passed")
+            except http_client.CircuitOpenError:
+                concurrent.append("rejected")
+            return response(200)
+
+        breaker.opened_at -= breaker.reset_seconds
+        with mock.patch("requests.Session.get", side_effect=trial):
+            result = scraper.get(url)
+        if result.status_code != 200 or concurrent != ["rejected"] or breaker.opened_at is not None or breaker.failures:
+            print(f"   ❌ Trial returned {result.status_code}, concurrent calls {concurrent}, breaker not closed")
+            return False
+        with mock.patch("requests.Session.get", return_value=response(200)):
+            scraper.get(url)
+        print("   ✅ Breaker opens, fails fast, lets one trial through and closes on success")
+
+        # Wikipedia summaries go through the same client
+        from app.services.scraper import wikipedia
+        page = response(200)
+        page._content = b'{"title": "New Zealand", "extract": "An island country."}'
+        with mock.patch("requests.Session.get", side_effect=[page, response(404)]) as get:
+            summary = wikipedia.get_country_summary("New Zealand")
+            missing = wikipedia.get_country_summary("Atlantis")
+        if (summary != {"title": "New Zealand", "summary": "An island country."} or missing is not None
+                or not get.call_args_list[0].args[0].endswith("/page/summary/New_Zealand")):
+            print(f"   ❌ Wikipedia summary returned {summary}, {missing}")
+            return False
+        print("   ✅ Wikipedia summaries fetched through the client")
+        return True
+
+    except Exception as e:
+        print(f"   ❌ HTTP client test failed: {e}")
+        return False
+
 def test_scraping_system():
     """Test the scraping system"""
     try:
@@ -50,6 +275,416 @@ def test_scraping_system():
         print(f"   ❌ Scraping test failed: {e}")
         return False
 
+def test_ingest_checkpoints():
+    """Test that a crashed ingest resumes from its fetch checkpoints"""
+    try:
+        print("🔁 Testing ingest checkpoints...")
+        from datetime import datetime, timedelta
+        from unittest import mock
+        from app.models.base import SessionLocal
+        from app.models.entities import IngestCheckpoint
+        from app.services.scraper import countries
+        from app.services.scraper.checkpoints import Checkpoints
+        from app.services.scraper.sample_data import get_sample_countries_data
+
+        def steps(job):
+            db = SessionLocal()
+            try:
+                return {step for step, in db.query(IngestCheckpoint.step).filter_by(job=job)}
+            finally:
+                db.close()
+
+        fetch = mock.Mock(return_value=get_sample_countries_data())
+        with mock.patch.object(countries, "fetch_rest_countries", fetch), \
+             mock.patch("app.services.scraper.indicators.fetch_all_indicator_series", return_value={}):
+            # Crash after the fetch phase, before the ingest commits
+            with mock.patch.object(countries, "clear_existing_data", side_effect=RuntimeError("crash")):
+                try:
+                    countries.fetch_and_store_countries()
+                except RuntimeError:
+                    pass
+            if countries.REST_COUNTRIES_STEP not in steps("countries"):
+                print("   ❌ Fetched step was not checkpointed")
+                return False
+            countries.fetch_and_store_countries()
+        if fetch.call_count != 1 or steps("countries"):
+            print(f"   ❌ Rerun fetched {fetch.call_count - 1} times, {len(steps('countries'))} checkpoints left")
+            return False
+        print("   ✅ Rerun reused the checkpoint and the ingest cleared it")
+
+        # Checkpoints older than the max age are not resumed
+        Checkpoints("test").save("step", {"answer": 42})
+        db = SessionLocal()
+        try:
+            db.query(IngestCheckpoint).filter_by(job="test").update(
+                {"completed_at": datetime.now() - timedelta(days=2)}
+            )
+            db.commit()
+        finally:
+            db.close()
+        if "step" in Checkpoints("test") or steps("test"):
+            print("   ❌ Expired checkpoint was resumed")
+            return False
+        print("   ✅ Expired checkpoints are discarded")
+        return True
+
+    except Exception as e:
+        print(f"   ❌ Ingest checkpoint test failed: {e}")
+        return False
+
+def test_validation_rejects_batch():
+    """Test that a batch failing validation is rejected before any write"""
+    try:
+        print("🛡️ Testing ingest validation...")
+        import copy
+        from unittest import mock
+        from app.models.base import SessionLocal
+        from app.models.entities import Country, IngestCheckpoint
+        from app.services.scraper import countries
+        from app.services.scraper.sample_data import get_sample_countries_data
+        from app.services.scraper.validation import ValidationError
+        from app.services.versioning import current_dataset_version, read_dataset_version
+
+        def dataset():
+            db = SessionLocal()
+            try:
+                names = sorted(name for (name,) in db.query(Country.name))
+                step = db.query(IngestCheckpoint).filter_by(job="countries", step=countries.REST_COUNTRIES_STEP).count()
+                return names, read_dataset_version(db), step
+            finally:
+                db.close()
+
+        batch = copy.deepcopy(get_sample_countries_data())
+        batch[0]["latlng"] = [95.0, 10.0]  # latitude out of range: a hard failure
+        before_names, before_version, _ = dataset()
+        before_marker = current_dataset_version()
+
+        with mock.patch.object(countries, "fetch_rest_countries", return_value=batch), \
+             mock.patch("app.services.scraper.indicators.fetch_all_indicator_series", return_value={}), \
+             mock.patch.object(countries, "clear_existing_data", wraps=countries.clear_existing_data) as clear:
+            try:
+                countries.fetch_and_store_countries()
+                print("   ❌ Invalid batch was ingested")
+                return False
+            except ValidationError as e:
+                if not any("latitude" in error for error in e.report.errors):
+                    print(f"   ❌ Unexpected validation errors: {e.report.errors}")
+                    return False
+
+        names, version, step = dataset()
+        if clear.called or names != before_names or version != before_version or current_dataset_version() != before_marker:
+            print(f"   ❌ Rejected batch changed the dataset (wiped: {clear.called}, version {before_version} -> {version})")
+            return False
+        if step:
+            print("   ❌ Rejected batch is still checkpointed and would be replayed")
+            return False
+        print(f"   ✅ Invalid batch rejected; {len(names)} countries and version {version} kept, checkpoint dropped")
+        return True
+
+    except Exception as e:
+        print(f"   ❌ Ingest validation test failed: {e}")
+        return False
+
+def test_dataset_versioning():
+    """Test dataset version bumps and cache invalidation"""
+    try:
+        print("🔢 Testing dataset versioning...")
+        from app.models.base import SessionLocal
+        from app.services.versioning import (
+            VersionedCache, bump_dataset_version, current_dataset_version, publish_dataset_version
+        )
+        
+        cache = VersionedCache("test")
+        cache.set("answer", 42)
+        before = current_dataset_version()
+        
+        db = SessionLocal()
+        try:
+            version = bump_dataset_version(db)
+            db.commit()
+        finally:
+            db.close()
+        publish_dataset_version(version)
+        
+        if version > before and current_dataset_version() == version and cache.get("answer") is None:
+            print(f"   ✅ Dataset version bumped {before} -> {version} and caches invalidated")
+            return True
+        print("   ❌ Dataset version did not invalidate caches")
+        return False
+        
+    except Exception as e:
+        print(f"   ❌ Dataset versioning test failed: {e}")
+        return False
+
+def test_indicator_paging():
+    """Test that World Bank paging reads every page, including ones with only null values"""
+    try:
+        print("📈 Testing indicator paging...")
+        from unittest import mock
+        from app.services.scraper import indicators
+
+        def page(number, values):
+            """A World Bank response body: metadata, then the rows"""
+            return [{"page": number, "pages": 3}, [
+                {"countryiso3code": "USA", "date": str(year), "value": value} for year, value in values
+            ]]
+
+        # Newest years first, and the newest are not published yet
+        pages = {
+            1: page(1, [(2024, None), (2023, None)]),
+            2: page(2, [(2022, 3.0), (2021, None)]),
+            3: page(3, [(2020, 2.0)]),
+        }
+
+        class Response:
+            status_code = 200
+
+            def __init__(self, data):
+                self.data = data
+
+            def json(self):
+                return self.data
+
+        def get(url, timeout=None):
+            return Response(pages[int(url.rsplit("page=", 1)[1])])
+
+        with mock.patch.object(indicators, "http_get", side_effect=get) as http_get:
+            series = indicators.fetch_indicator_series("SP.POP.TOTL", 2020, 2024)
+        if sorted(series) != [("USA", 2020, 2.0), ("USA", 2022, 3.0)] or http_get.call_count != 3:
+            print(f"   ❌ Read {series} from {http_get.call_count} pages")
+            return False
+        print("   ✅ Every page read, past pages with only null values")
+        return True
+
+    except Exception as e:
+        print(f"   ❌ Indicator paging test failed: {e}")
+        return False
+
+def test_database_reset():
+    """Test that a database reset moves the dataset version and drops stored charts"""
+    try:
+        print("🗑️ Testing database reset...")
+        import os
+        import subprocess
+        import tempfile
+        from app.services import artifacts
+        from app.services.versioning import VersionedCache, current_dataset_version, reset_dataset_version
+
+        cache = VersionedCache("test_reset")
+        cache.set("answer", 42)
+        before = current_dataset_version()
+        artifacts.store_artifact(before, "reset_test", "html", b"<p>old data</p>")
+        version = reset_dataset_version()
+        if (version <= before or current_dataset_version() != version or cache.get("answer") is not None
+                or artifacts.stale_version(version, "reset_test", "html") is not None):
+            print(f"   ❌ Reset left version {before} -> {version}, cache or stored charts in place")
+            return False
+        print(f"   ✅ Reset published version {version}, emptied caches and stored charts")
+
+        # init_database.py does the same for the database it recreates
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, "artifacts", "v7"))
+            with open(os.path.join(tmp, "dataset.version"), "w") as f:
+                f.write("7")
+            env = dict(os.environ, WIKI_DATABASE_DIR=tmp, WIKI_DB_ECHO="0")
+            env.pop("WIKI_DATABASE_URL", None)
+            subprocess.run([sys.executable, str(project_root / "init_database.py")], env=env,
+                           check=True, capture_output=True)
+            with open(os.path.join(tmp, "dataset.version")) as f:
+                marker = f.read().strip()
+            if marker != "8" or os.listdir(os.path.join(tmp, "artifacts")):
+                print(f"   ❌ init_database.py left version {marker} and {os.listdir(os.path.join(tmp, 'artifacts'))}")
+                return False
+        print("   ✅ init_database.py publishes a new version and removes stored charts")
+        return True
+
+    except Exception as e:
+        print(f"   ❌ Database reset test failed: {e}")
+        return False
+
+def test_dataset_archive():
+    """Test that an exported archive imports back to the same rows under a new dataset version"""
+    try:
+        print("📦 Testing dataset export and import...")
+        import tempfile
+        from sqlalchemy import func, select
+        from app.models.base import SessionLocal
+        from app.models.entities import Country
+        from app.services import dataset_archive
+        from app.services.versioning import current_dataset_version, read_dataset_version
+
+        if dataset_archive.pa is None:
+            print("   ⏭️ Skipped: pyarrow is not installed")
+            return True
+
+        def row_counts():
+            db = SessionLocal()
+            try:
+                return {table.name: db.execute(select(func.count()).select_from(table)).scalar_one()
+                        for table in dataset_archive.data_tables()}
+            finally:
+                db.close()
+
+        for fmt in ("parquet", "arrow"):
+            before, version = row_counts(), read_dataset_version()
+            with tempfile.TemporaryDirectory() as tmp:
+                manifest = dataset_archive.export_dataset(tmp, fmt)
+                exported = {name: entry["rows"] for name, entry in manifest["tables"].items()}
+                if exported != before or manifest["dataset_version"] != version:
+                    print(f"   ❌ {fmt} manifest has {exported} at v{manifest['dataset_version']}, database {before} at v{version}")
+                    return False
+                imported = dataset_archive.import_dataset(tmp)
+            if row_counts() != before or imported <= version or current_dataset_version() != imported:
+                print(f"   ❌ {fmt} import left {row_counts()} at v{imported} (was {before} at v{version})")
+                return False
+            print(f"   ✅ {fmt}: {sum(before.values())} rows round-tripped, version {version} -> {imported}")
+
+        # New rows get fresh ids after the import brought its own
+        db = SessionLocal()
+        try:
+            largest = db.execute(select(func.max(Country.id))).scalar_one() or 0
+            country = Country(name="Archive Test", iso_code_alpha3="ZZA")
+            db.add(country)
+            db.flush()
+            if country.id <= largest:
+                print(f"   ❌ New country reused id {country.id} (largest {largest})")
+                return False
+            db.rollback()
+        finally:
+            db.close()
+        print("   ✅ New rows are numbered past the imported ids")
+        return True
+
+    except Exception as e:
+        print(f"   ❌ Dataset archive test failed: {e}")
+        return False
+
+def test_change_history():
+    """Test field-level change history between ingests"""
+    try:
+        print("📝 Testing change history...")
+        from unittest import mock
+        from app.models.base import SessionLocal
+        from app.models.entities import Country, CountryChange, Indicator, IndicatorValue
+        from app.services.change_history import TRACKED_FIELDS, tracked_columns, diff_countries
+        from app.services.scraper import countries
+
+        def row(iso3, **values):
+            fields = dict.fromkeys(TRACKED_FIELDS)
+            fields.update(values)
+            return (iso3, *[fields[field] for field in TRACKED_FIELDS])
+
+        previous = tracked_columns([
+            row("AAA", name="A", population=100, area=1.0, borders=["BBB"]),
+            row("BBB", name="B", area=2.0),
+        ])
+        current = tracked_columns([
+            row("AAA", name="A", population=150, area=1.0 + 1e-12, borders=["BBB"]),
+            row("CCC", name="C"),
+        ])
+        changes = {(c["iso_code_alpha3"], c["change"], c["field"]) for c in diff_countries(previous, current)}
+        if changes != {("CCC", "added", None), ("BBB", "removed", None), ("AAA", "updated", "population")}:
+            print(f"   ❌ Unexpected diff: {sorted(changes, key=str)}")
+            return False
+        if diff_countries(current, current):
+            print("   ❌ Unchanged data produced changes")
+            return False
+        print("   ✅ Added, removed and updated countries diffed correctly")
+
+        # A failed indicator fetch keeps the previous values and series, and records nothing
+        gdp = {"NY.GDP.MKTP.CD": [("USA", 2019, 2.0e13), ("USA", 2020, 2.1e13)]}
+        def scrape(series):
+            with mock.patch.object(countries, "fetch_rest_countries", return_value=None), \
+                 mock.patch("app.services.scraper.indicators.fetch_all_indicator_series",
+                            side_effect=lambda *args: dict(series)):
+                return countries.fetch_and_store_countries()
+
+        def usa_gdp_series():
+            db = SessionLocal()
+            try:
+                return sorted(
+                    db.query(IndicatorValue.year, IndicatorValue.value)
+                    .join(Indicator, Indicator.id == IndicatorValue.indicator_id)
+                    .join(Country, Country.id == IndicatorValue.country_id)
+                    .filter(Indicator.code == "NY.GDP.MKTP.CD", Country.iso_code_alpha3 == "USA")
+                    .all()
+                )
+            finally:
+                db.close()
+
+        scrape(gdp)
+        versions = [scrape({})]
+        kept_series = usa_gdp_series()
+        versions.append(scrape(gdp))
+        db = SessionLocal()
+        try:
+            gdp_total = db.query(Country.gdp_total).filter_by(iso_code_alpha3="USA").scalar()
+            gdp_changes = db.query(CountryChange).filter(
+                CountryChange.version.in_(versions), CountryChange.field == "gdp_total"
+            ).count()
+        finally:
+            db.close()
+        if gdp_total == 2.1e13 and gdp_changes == 0 and kept_series == [(2019, 2.0e13), (2020, 2.1e13)]:
+            print("   ✅ Indicator outage kept previous values and series without history rows")
+            return True
+        print(f"   ❌ Indicator outage: gdp_total={gdp_total}, {gdp_changes} history rows, series {kept_series}")
+        return False
+
+    except Exception as e:
+        print(f"   ❌ Change history test failed: {e}")
+        return False
+
+def test_language_graph_paths():
+    """Test that the scipy.sparse and NumPy language graph paths give the same edges and weights"""
+    try:
+        print("🕸️ Testing language graph paths...")
+        import numpy as np
+        from unittest import mock
+        from app.services import language_graph
+
+        if "pytest" in sys.modules:
+            sys.modules["pytest"].importorskip("scipy")
+        elif language_graph.sparse is None:
+            print("   ⏭️ Skipped: scipy is not installed, only the NumPy path can run")
+            return True
+
+        # Weighted incidence with repeated entries, a dense row and an unused column
+        rng = np.random.default_rng(7)
+        rows = np.r_[rng.integers(0, 40, 300), np.full(20, 40)]
+        cols = np.r_[rng.integers(0, 24, 300), np.arange(20)]
+        weights = rng.random(len(rows))
+        edges_i, edges_j = rng.integers(0, 60, 40), rng.integers(0, 60, 40)
+
+        def run():
+            return (language_graph.gram(rows, cols, 25), language_graph.gram(rows, cols, 25, weights),
+                    language_graph.component_labels(60, edges_i, edges_j))
+
+        sparse_result = run()
+        with mock.patch.object(language_graph, "sparse", None):
+            numpy_result = run()
+        for name, a, b in (("gram", sparse_result[0], numpy_result[0]), ("weighted gram", sparse_result[1], numpy_result[1])):
+            if not (np.array_equal(a[0], b[0]) and np.array_equal(a[1], b[1]) and np.allclose(a[2], b[2])):
+                print(f"   ❌ {name} differs: {len(a[0])} sparse vs {len(b[0])} NumPy entries")
+                return False
+        if not np.array_equal(sparse_result[2], numpy_result[2]):
+            print("   ❌ Component labels differ between the paths")
+            return False
+        print(f"   ✅ Same {len(sparse_result[1][0])} edges, weights and {sparse_result[2].max() + 1} components on both paths")
+
+        # The whole summary, rankings included, from the database
+        summary = language_graph.build_summary()
+        with mock.patch.object(language_graph, "sparse", None):
+            fallback = language_graph.build_summary()
+        if summary != fallback:
+            print("   ❌ Language summary differs between the paths")
+            return False
+        print("   ✅ Language summary is identical on both paths")
+        return True
+
+    except Exception as e:
+        print(f"   ❌ Language graph test failed: {e}")
+        return False
+
 def test_visualizations():
     """Test visualization generation"""
     try:
@@ -81,7 +716,18 @@ def test_visualizations():
         else:
             print("   ❌ Language distribution chart failed")
             return False
-        
+
+        # Test level of detail: large scatter charts are binned server-side
+        import plotly.graph_objects as go
+        from app.services.lod import apply_level_of_detail, BIN_POINTS
+        points = list(range(BIN_POINTS + 1))
+        binned = apply_level_of_detail(go.Figure(go.Scatter(x=points, y=points, mode="markers")), "test")
+        if [trace.type for trace in binned.data] == ["heatmap", "scattergl"]:
+            print("   ✅ Large scatter chart binned successfully")
+        else:
+            print("   ❌ Large scatter chart was not binned")
+            return False
+
         print("   🎉 All visualization tests passed!")
         return True
         
@@ -91,6 +737,73 @@ def test_visualizations():
         traceback.print_exc()
         return False
 
+def test_geometry():
+    """Test local map geometry: simplification per zoom level and bounding-box queries"""
+    try:
+        print("🗺️ Testing map geometry...")
+        import numpy as np
+        from unittest import mock
+        from app.services import geometry
+
+        fixture = str(project_root / "test_fixtures" / "countries.geojson")
+        with mock.patch.object(geometry, "GEOMETRY_FILE", fixture), mock.patch.object(geometry, "_store", None):
+            store = geometry.load_geometry()
+            if store.ids != ["AAA", "BBB", "CCC"]:
+                print(f"   ❌ Unexpected feature ids: {store.ids}")
+                return False
+
+            # Every original vertex stays within the zoom's tolerance of the simplified outline
+            original = np.array(geometry._read_features(fixture)[0][1][0][0])
+            counts = []
+            for zoom in range(geometry.ZOOM_LEVELS):
+                outline = np.array(store.levels[zoom][0]["coordinates"][0][0])
+                a, b = outline[:-1], outline[1:]
+                d = b - a
+                t = np.clip(((original[:, None] - a) * d).sum(axis=2) / (d * d).sum(axis=1), 0, 1)
+                distance = np.hypot(*(a + t[..., None] * d - original[:, None]).transpose(2, 0, 1)).min(axis=1)
+                if distance.max() > geometry.zoom_tolerance(zoom) * 1.1:
+                    print(f"   ❌ Zoom {zoom} deviates {distance.max():.4f}° (tolerance {geometry.zoom_tolerance(zoom):.4f}°)")
+                    return False
+                counts.append(len(outline))
+            if counts != sorted(counts) or counts[0] >= len(original):
+                print(f"   ❌ Point counts per zoom not increasing: {counts}")
+                return False
+            island = store.levels[0][2]["coordinates"]
+            if len(island) != 1 or len(island[0][0]) < 4:
+                print("   ❌ Tiny shape was dropped at low zoom")
+                return False
+            print(f"   ✅ Shapes simplified within tolerance at every zoom ({counts} points)")
+
+            # Bounding-box queries go through the grid index
+            if (store.query(95, 35, 115, 55) != [1] or store.query(-180, -90, 180, 90) != [0, 1, 2]
+                    or store.query(50, 60, 60, 70) != [] or store.query(-151, -21, -149, -19) != [2]):
+                print("   ❌ Bounding-box query returned the wrong shapes")
+                return False
+
+            from app import create_app
+            client = create_app().test_client()
+            world = client.get("/visualize/geometry/0.geojson").get_json()
+            window = client.get("/visualize/geometry/3.geojson?bbox=95,35,115,55").get_json()
+            if ([f["id"] for f in world["features"]] != ["AAA", "BBB", "CCC"]
+                    or [f["id"] for f in window["features"]] != ["BBB"]
+                    or client.get("/visualize/geometry/9.geojson").status_code != 404):
+                print("   ❌ Geometry endpoint returned the wrong shapes")
+                return False
+            print("   ✅ Bounding-box queries and geometry endpoint work")
+
+        # The bundled world shapes load out of the box
+        with mock.patch.object(geometry, "_store", None):
+            store = geometry.load_geometry()
+            if store is None or not {"USA", "FRA", "NOR", "UNK"} <= set(store.ids):
+                print("   ❌ Bundled country geometry is missing or incomplete")
+                return False
+            print(f"   ✅ Bundled geometry has {len(store.ids)} countries")
+        return True
+
+    except Exception as e:
+        print(f"   ❌ Geometry test failed: {e}")
+        return False
+
 def test_flask_routes():
     """Test Flask application routes"""
     try:
@@ -131,7 +844,51 @@ def test_flask_routes():
             else:
                 print(f"   ❌ Scrape status API failed: {response.status_code}")
                 return False
-        
+            
+            # Test metrics endpoint
+            response = client.get('/metrics')
+            if response.status_code == 200 and b'wiki_http_request_seconds' in response.data:
+                print("   ✅ Metrics endpoint works successfully")
+            else:
+                print(f"   ❌ Metrics endpoint failed: {response.status_code}")
+                return False
+            
+            # Test nearest-country API
+            response = client.get('/api/countries/near?lat=48.85&lon=2.35&k=3')
+            if response.status_code == 200 and 'countries' in response.get_json():
+                print(f"   ✅ Nearest countries API works successfully ({len(response.get_json()['countries'])} results)")
+            else:
+                print(f"   ❌ Nearest countries API failed: {response.status_code}")
+                return False
+            
+            # Test materialized region aggregates
+            response = client.get('/api/regions')
+            if response.status_code == 200 and response.get_json()['regions']:
+                print(f"   ✅ Region aggregates API works successfully ({len(response.get_json()['regions'])} regions)")
+            else:
+                print(f"   ❌ Region aggregates API failed: {response.status_code}")
+                return False
+
+            # Test change history API
+            response = client.get('/api/changes?since=0')
+            if response.status_code == 200 and 'changes' in response.get_json():
+                print(f"   ✅ Change history API works successfully ({response.get_json()['total']} changes)")
+            else:
+                print(f"   ❌ Change history API failed: {response.status_code}")
+                return False
+
+            # Malformed numbers in the query fall back to the defaults
+            key = app.config["SECRET_KEY"]
+            statuses = [client.get(url).status_code for url in (
+                f'/admin/profiles?key={key}&top=x', f'/admin/profiles?key={key}&top=-5',
+            )]
+            response = client.get('/api/countries/near?lat=48.85&lon=2.35&k=x')
+            if statuses == [200, 200] and response.status_code == 200 and len(response.get_json()['countries']) == 10:
+                print("   ✅ Malformed top and k arguments use their defaults")
+            else:
+                print(f"   ❌ Malformed arguments returned {statuses} and {response.status_code}")
+                return False
+
         print("   🎉 All Flask route tests passed!")
         return True
         
@@ -139,6 +896,184 @@ def test_flask_routes():
         print(f"   ❌ Flask route test failed: {e}")
         return False
 
+def test_profile_retention():
+    """Test that stored profiles are capped and say what they cover"""
+    try:
+        print("🔬 Testing profile retention...")
+        import os
+        import tempfile
+        from unittest import mock
+        from app.services import profiling
+
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(profiling, "PROFILE_DIR", tmp), \
+             mock.patch.object(profiling, "MAX_PROFILES", 2):
+            ids = []
+            for run in range(3):
+                with profiling.ProfileSession("job", f"run {run}") as session:
+                    sum(range(1000))
+                ids.append(session.profile_id)
+            kept = sorted(os.listdir(tmp))
+            if kept != sorted(ids[1:]) or profiling.load_profile(ids[2])["scope"] != profiling.SCOPE:
+                print(f"   ❌ Kept {kept} of {ids}")
+                return False
+        print("   ✅ Only the newest profiles are kept, each noting its scope")
+        return True
+
+    except Exception as e:
+        print(f"   ❌ Profile retention test failed: {e}")
+        return False
+
+def test_asgi_chart_server():
+    """Test the ASGI chart server: shared renders, stale-while-revalidate and render pool recovery"""
+    try:
+        print("⚡ Testing ASGI chart server...")
+        import asyncio
+        import multiprocessing
+        import os
+        import time
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+        from concurrent.futures.process import BrokenProcessPool
+        from unittest import mock
+        from app import asgi, create_app
+        from app.models.base import SessionLocal
+        from app.routes.visualize import CHART_REGISTRY
+        from app.services.versioning import bump_dataset_version, publish_dataset_version
+
+        def new_version():
+            db = SessionLocal()
+            try:
+                version = bump_dataset_version(db)
+                db.commit()
+            finally:
+                db.close()
+            publish_dataset_version(version)
+            return version
+
+        async def get(server, path):
+            """(status, ETag) of a GET through the ASGI app"""
+            messages = []
+
+            async def receive():
+                return {"type": "http.request", "body": b""}
+
+            async def send(message):
+                messages.append(message)
+
+            await server({"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": []}, receive, send)
+            return messages[0]["status"], dict(messages[0]["headers"]).get(b"etag", b"").decode()
+
+        async def concurrently(server, path, count):
+            return await asyncio.gather(*[get(server, path) for _ in range(count)])
+
+        async def stale_then_fresh(server, path):
+            first = await get(server, path)
+            await asyncio.gather(*list(server.revalidations))
+            return first, await get(server, path)
+
+        name = sorted(CHART_REGISTRY)[0]
+        path = CHART_REGISTRY[name].rule
+        etag = lambda version: f'"v{version}-{name}-html-identity"'
+        render = asgi._render_in_worker
+
+        def slow_render(name, version):
+            time.sleep(0.2)  # every request arrives while the first render runs
+            return render(name, version)
+
+        server = asgi.ChartServer(create_app(), render_workers=2)
+        try:
+            # Threads instead of processes, so the slowed-down render is used
+            server.render_pool = ThreadPoolExecutor(max_workers=2)
+            with mock.patch.object(asgi, "_render_in_worker", slow_render):
+                version = new_version()
+                # No older version to fall back on: every request has to wait for the render
+                with mock.patch.object(asgi.artifacts, "stale_version", return_value=None):
+                    results = asyncio.run(concurrently(server, path, 10))
+                if server.renders != 1 or results != [(200, etag(version))] * 10:
+                    print(f"   ❌ 10 concurrent misses made {server.renders} renders: {set(results)}")
+                    return False
+                print("   ✅ Concurrent misses share one render")
+
+                stale, version = version, new_version()
+                first, second = asyncio.run(stale_then_fresh(server, path))
+                if server.renders != 2 or first != (200, etag(stale)) or second != (200, etag(version)):
+                    print(f"   ❌ After a data refresh served {first}, then {second}")
+                    return False
+                print("   ✅ Previous version served while the new one renders")
+            server.render_pool.shutdown()
+
+            # A render worker dying breaks its pool for good; the next miss replaces it
+            broken = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+            try:
+                broken.submit(os._exit, 1).result()
+            except BrokenProcessPool:
+                pass
+            server.render_pool = broken
+            version = new_version()
+            with mock.patch.object(asgi.artifacts, "stale_version", return_value=None):
+                result = asyncio.run(get(server, path))
+            if result != (200, etag(version)) or server.render_pool is broken:
+                print(f"   ❌ Chart miss after a render worker died returned {result}")
+                return False
+            print("   ✅ Render pool replaced after a worker died")
+        finally:
+            server.close()
+        return True
+
+    except Exception as e:
+        print(f"   ❌ ASGI chart server test failed: {e}")
+        return False
+
+def test_static_export():
+    """Test the static export: manifest, files and that every internal link resolves"""
+    try:
+        print("📦 Testing static export...")
+        import json
+        import os
+        import re
+        import tempfile
+        from app.services.static_export import MANIFEST_FILE, export_static
+        from app.services.versioning import current_dataset_version
+
+        with tempfile.TemporaryDirectory() as tmp:
+            site = os.path.join(tmp, "site")
+            manifest = export_static(site, max_workers=2)
+            with open(os.path.join(site, MANIFEST_FILE)) as f:
+                stored = json.load(f)
+            files = set(stored["files"])
+            if stored != manifest or manifest["dataset_version"] != current_dataset_version():
+                print("   ❌ manifest.json doesn't match the export")
+                return False
+            absent = [path for path in files if not os.path.isfile(os.path.join(site, *path.split("/")))]
+            if absent or manifest["plotlyjs"].lstrip("/") not in files:
+                print(f"   ❌ Files listed in the manifest are missing: {absent[:5]}")
+                return False
+
+            # A static server has no query strings, forms or API behind the pages
+            broken = set()
+            for path in sorted(files):
+                if not path.endswith(".html"):
+                    continue
+                with open(os.path.join(site, *path.split("/")), encoding="utf-8") as f:
+                    html = f.read()
+                if "<form" in html:
+                    broken.add(f"{path}: <form>")
+                for url in re.findall(r'(?:href|src|action)="([^"]*)"', html):
+                    if url.startswith(("http://", "https://", "//", "#")):
+                        continue
+                    target = url.split("#")[0].strip("/")
+                    if "?" in url or not url.startswith("/") or (target not in files and f"{target}/index.html".lstrip("/") not in files):
+                        broken.add(f"{path}: {url}")
+            if broken:
+                print(f"   ❌ Links that don't resolve in the export: {sorted(broken)[:5]}")
+                return False
+            pages = sum(1 for path in files if path.endswith(".html"))
+            print(f"   ✅ Exported {len(files)} files ({pages} pages) with every internal link resolving")
+        return True
+
+    except Exception as e:
+        print(f"   ❌ Static export test failed: {e}")
+        return False
+
 def main():
     """Run all tests"""
     print("=" * 70)
@@ -147,9 +1082,23 @@ def main():
     
     tests = [
         ("Database Connection", test_database_connection),
+        ("PostgreSQL Statements", test_postgresql_statements),
+        ("HTTP Client", test_http_client),
         ("Scraping System", test_scraping_system),
+        ("Ingest Checkpoints", test_ingest_checkpoints),
+        ("Ingest Validation", test_validation_rejects_batch),
+        ("Dataset Versioning", test_dataset_versioning),
+        ("Database Reset", test_database_reset),
+        ("Dataset Archive", test_dataset_archive),
+        ("Indicator Paging", test_indicator_paging),
+        ("Change History", test_change_history),
+        ("Language Graph", test_language_graph_paths),
         ("Visualization Generation", test_visualizations),
-        ("Flask Routes", test_flask_routes)
+        ("Map Geometry", test_geometry),
+        ("Flask Routes", test_flask_routes),
+        ("Profile Retention", test_profile_retention),
+        ("ASGI Chart Server", test_asgi_chart_server),
+        ("Static Export", test_static_export)
     ]
     
     passed = 0